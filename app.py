@@ -2,10 +2,25 @@
 import os
 import sys
 import time
+import signal
+import secrets
 import webbrowser
 import subprocess
+import urllib.request
 from pathlib import Path
 
+BACKEND_PORT = 4000
+PING_URL = f"http://127.0.0.1:{BACKEND_PORT}/api/ping"
+
+# Production serving (gunicorn prefork); run with --dev for Flask's debug server instead
+WEB_WORKERS = int(os.environ.get("WEB_WORKERS", 0)) or os.cpu_count() or 2
+WEB_THREADS = int(os.environ.get("WEB_THREADS", 4))                   # API request threads per worker
+SSE_THREAD_STREAMS = int(os.environ.get("SSE_THREAD_STREAMS", 32))     # extra threads per worker for live event streams
+WEB_MAX_REQUESTS = int(os.environ.get("WEB_MAX_REQUESTS", 5000))      # recycle a worker after this many requests
+WEB_MAX_REQUESTS_JITTER = int(os.environ.get("WEB_MAX_REQUESTS_JITTER", 500))  # so workers don't all recycle at once
+WEB_GRACEFUL_TIMEOUT = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", 30))  # seconds to finish in-flight requests
+READY_TIMEOUT = float(os.environ.get("READY_TIMEOUT", 30))            # seconds to wait for /api/ping
+
 # Fix Windows Unicode display
 if sys.platform == 'win32':
     import codecs
@@ -39,6 +54,13 @@ def check_requirements():
         print("Run: pip install flask flask-cors mysql-connector-python bcrypt")
         sys.exit(1)
     
+    # Optional: without it the launcher falls back to the dev server
+    try:
+        __import__('gunicorn')
+        print("  [OK] gunicorn")
+    except ImportError:
+        print("  [--] gunicorn - optional, needed for multi-worker serving")
+    
     print("[OK] All requirements satisfied!\n")
 
 def check_database():
@@ -62,37 +84,147 @@ def check_database():
         print("   python setup_db.py\n")
         return False
 
+def production_available():
+    """gunicorn only runs on POSIX; fall back to the dev server elsewhere or if it's missing"""
+    if "--dev" in sys.argv or sys.platform == "win32":
+        return False
+    try:
+        __import__("gunicorn")
+        return True
+    except ImportError:
+        print("[WARNING] gunicorn not installed - using the Flask dev server")
+        return False
+
+def backend_command(backend_path, production):
+    if not production:
+        return [sys.executable, str(backend_path)]
+    return [
+        sys.executable, "-m", "gunicorn", "app:app",
+        "--bind", f"127.0.0.1:{BACKEND_PORT}",
+        "--workers", str(WEB_WORKERS),
+        "--worker-class", "gthread",
+        # Each open event stream holds a thread; the backend caps streams at SSE_THREAD_STREAMS
+        "--threads", str(WEB_THREADS + SSE_THREAD_STREAMS),
+        "--max-requests", str(WEB_MAX_REQUESTS),
+        "--max-requests-jitter", str(WEB_MAX_REQUESTS_JITTER),
+        "--graceful-timeout", str(WEB_GRACEFUL_TIMEOUT),
+        "--access-logfile", "-",
+        "--error-logfile", "-",
+    ]
+
+def backend_env(production):
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    # The backend adapts features that keep per-process state (e.g. progress write-behind) when this is > 1
+    env["WEB_WORKERS"] = str(WEB_WORKERS if production else 1)
+    env["SSE_THREAD_STREAMS"] = str(SSE_THREAD_STREAMS)
+    if production and WEB_WORKERS > 1 and env.get("PROGRESS_WRITE_BEHIND") == "1" \
+            and env.get("PROGRESS_MERGE", "latest") != "max":
+        print(f"[WARNING] PROGRESS_WRITE_BEHIND with {WEB_WORKERS} workers merges with PROGRESS_MERGE=max "
+              "(set WEB_WORKERS=1 to keep latest)")
+        env["PROGRESS_MERGE"] = "max"
+    if production and not env.get("SESSION_KEYS"):
+        # Every worker must sign and verify with the same key, or tokens only work on the worker that issued them
+        env["SESSION_KEYS"] = f"launch:{secrets.token_urlsafe(32)}"
+    return env
+
+def wait_until_ready(process, workers):
+    """Poll /api/ping until it answers and every worker has been forked; None if the process dies or times out"""
+    started = time.monotonic()
+    deadline = started + READY_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return None
+        try:
+            with urllib.request.urlopen(PING_URL, timeout=1) as resp:
+                if resp.status == 200 and len(worker_pids(process.pid)) >= workers:
+                    return time.monotonic() - started
+        except OSError:
+            pass
+        time.sleep(0.1)
+    return None
+
+def worker_pids(parent_pid):
+    """Child pids of the gunicorn master (Linux /proc); empty where /proc isn't available"""
+    pids = []
+    proc = Path("/proc")
+    if not proc.is_dir():
+        return pids
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        # Field 4 (ppid) follows the parenthesised command name, which may contain spaces
+        if int(stat.rsplit(")", 1)[1].split()[1]) == parent_pid:
+            pids.append(int(entry.name))
+    return sorted(pids)
+
+def rss_mb(pid):
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def report_workers(pids):
+    rows = [(pid, rss_mb(pid)) for pid in pids]
+    total = sum(mb for _, mb in rows if mb)
+    print(f"   Workers: {len(rows)}   total RSS {total:.1f} MB")
+    for pid, mb in rows:
+        print(f"     pid {pid:<8} {f'{mb:.1f} MB' if mb is not None else 'n/a'}")
+
 def start_backend():
-    """Start the Flask backend server"""
-    print("[*] Starting Flask Backend Server...")
+    """Start the backend: a gunicorn prefork pool, or Flask's debug server with --dev"""
+    production = production_available()
+    if production:
+        print(f"[*] Starting backend (gunicorn, {WEB_WORKERS} workers x {WEB_THREADS} threads "
+              f"+ {SSE_THREAD_STREAMS} for event streams)...")
+    else:
+        print("[*] Starting Flask Backend Server (dev mode)...")
     backend_path = Path(__file__).parent / "edutrack-backend" / "app.py"
     
     if not backend_path.exists():
         print(f"[ERROR] Backend file not found: {backend_path}")
         sys.exit(1)
     
-    # Start backend in a subprocess
+    # Logs go straight to this terminal; a PIPE nobody reads eventually blocks the server
     backend_process = subprocess.Popen(
-        [sys.executable, str(backend_path)],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        cwd=str(backend_path.parent)
+        backend_command(backend_path, production),
+        cwd=str(backend_path.parent),
+        env=backend_env(production),
+        # Own process group: CTRL+C reaches only the launcher, which then shuts down gracefully
+        start_new_session=sys.platform != "win32",
     )
     
-    # Wait a bit for server to start
-    print("   Waiting for server to start...")
-    time.sleep(3)
-    
-    # Check if process is still running
-    if backend_process.poll() is None:
-        print("[OK] Backend server started on http://127.0.0.1:4000\n")
-        return backend_process
-    else:
+    print("   Waiting for /api/ping...")
+    ready_in = wait_until_ready(backend_process, WEB_WORKERS if production else 0)
+    if ready_in is None:
         print("[ERROR] Backend failed to start!")
-        stdout, stderr = backend_process.communicate()
-        print("Error:", stderr.decode())
+        stop_backend(backend_process)
         sys.exit(1)
 
+    print(f"[OK] Backend ready on http://127.0.0.1:{BACKEND_PORT} in {ready_in:.2f}s")
+    if production:
+        report_workers(worker_pids(backend_process.pid))
+    print()
+    return backend_process, production
+
+def stop_backend(process):
+    """SIGTERM lets gunicorn finish in-flight requests (and flush buffers) before exiting"""
+    if process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=WEB_GRACEFUL_TIMEOUT + 5)
+    except subprocess.TimeoutExpired:
+        print("[WARNING] Backend did not stop in time - killing it")
+        process.kill()
+        process.wait()
+
 def open_frontend():
     """Open the frontend in default browser"""
     print("[*] Opening frontend in browser...")
@@ -114,7 +246,7 @@ def print_instructions():
     print("="*60)
     print()
     print("Frontend:  file:///.../index.html (opened in browser)")
-    print("Backend:   http://127.0.0.1:4000")
+    print(f"Backend:   http://127.0.0.1:{BACKEND_PORT}")
     print("Database:  edutrack_lms @ localhost")
     print()
     print("Default Admin Login:")
@@ -154,7 +286,7 @@ def main():
             sys.exit(1)
     
     # Step 3: Start backend
-    backend_process = start_backend()
+    backend_process, production = start_backend()
     
     # Step 4: Open frontend
     open_frontend()
@@ -162,15 +294,28 @@ def main():
     # Step 5: Print instructions
     print_instructions()
     
-    # Step 6: Keep running
+    # Step 6: Keep running, reporting recycled workers
+    def on_sigterm(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, on_sigterm)
+
     try:
         print("[INFO] Backend server is running... (Press CTRL+C to stop)\n")
-        while True:
+        workers = worker_pids(backend_process.pid) if production else []
+        while backend_process.poll() is None:
             time.sleep(1)
+            if not production:
+                continue
+            current = worker_pids(backend_process.pid)
+            if workers and current and current != workers:
+                print(f"[INFO] Workers recycled: {len(set(workers) - set(current))} replaced")
+                report_workers(current)
+            workers = current
+        print(f"[ERROR] Backend exited with code {backend_process.returncode}")
+        sys.exit(1)
     except KeyboardInterrupt:
-        print("\n\n[*] Shutting down...")
-        backend_process.terminate()
-        backend_process.wait()
+        print("\n\n[*] Shutting down (finishing in-flight requests)...")
+        stop_backend(backend_process)
         print("[OK] EduTrack LMS stopped successfully!")
         print("Goodbye!\n")
 
@@ -5,6 +5,41 @@ const COURSES_KEY = "edutrack_courses";
 const ENROLLMENTS_KEY = "edutrack_enrollments";
 const QUIZ_RESULTS_KEY = "edutrack_quiz_results";
 const API_BASE_URL = "http://127.0.0.1:4000";
+const READ_AFTER_KEY = "edutrack_read_after";
+
+
+// ====== READ-YOUR-WRITES ======
+// After a write the server returns a signed X-Read-After marker. Sending it back until
+// it expires makes any server worker read from the primary, so our own writes show up.
+
+const nativeFetch = window.fetch.bind(window);
+
+function readAfterMarker() {
+    const marker = localStorage.getItem(READ_AFTER_KEY);
+    if (!marker) return null;
+    // Layout: <key id>.<deadline in epoch ms>.<signature>
+    if (Number(marker.split(".")[1]) <= Date.now()) {
+        localStorage.removeItem(READ_AFTER_KEY);
+        return null;
+    }
+    return marker;
+}
+
+window.fetch = async function (input, init = {}) {
+    const url = typeof input === "string" ? input : input.url;
+    if (!url.startsWith(API_BASE_URL)) return nativeFetch(input, init);
+
+    const marker = readAfterMarker();
+    if (marker) {
+        const headers = new Headers(init.headers || {});
+        headers.set("X-Read-After", marker);
+        init = { ...init, headers };
+    }
+    const res = await nativeFetch(input, init);
+    const fresh = res.headers.get("X-Read-After");
+    if (fresh) localStorage.setItem(READ_AFTER_KEY, fresh);
+    return res;
+};
 
 
 // ====== ENROLLMENT MANAGEMENT ======
@@ -373,6 +408,7 @@ function initLoginPage() {
 
             // Save user session
             setUser(data.user.name, data.user.role, data.user.email);
+            localStorage.setItem("authToken", data.token);
 
             // Redirect based on role
             if (data.user.role === "admin") {
@@ -793,7 +829,8 @@ function initAdminDashboard() {
         return;
     }
 
-    // Load and display users
+    // Load totals and users
+    loadPlatformStats();
     loadAndDisplayUsers();
 
     // Handle add teacher form
@@ -839,8 +876,9 @@ function initAdminDashboard() {
                     // Reset form
                     addTeacherForm.reset();
                     
-                    // Refresh users list
+                    // Refresh totals and users list
                     setTimeout(() => {
+                        loadPlatformStats();
                         loadAndDisplayUsers();
                         messageEl.style.display = "none";
                     }, 1500);
@@ -855,23 +893,72 @@ function initAdminDashboard() {
         });
     }
 
-    function loadAndDisplayUsers() {
-        fetch(`${API_BASE_URL}/api/users`)
-            .then(res => res.json())
-            .then(users => {
-                const totalUsers = users.length;
-                const totalStudents = users.filter((u) => u.role === "student").length;
-                const totalTeachers = users.filter((u) => u.role === "teacher").length;
+    function setText(id, value) {
+        const el = document.getElementById(id);
+        if (el) el.textContent = value;
+    }
+
+    // Totals come from counters the backend maintains, not from counting the user list
+    function loadPlatformStats() {
+        fetch(`${API_BASE_URL}/api/admin/stats`)
+            .then(res => {
+                if (!res.ok) throw new Error(`HTTP ${res.status}`);
+                return res.json();
+            })
+            .then(stats => {
+                const byRole = stats.users.by_role || {};
+                totalUsersEl.textContent = stats.users.total;
+                totalStudentsEl.textContent = byRole.student || 0;
+                totalTeachersEl.textContent = byRole.teacher || 0;
+                setText("totalCourses", stats.courses.total);
+                setText("totalEnrollments", stats.enrollments);
+                setText("totalCompletions", stats.lesson_completions);
+                setText("totalQuizAttempts", stats.quiz_attempts);
+                setText("activeStudents24h", stats.active_students["24h"]);
+                setText("activeStudents7d", stats.active_students["7d"]);
+                setText("statsAsOf", stats.active_students.as_of
+                    ? `Active counts as of ${new Date(stats.active_students.as_of).toLocaleString()}`
+                    : "");
+            })
+            .catch(err => {
+                console.error("Error loading platform stats:", err);
+                // Fallback to localStorage
+                const users = loadUsers();
+                totalUsersEl.textContent = users.length;
+                totalStudentsEl.textContent = users.filter((u) => u.role === "student").length;
+                totalTeachersEl.textContent = users.filter((u) => u.role === "teacher").length;
+            });
+    }
+
+    const loadMoreBtn = document.getElementById("loadMoreUsers");
+    const USERS_PAGE_SIZE = 50;
+    let usersCursor = null;
+    let usersShown = 0;
 
-                totalUsersEl.textContent = totalUsers;
-                totalStudentsEl.textContent = totalStudents;
-                totalTeachersEl.textContent = totalTeachers;
+    if (loadMoreBtn) {
+        loadMoreBtn.addEventListener("click", () => loadAndDisplayUsers(usersCursor));
+    }
 
-                usersTableBody.innerHTML = users
+    // One keyset page at a time; without a cursor the table starts over
+    function loadAndDisplayUsers(cursor = null) {
+        const params = new URLSearchParams({ limit: USERS_PAGE_SIZE });
+        if (cursor) params.set("cursor", cursor);
+
+        fetch(`${API_BASE_URL}/api/users?${params}`)
+            .then(res => {
+                if (!res.ok) throw new Error(`HTTP ${res.status}`);
+                return res.json();
+            })
+            .then(page => {
+                if (!cursor) {
+                    usersTableBody.innerHTML = "";
+                    usersShown = 0;
+                }
+                usersTableBody.insertAdjacentHTML("beforeend", page.items
                     .map(
                         (u, index) => `
                     <tr>
-                        <td>${index + 1}</td>
+                        <td>${usersShown + index + 1}</td>
                         <td>${u.name}</td>
                         <td>${u.email}</td>
                         <td>${u.role}</td>
@@ -879,20 +966,17 @@ function initAdminDashboard() {
                     </tr>
                 `
                     )
-                    .join("");
+                    .join(""));
+                usersShown += page.items.length;
+                usersCursor = page.next_cursor;
+                if (loadMoreBtn) loadMoreBtn.style.display = usersCursor ? "inline-block" : "none";
             })
             .catch(err => {
                 console.error("Error loading users:", err);
+                if (cursor) return;
+                if (loadMoreBtn) loadMoreBtn.style.display = "none";
                 // Fallback to localStorage
                 const users = loadUsers();
-                const totalUsers = users.length;
-                const totalStudents = users.filter((u) => u.role === "student").length;
-                const totalTeachers = users.filter((u) => u.role === "teacher").length;
-
-                totalUsersEl.textContent = totalUsers;
-                totalStudentsEl.textContent = totalStudents;
-                totalTeachersEl.textContent = totalTeachers;
-
                 usersTableBody.innerHTML = users
                     .map(
                         (u, index) => `
@@ -1459,6 +1543,8 @@ function initCourseStudents() {
   const enrollments = loadEnrollments().filter((e) => e.courseId === courseId);
   const users = loadUsers();
 
+  watchCourseEvents(courseId, tbody, emptyEl, users);
+
   if (!enrollments.length) {
     tbody.innerHTML = "";
     emptyEl.textContent = "No students have enrolled yet.";
@@ -1481,17 +1567,65 @@ function initCourseStudents() {
         ? `${quizRes.score}/${quizRes.total}`
         : "Not attempted";
 
-      return `
-        <tr>
-          <td>${index + 1}</td>
+      return courseStudentRow(index + 1, name, enr.email, progress, quizText);
+    })
+    .join("");
+}
+
+function courseStudentRow(position, name, email, progress, quizText) {
+  return `
+        <tr data-email="${email.toLowerCase()}">
+          <td>${position}</td>
           <td>${name}</td>
-          <td>${enr.email}</td>
-          <td>${progress}%</td>
-          <td>${quizText}</td>
+          <td>${email}</td>
+          <td class="progress-cell">${progress}%</td>
+          <td class="quiz-cell">${quizText}</td>
         </tr>
       `;
-    })
-    .join("");
+}
+
+// Live updates for the course students table over Server-Sent Events.
+// The browser reconnects by itself and the server resumes after the last event seen.
+function watchCourseEvents(courseId, tbody, emptyEl, users) {
+  if (!window.EventSource) return;
+
+  const source = new EventSource(
+    `${API_BASE_URL}/api/events/course/${encodeURIComponent(courseId)}`
+  );
+  const rowFor = (email) =>
+    tbody.querySelector(`tr[data-email="${CSS.escape(email)}"]`);
+
+  source.addEventListener("enrollment", (e) => {
+    const data = JSON.parse(e.data);
+    if (rowFor(data.student_email)) return;
+    const stu = users.find((u) => u.email.toLowerCase() === data.student_email);
+    const name = stu ? stu.name : "(Unknown)";
+    const position = tbody.querySelectorAll("tr").length + 1;
+    tbody.insertAdjacentHTML(
+      "beforeend",
+      courseStudentRow(position, name, data.student_email, 0, "Not attempted")
+    );
+    emptyEl.textContent = "";
+  });
+
+  source.addEventListener("progress", (e) => {
+    const data = JSON.parse(e.data);
+    const row = rowFor(data.student_email);
+    if (row) row.querySelector(".progress-cell").textContent = `${data.progress}%`;
+  });
+
+  source.addEventListener("quiz_result", (e) => {
+    const data = JSON.parse(e.data);
+    const row = rowFor(data.student_email);
+    if (row) row.querySelector(".quiz-cell").textContent = `${data.score}/${data.total}`;
+  });
+
+  source.addEventListener("reset", () => {
+    // Too much was missed to replay; the table may be stale until the page is reloaded
+    console.warn("Live updates restarted; reload to refresh the table");
+  });
+
+  window.addEventListener("beforeunload", () => source.close());
 }
 
 
@@ -1,11 +1,28 @@
 import os
 import sys
+import atexit
+import base64
+import secrets
+import threading
 from datetime import datetime
-from flask import Flask, request, jsonify
+from functools import wraps, partial
+from flask import Flask, Response, request, jsonify, g, has_request_context
 from flask_cors import CORS
 import mysql.connector
-import bcrypt
 import json
+from db_pool import ConnectionPool, PoolUnavailable
+from db_router import ReplicaRouter, Replica
+from catalog_cache import CatalogCache
+from key_map import KeyMap
+from search_index import SearchIndex
+from hashing import PasswordHasher, HasherBusy
+from tokens import TokenSigner, TokenError, RevocationList, parse_keys
+from progress_buffer import ProgressBuffer
+from platform_stats import PlatformStats, bump_sql, role_bucket, level_bucket
+from change_feed import ChangeFeed, FeedFull, HEARTBEAT, preamble, retry_later, frames, event_sql, events_sql
+from export import FORMATS, iter_rows, gzip_chunks
+from metrics import Metrics, TimedCursor, COUNT_BUCKETS
+from slow_queries import SlowQueryLog, DEFAULT_LOG
 
 # Fix Windows Unicode display
 if sys.platform == 'win32':
@@ -19,18 +36,570 @@ MYSQL_USER = "root"
 MYSQL_PASSWORD = "040506"
 MYSQL_DB = "edutrack_lms"
 
+# Connection pool
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 5))            # seconds to wait for a free connection
+DB_POOL_MAX_LIFETIME = float(os.environ.get("DB_POOL_MAX_LIFETIME", 1800))  # recycle connections older than this
+DB_POOL_PING_AFTER = float(os.environ.get("DB_POOL_PING_AFTER", 5))      # ping connections idle longer than this
+
+# Read replicas: "host[:port]" list, comma separated. GET requests read from a healthy
+# replica; writes, background work and the reads of users who just wrote use the primary.
+DB_REPLICA_HOSTS = os.environ.get("DB_REPLICA_HOSTS", "")
+DB_REPLICA_POOL_SIZE = int(os.environ.get("DB_REPLICA_POOL_SIZE", DB_POOL_SIZE))
+DB_REPLICA_MAX_LAG = float(os.environ.get("DB_REPLICA_MAX_LAG", 2))            # seconds behind before a replica is skipped
+DB_REPLICA_CHECK_INTERVAL = float(os.environ.get("DB_REPLICA_CHECK_INTERVAL", 1))
+DB_REPLICA_LAG_SQL = os.environ.get("DB_REPLICA_LAG_SQL") or None              # lag probe returning seconds; default SHOW REPLICA STATUS
+DB_STICKY_SECONDS = float(os.environ.get("DB_STICKY_SECONDS", 5))              # read-your-writes window after a write
+
+# Course catalog cache
+CATALOG_CACHE_TTL = float(os.environ.get("CATALOG_CACHE_TTL", 60))
+CATALOG_CACHE_MAX_ENTRIES = int(os.environ.get("CATALOG_CACHE_MAX_ENTRIES", 1024))
+
+# Email/slug -> integer id map for the hot tables (enrollments, progress, completions, quiz results)
+KEY_MAP_TTL = float(os.environ.get("KEY_MAP_TTL", 600))
+KEY_MAP_MAX_ENTRIES = int(os.environ.get("KEY_MAP_MAX_ENTRIES", 100000))
+
+# Course search index (in-process; writes here update it at once, full rebuilds pick up other processes' writes)
+SEARCH_INDEX_REFRESH = float(os.environ.get("SEARCH_INDEX_REFRESH", 300))   # seconds between background rebuilds
+SEARCH_DEFAULT_RESULTS = 20
+
+# Quiz answer keys (graded server-side)
+ANSWER_KEY_CACHE_TTL = float(os.environ.get("ANSWER_KEY_CACHE_TTL", 300))
+ANSWER_KEY_CACHE_MAX_ENTRIES = int(os.environ.get("ANSWER_KEY_CACHE_MAX_ENTRIES", 4096))
+QUIZ_SHOW_CORRECT = os.environ.get("QUIZ_SHOW_CORRECT", "0") == "1"    # per-question results in grade responses
+
+# Password hashing
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))         # stored hashes with another cost are rehashed on login
+HASH_WORKERS = int(os.environ.get("HASH_WORKERS", os.cpu_count() or 2))
+HASH_QUEUE_LIMIT = int(os.environ.get("HASH_QUEUE_LIMIT", 64))   # pending hashes before new logins get 503
+HASH_TIMEOUT = float(os.environ.get("HASH_TIMEOUT", 10))
+
+# Session tokens: "kid:secret" pairs, comma separated. The first key signs new
+# tokens; keep retired keys listed until their tokens have expired.
+SESSION_KEYS = os.environ.get("SESSION_KEYS", "")
+SESSION_TOKEN_TTL = int(os.environ.get("SESSION_TOKEN_TTL", 8 * 3600))
+REVOCATION_REFRESH = float(os.environ.get("REVOCATION_REFRESH", 30))   # seconds between revocation list reloads
+
+# Processes serving this app; the launcher (../app.py) exports its gunicorn worker count.
+# Progress write-behind only merges with "max" when there is more than one.
+WEB_WORKERS = int(os.environ.get("WEB_WORKERS", 1))
+
+# Progress write-behind: coalesce POST /api/progress in memory and flush in batches
+PROGRESS_WRITE_BEHIND = os.environ.get("PROGRESS_WRITE_BEHIND", "0") == "1"
+PROGRESS_FLUSH_INTERVAL = float(os.environ.get("PROGRESS_FLUSH_INTERVAL", 2))
+PROGRESS_FLUSH_SIZE = int(os.environ.get("PROGRESS_FLUSH_SIZE", 1000))   # pending keys that trigger an early flush
+PROGRESS_MERGE = os.environ.get("PROGRESS_MERGE", "latest")              # "latest" or "max"
+
+# Admin dashboard totals: counters bumped by the write routes, reconciled against the base tables
+PLATFORM_STATS_REFRESH = float(os.environ.get("PLATFORM_STATS_REFRESH", 60))        # seconds between active-student recounts
+PLATFORM_STATS_RECONCILE = float(os.environ.get("PLATFORM_STATS_RECONCILE", 3600))  # seconds between reconciles, across all processes
+
+# Server-Sent Events change feed (progress, completions, quiz results, enrollments)
+SSE_HISTORY = int(os.environ.get("SSE_HISTORY", 2000))              # recent events kept for Last-Event-ID resume
+SSE_BUFFER = int(os.environ.get("SSE_BUFFER", 256))                 # events queued per stream before a slow client is dropped
+SSE_MAX_STREAMS = int(os.environ.get("SSE_MAX_STREAMS", 200))       # open streams per process; more are told to retry later
+# Each stream served by Flask holds a request thread; the launcher gives gunicorn this many on top of WEB_THREADS
+SSE_THREAD_STREAMS = int(os.environ.get("SSE_THREAD_STREAMS", 32))
+SSE_HEARTBEAT = float(os.environ.get("SSE_HEARTBEAT", 15))          # seconds of silence before a keepalive comment
+SSE_RETRY_MS = int(os.environ.get("SSE_RETRY_MS", 3000))            # browser reconnect delay
+SSE_POLL_INTERVAL = float(os.environ.get("SSE_POLL_INTERVAL", 0.25))  # seconds between change_events polls
+SSE_GAP_GRACE = float(os.environ.get("SSE_GAP_GRACE", 2))             # seconds to wait for a missing (uncommitted) event id
+SSE_RETENTION = int(os.environ.get("SSE_RETENTION", 3600))            # seconds change_events rows are kept
+SSE_IDLE_AFTER = float(os.environ.get("SSE_IDLE_AFTER", 30))          # seconds without open streams before polling stops
+
+# Slow-query log (report with: python slow_queries.py)
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 200))           # statements slower than this are logged
+SLOW_QUERY_LOG = os.environ.get("SLOW_QUERY_LOG", DEFAULT_LOG)
+SLOW_QUERY_EXPLAIN = os.environ.get("SLOW_QUERY_EXPLAIN", "1") == "1"  # EXPLAIN each new fingerprint once
+
+# Bulk endpoints
+BULK_MAX_ITEMS = 5000       # items accepted per request
+BULK_CHUNK_SIZE = 500       # rows per multi-row statement
+
+# Pagination
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
 # =============== FLASK SETUP ===============
 app = Flask(__name__)
-CORS(app)
+# X-Read-After is the read-your-writes marker the frontend keeps and sends back
+CORS(app, expose_headers=["X-Read-After"])
+
+# =============== METRICS ===============
+# Process-local; with several workers each one reports its own numbers
+metrics = Metrics()
+metrics.histogram("http_request_duration_seconds", "Request latency by route")
+metrics.counter("http_requests_total", "Requests by route, method and status")
+metrics.histogram("http_request_db_queries", "DB queries issued per request", COUNT_BUCKETS)
+metrics.histogram("http_request_db_seconds", "Time spent in DB queries per request")
+metrics.histogram("db_pool_acquire_seconds", "Time to check out a pooled connection")
+metrics.counter("db_reads_total", "Read checkouts by target and reason")
+metrics.histogram("bcrypt_seconds", "bcrypt time by operation")
+metrics.histogram("bcrypt_queue_wait_seconds", "Time a bcrypt job waited for a worker")
+
+def on_query(operation, params, seconds):
+    metrics.record_query(seconds)
+    if seconds >= slow_log.threshold:
+        route = f"{request.method} {request.url_rule.rule}" if has_request_context() and request.url_rule else "background"
+        slow_log.record(operation, params, seconds, route)
+
+def observe_hash(op, queue_wait, hash_time):
+    labels = (("op", op),)
+    metrics.observe("bcrypt_seconds", hash_time, labels)
+    metrics.observe("bcrypt_queue_wait_seconds", queue_wait, labels)
 
 # =============== DB HELPERS ===============
-def get_db_connection():
+def _connect(host=MYSQL_HOST, port=3306, **options):
     return mysql.connector.connect(
-        host=MYSQL_HOST,
+        host=host,
+        port=port,
         user=MYSQL_USER,
         password=MYSQL_PASSWORD,
         database=MYSQL_DB,
+        **options,
+    )
+
+def _pool(connect, size):
+    return ConnectionPool(
+        connect,
+        size=size,
+        timeout=DB_POOL_TIMEOUT,
+        max_lifetime=DB_POOL_MAX_LIFETIME,
+        ping_after=DB_POOL_PING_AFTER,
+        on_acquire=lambda waited: metrics.observe("db_pool_acquire_seconds", waited),
+        wrap_cursor=lambda cur: TimedCursor(cur, on_query),
+    )
+
+def parse_hosts(value):
+    """[(host, port)] from "host[:port],..." """
+    hosts = []
+    for item in value.split(","):
+        host, _, port = item.strip().partition(":")
+        if host:
+            hosts.append((host, int(port or 3306)))
+    return hosts
+
+db_pool = _pool(_connect, DB_POOL_SIZE)
+
+db_router = ReplicaRouter(
+    db_pool,
+    [
+        Replica(f"{host}:{port}",
+                _pool(partial(_connect, host, port), DB_REPLICA_POOL_SIZE),
+                partial(_connect, host, port, connection_timeout=2))
+        for host, port in parse_hosts(DB_REPLICA_HOSTS)
+    ],
+    max_lag=DB_REPLICA_MAX_LAG,
+    check_interval=DB_REPLICA_CHECK_INTERVAL,
+    sticky_for=DB_STICKY_SECONDS,
+    lag_sql=DB_REPLICA_LAG_SQL,
+    on_route=lambda target, reason: metrics.inc("db_reads_total", (("target", target), ("reason", reason))),
+)
+db_router.start()
+atexit.register(db_router.close)
+
+READ_METHODS = ("GET", "HEAD")
+
+def request_user():
+    """Whose writes this request should see: the token's user, else the email in the URL or body"""
+    email = (g.get("user") or {}).get("email")
+    if not email and request.view_args:
+        email = request.view_args.get("email")
+    if not email and request.method not in READ_METHODS:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            email = data.get("student_email") or data.get("email")
+    return email.lower() if isinstance(email, str) and email else None
+
+def get_db_connection(primary=False):
+    """Check out a pooled connection; use it as a context manager so it always goes back.
+
+    GET requests read from a replica unless their user wrote in the last
+    DB_STICKY_SECONDS; writes, background work and primary=True use the primary.
+    """
+    if primary or not has_request_context() or request.method not in READ_METHODS:
+        return db_router.write()
+    user = request_user()
+    return db_router.read(user, pinned=wrote_recently(user))
+
+READ_AFTER_HEADER = "X-Read-After"
+
+def wrote_recently(user):
+    """True when the request carries a valid pin from a write by `user`, made on any worker"""
+    if not user or not db_router.replicas:
+        return False
+    if "pinned" not in g:
+        marker = request.headers.get(READ_AFTER_HEADER)
+        g.pinned = bool(marker) and token_signer.pinned(marker, user)
+    return g.pinned
+
+slow_log = SlowQueryLog(
+    SLOW_QUERY_LOG,
+    threshold=SLOW_QUERY_MS / 1000,
+    explain_connection=get_db_connection if SLOW_QUERY_EXPLAIN else None,
+)
+
+catalog_cache = CatalogCache(max_entries=CATALOG_CACHE_MAX_ENTRIES, ttl=CATALOG_CACHE_TTL)
+
+# Cache keys
+COURSE_LIST_KEY = ("courses",)
+
+def course_key(course_id):
+    return ("course", course_id)
+
+# Answer keys per course: {"version": content_version, "answers": [correct index, ...],
+# "options": [option count, ...]}
+answer_keys = CatalogCache(max_entries=ANSWER_KEY_CACHE_MAX_ENTRIES, ttl=ANSWER_KEY_CACHE_TTL)
+
+def invalidate_catalog(course_id=None):
+    """Drop cached course-list pages, plus one course's detail when given.
+
+    List rows carry the course_stats counters (enrollment_count,
+    avg_quiz_percent), so enrollment and quiz-attempt writes call this too;
+    course detail has no counters and stays cached through them.
+    """
+    catalog_cache.invalidate_prefix(COURSE_LIST_KEY)
+    if course_id is not None:
+        catalog_cache.invalidate(course_key(course_id))
+
+def load_search_documents():
+    with get_db_connection(primary=True) as conn:
+        cur = conn.cursor(dictionary=True)
+        cur.execute("SELECT id, title, description, level, created_by FROM courses")
+        courses = cur.fetchall()
+        cur.execute("SELECT id, course_id, title FROM lessons")
+        lessons = cur.fetchall()
+        cur.close()
+    return courses, lessons
+
+search_index = SearchIndex(load_search_documents, refresh_interval=SEARCH_INDEX_REFRESH)
+search_index.start()
+
+# The hot tables store users.id / courses.num / lessons.num; the API keeps taking emails and slugs
+key_map = KeyMap(max_entries=KEY_MAP_MAX_ENTRIES, ttl=KEY_MAP_TTL)
+
+def student_course_keys(conn, email, course_id):
+    """(users.id, courses.num) for an email and course slug; either is None when unknown"""
+    return key_map.get(conn, "user", email), key_map.get(conn, "course", course_id)
+
+def cached_student_course_keys(email, course_id):
+    """student_course_keys() that only checks out a connection on a cache miss"""
+    student_id, course_num = key_map.peek("user", email), key_map.peek("course", course_id)
+    if student_id is None or course_num is None:
+        with get_db_connection() as conn:
+            student_id, course_num = student_course_keys(conn, email, course_id)
+    return student_id, course_num
+
+def unknown_keys():
+    return jsonify({"message": "Unknown student or course"}), 404
+
+def pool_unavailable(e):
+    print("DB POOL:", e)
+    return jsonify({"message": "Database busy, please retry"}), 503, {"Retry-After": "1"}
+
+# =============== PASSWORD HASHING ===============
+hasher = PasswordHasher(
+    rounds=BCRYPT_ROUNDS,
+    workers=HASH_WORKERS,
+    max_queue=HASH_QUEUE_LIMIT,
+    timeout=HASH_TIMEOUT,
+    on_complete=observe_hash,
+)
+
+def hasher_busy(e):
+    print("HASHER:", e)
+    return jsonify({"message": "Server busy, please retry"}), 503, {"Retry-After": "1"}
+
+# =============== PROGRESS WRITE-BEHIND ===============
+progress_buffer = None
+progress_merge = PROGRESS_MERGE
+if PROGRESS_WRITE_BEHIND and WEB_WORKERS > 1 and progress_merge != "max":
+    # Workers flush independently, so an older value can land after a newer one from
+    # another worker; the max merge (a GREATEST upsert) makes that order harmless
+    print(f"[WARNING] PROGRESS_MERGE={progress_merge} is unsafe with {WEB_WORKERS} workers - merging with max")
+    progress_merge = "max"
+if PROGRESS_WRITE_BEHIND:
+    progress_buffer = ProgressBuffer(
+        get_db_connection,
+        interval=PROGRESS_FLUSH_INTERVAL,
+        max_pending=PROGRESS_FLUSH_SIZE,
+        mode=progress_merge,
+        # Progress events are logged when the value is flushed, in the flush's transaction
+        log_sql=lambda rows: events_sql([("progress", student_id, course_num, {"progress": progress})
+                                         for (student_id, course_num), progress in rows]),
     )
+    progress_buffer.start()
+    atexit.register(progress_buffer.close)
+
+# =============== PLATFORM STATS ===============
+platform_stats = PlatformStats(
+    get_db_connection,
+    refresh_interval=PLATFORM_STATS_REFRESH,
+    reconcile_interval=PLATFORM_STATS_RECONCILE,
+)
+platform_stats.start()
+atexit.register(platform_stats.close)
+
+def bump_platform_stats(cur, stat, bucket="", delta=1):
+    """Apply a platform_stats counter delta inside the caller's transaction"""
+    if delta:
+        cur.execute(*bump_sql(stat, bucket, delta))
+
+# =============== CHANGE FEED ===============
+change_feed = ChangeFeed(
+    get_db_connection,
+    history=SSE_HISTORY,
+    buffer_size=SSE_BUFFER,
+    max_subscribers=SSE_MAX_STREAMS,
+    poll_interval=SSE_POLL_INTERVAL,
+    gap_grace=SSE_GAP_GRACE,
+    retention=SSE_RETENTION,
+    idle_after=SSE_IDLE_AFTER,
+)
+change_feed.start()
+atexit.register(change_feed.close)
+
+# Streams served from a Flask request thread (asgi_app.py serves them on its event loop instead)
+thread_streams = threading.BoundedSemaphore(SSE_THREAD_STREAMS)
+
+def log_change(cur, kind, student_id, course_num, **fields):
+    """Add a change-feed event to the caller's transaction; run it last, right before the commit"""
+    cur.execute(*event_sql(kind, student_id, course_num, **fields))
+
+def feed_full(e):
+    """200 with only a retry hint: a 503 would make EventSource stop reconnecting for good"""
+    print("CHANGE FEED:", e)
+    return Response(retry_later(SSE_RETRY_MS), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+# =============== SESSION TOKENS ===============
+def load_revocations():
+    with get_db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT jti, UNIX_TIMESTAMP(expires_at) FROM revoked_tokens WHERE expires_at > NOW()")
+        rows = cur.fetchall()
+        cur.close()
+    return {jti: float(expires_at) for jti, expires_at in rows}
+
+session_keys = parse_keys(SESSION_KEYS)
+if not session_keys:
+    print("[WARNING] SESSION_KEYS not set - using a random key; tokens will not survive a restart")
+    session_keys = {"dev": secrets.token_bytes(32)}
+
+revocations = RevocationList(load_revocations, refresh_interval=REVOCATION_REFRESH)
+revocations.start()
+atexit.register(revocations.close)
+token_signer = TokenSigner(session_keys, ttl=SESSION_TOKEN_TTL, revocations=revocations)
+
+def require_auth(*roles):
+    """Authenticate the Bearer token without touching MySQL; the claims land in g.user.
+
+    With roles given, only those roles are allowed through (403 otherwise).
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if request.method == "OPTIONS":
+                return "", 200
+            header = request.headers.get("Authorization", "")
+            if not header.startswith("Bearer "):
+                return jsonify({"message": "Authentication required"}), 401
+            try:
+                g.user = token_signer.verify(header[len("Bearer "):].strip())
+            except TokenError as e:
+                return jsonify({"message": str(e)}), 401
+            if roles and (g.user.get("role") or "").lower() not in roles:
+                return jsonify({"message": "Forbidden"}), 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# =============== COURSE STATS HELPERS ===============
+# course_stats holds per-course aggregates maintained by the write routes
+# (see course_stats.py for the rebuild/verify command).
+
+COURSE_STATS_COLUMNS = """
+    COALESCE(s.lesson_count, 0) AS lesson_count,
+    COALESCE(s.quiz_question_count, 0) AS quiz_question_count,
+    COALESCE(s.enrollment_count, 0) AS enrollment_count,
+    COALESCE(s.quiz_attempt_count, 0) AS quiz_attempt_count,
+    COALESCE(s.quiz_score_sum, 0) AS quiz_score_sum,
+    COALESCE(s.quiz_total_sum, 0) AS quiz_total_sum
+"""
+
+def course_stats_sql(course_id, **deltas):
+    """(sql, params) applying counter deltas to one course_stats row"""
+    columns = list(deltas)
+    return (
+        f"INSERT INTO course_stats (course_id, {', '.join(columns)}) "
+        f"VALUES (%s{', %s' * len(columns)}) "
+        f"ON DUPLICATE KEY UPDATE {', '.join(f'{c} = {c} + %s' for c in columns)}",
+        (course_id, *[max(d, 0) for d in deltas.values()], *deltas.values()),
+    )
+
+def bump_course_stats(cur, course_id, **deltas):
+    """Apply counter deltas to course_stats inside the caller's transaction"""
+    cur.execute(*course_stats_sql(course_id, **deltas))
+
+def finish_course_stats(course):
+    """Turn the raw quiz sums of a catalog row into an average percentage"""
+    score_sum = course.pop("quiz_score_sum")
+    total_sum = course.pop("quiz_total_sum")
+    course["avg_quiz_percent"] = round(100 * score_sum / total_sum, 1) if total_sum else None
+    return course
+
+# =============== PAGINATION HELPERS ===============
+# Keyset pagination over (created_at DESC, id DESC). The cursor is the
+# opaque, url-safe encoding of the last row's sort key.
+
+def encode_cursor(row):
+    raw = f"{row['created_at'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor):
+    """Return (created_at, id) or raise ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), row_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def parse_limit(value):
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    limit = int(value)
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, MAX_PAGE_SIZE)
+
+def like_prefix(text):
+    """Escape LIKE wildcards so user input only ever matches as a prefix"""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+def keyset_page(cur, select, filters, params, cursor, limit, alias=""):
+    """Run select + filters as one keyset page; returns (rows, next_cursor)"""
+    where = list(filters)
+    params = list(params)
+    if cursor:
+        created_at, row_id = cursor
+        where.append(f"({alias}created_at < %s OR ({alias}created_at = %s AND {alias}id < %s))")
+        params += [created_at, created_at, row_id]
+
+    sql = select
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {alias}created_at DESC, {alias}id DESC LIMIT %s"
+    params.append(limit + 1)
+
+    cur.execute(sql, tuple(params))
+    rows = cur.fetchall()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1])
+    return rows, next_cursor
+
+# =============== BULK HELPERS ===============
+
+def chunks(seq, size):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+def norm_key(key):
+    # MySQL's default collation compares case-insensitively; match that
+    return tuple(str(v).lower() for v in key)
+
+def fetch_existing(cur, table, columns, keys):
+    """Return the normalized keys (tuples over columns) that already exist in table"""
+    cols = ", ".join(columns)
+    row = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    found = set()
+    for chunk in chunks(list(keys), BULK_CHUNK_SIZE):
+        cur.execute(
+            f"SELECT {cols} FROM {table} WHERE ({cols}) IN ({', '.join([row] * len(chunk))})",
+            [v for key in chunk for v in key],
+        )
+        found.update(norm_key(r) for r in cur.fetchall())
+    return found
+
+def insert_ignore(cur, table, columns, rows):
+    """Multi-row INSERT IGNORE in chunks; returns the number of rows actually inserted"""
+    cols = ", ".join(columns)
+    row = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    inserted = 0
+    for chunk in chunks(rows, BULK_CHUNK_SIZE):
+        cur.execute(
+            f"INSERT IGNORE INTO {table} ({cols}) VALUES {', '.join([row] * len(chunk))}",
+            [v for r in chunk for v in r],
+        )
+        inserted += cur.rowcount
+    return inserted
+
+def bulk_items(data, fields):
+    """Validate a bulk body; returns (items, results, error_response)"""
+    items = data.get("items")
+    if not isinstance(items, list) or not items:
+        return None, None, (jsonify({"message": "items must be a non-empty list"}), 400)
+    if len(items) > BULK_MAX_ITEMS:
+        return None, None, (jsonify({"message": f"At most {BULK_MAX_ITEMS} items per request"}), 413)
+
+    results = [None] * len(items)
+    parsed = []
+    for i, item in enumerate(items):
+        values = tuple(item.get(f) for f in fields) if isinstance(item, dict) else (None,)
+        if not all(isinstance(v, str) and v for v in values):
+            results[i] = {"index": i, "status": "invalid", "message": "Missing required fields"}
+        else:
+            parsed.append((i, values))
+    return parsed, results, None
+
+def bulk_response(results):
+    summary = {"created": 0, "exists": 0, "invalid": 0}
+    for r in results:
+        summary[r["status"]] += 1
+    return jsonify({"results": results, "summary": summary}), 200
+
+# =============== REQUEST METRICS ===============
+
+@app.before_request
+def start_request_metrics():
+    metrics.begin_request()
+
+@app.after_request
+def record_request_metrics(response):
+    timing = metrics.end_request()
+    if timing is not None:
+        elapsed, queries, db_time = timing
+        route = (("route", request.url_rule.rule if request.url_rule else "unmatched"),)
+        metrics.observe("http_request_duration_seconds", elapsed, route + (("method", request.method),))
+        metrics.inc("http_requests_total", route + (("method", request.method), ("status", response.status_code)))
+        metrics.observe("http_request_db_queries", queries, route)
+        metrics.observe("http_request_db_seconds", db_time, route)
+    if request.method not in READ_METHODS and response.status_code < 400:
+        user = request_user()
+        db_router.note_write(user)
+        if user and db_router.replicas:
+            # Lets every worker see this write as recent, not only the one that served it
+            response.headers[READ_AFTER_HEADER] = token_signer.pin(user, DB_STICKY_SECONDS)
+    return response
+
+def runtime_gauges():
+    pool = db_pool.stats()
+    gauges = [
+        ("db_pool_connections", "Pooled connections by state", (("state", "in_use"),), pool["in_use"]),
+        ("db_pool_connections", "Pooled connections by state", (("state", "idle"),), pool["idle"]),
+        ("bcrypt_queue_depth", "bcrypt jobs queued or running", (), hasher.stats()["queue_depth"]),
+    ]
+    for replica in db_router.replicas:
+        gauges.append(("db_replica_healthy", "1 while a replica is in read rotation",
+                       (("replica", replica.name),), int(replica.healthy)))
+    gauges.append(("sse_streams", "Open change feed streams", (), change_feed.stats()["subscribers"]))
+    if progress_buffer is not None:
+        gauges.append(("progress_buffer_pending", "Buffered progress updates not yet flushed", (),
+                       progress_buffer.stats()["pending"]))
+    return gauges
+
+metrics.gauges(runtime_gauges)
 
 # =============== ROUTES ===============
 
@@ -42,6 +611,58 @@ def home():
 def ping():
     return jsonify({"ok": True, "message": "Ping success"}), 200
 
+@app.get("/api/db/pool")
+def pool_stats():
+    return jsonify(db_pool.stats()), 200
+
+@app.get("/api/db/replicas")
+def replica_stats():
+    return jsonify(db_router.stats()), 200
+
+@app.get("/api/cache/catalog")
+def catalog_cache_stats():
+    return jsonify(catalog_cache.stats()), 200
+
+@app.get("/api/cache/keys")
+def key_map_stats():
+    return jsonify(key_map.stats()), 200
+
+@app.get("/api/search/index")
+def search_index_stats():
+    return jsonify(search_index.stats()), 200
+
+@app.get("/api/admin/stats")
+def admin_stats():
+    """Platform totals from the maintained counters; constant cost however many rows exist"""
+    try:
+        return jsonify({**platform_stats.snapshot(), "maintenance": platform_stats.stats()}), 200
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
+    except Exception as e:
+        return jsonify({"message": f"Error: {e}"}), 500
+
+@app.get("/api/events/stats")
+def change_feed_stats():
+    return jsonify(change_feed.stats()), 200
+
+@app.get("/api/auth/hasher")
+def hasher_stats():
+    return jsonify(hasher.stats()), 200
+
+@app.get("/api/db/slow-queries")
+def slow_query_stats():
+    return jsonify(slow_log.stats()), 200
+
+@app.get("/api/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@app.get("/api/progress/buffer")
+def progress_buffer_stats():
+    if progress_buffer is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **progress_buffer.stats()}), 200
+
 # =============== AUTH ROUTES ===============
 
 @app.route("/api/auth/register", methods=["POST", "OPTIONS"])
@@ -59,29 +680,36 @@ def register():
         return jsonify({"message": "All fields required"}), 400
 
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(dictionary=True)
+        with get_db_connection() as conn:
+            cur = conn.cursor(dictionary=True)
 
-        # Check duplicate
-        cur.execute("SELECT id FROM users WHERE email = %s", (email,))
-        if cur.fetchone():
+            # Check duplicate
+            cur.execute("SELECT id FROM users WHERE email = %s", (email,))
+            exists = cur.fetchone()
             cur.close()
-            conn.close()
+
+        if exists:
             return jsonify({"message": "Email already exists"}), 409
 
-        # Hash password
-        hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+        # Hash password (on the hash pool, without holding a pooled connection)
+        hashed = hasher.hash(password)
 
-        cur.execute(
-            "INSERT INTO users (name, email, password, role) VALUES (%s, %s, %s, %s)",
-            (name, email, hashed, role),
-        )
-        conn.commit()
-        cur.close()
-        conn.close()
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "INSERT INTO users (name, email, password, role) VALUES (%s, %s, %s, %s)",
+                (name, email, hashed, role),
+            )
+            bump_platform_stats(cur, "users", role_bucket(role))
+            conn.commit()
+            cur.close()
 
         return jsonify({"message": "User registered successfully"}), 200
 
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
+    except HasherBusy as e:
+        return hasher_busy(e)
     except Exception as e:
         print("REGISTER ERROR:", e)
         return jsonify({"message": f"Server error: {e}"}), 500
@@ -100,33 +728,41 @@ def login():
         return jsonify({"message": "All fields required"}), 400
 
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(dictionary=True)
-
-        cur.execute("SELECT * FROM users WHERE email = %s", (email,))
-        user = cur.fetchone()
+        with get_db_connection() as conn:
+            cur = conn.cursor(dictionary=True)
+            cur.execute("SELECT * FROM users WHERE email = %s", (email,))
+            user = cur.fetchone()
+            cur.close()
 
         if not user:
-            cur.close()
-            conn.close()
             return jsonify({"message": "Invalid email or password"}), 400
 
         if (user["role"] or "").lower() != role_input:
-            cur.close()
-            conn.close()
             return jsonify({"message": "Invalid role selected"}), 400
 
-        if not bcrypt.checkpw(password.encode("utf-8"), user["password"].encode("utf-8")):
-            cur.close()
-            conn.close()
+        if not hasher.verify(password, user["password"]):
             return jsonify({"message": "Invalid email or password"}), 400
 
-        cur.close()
-        conn.close()
+        # Upgrade hashes stored with a different cost factor; a failed upgrade
+        # must not fail the login, it is simply retried next time
+        if hasher.needs_rehash(user["password"]):
+            try:
+                rehashed = hasher.hash(password)
+                with get_db_connection() as conn:
+                    cur = conn.cursor()
+                    cur.execute(
+                        "UPDATE users SET password = %s WHERE id = %s AND password = %s",
+                        (rehashed, user["id"], user["password"]),
+                    )
+                    conn.commit()
+                    cur.close()
+                hasher.record_rehash()
+            except Exception as e:
+                print("REHASH ERROR:", e)
 
         return jsonify({
             "message": "Login successful",
-            "token": "dummy-token",
+            "token": token_signer.issue(user["id"], user["email"], user["role"]),
             "user": {
                 "id": user["id"],
                 "name": user["name"],
@@ -135,76 +771,216 @@ def login():
             },
         }), 200
 
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
+    except HasherBusy as e:
+        return hasher_busy(e)
     except Exception as e:
         print("LOGIN ERROR:", e)
         return jsonify({"message": f"Server error: {e}"}), 500
 
+@app.route("/api/auth/me", methods=["GET", "OPTIONS"])
+@require_auth()
+def me():
+    return jsonify({
+        "id": g.user["uid"],
+        "email": g.user["email"],
+        "role": g.user["role"],
+        "expires_at": g.user["exp"],
+    }), 200
+
+@app.route("/api/auth/logout", methods=["POST", "OPTIONS"])
+@require_auth()
+def logout():
+    jti, exp = g.user["jti"], g.user["exp"]
+    try:
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "INSERT IGNORE INTO revoked_tokens (jti, expires_at) VALUES (%s, FROM_UNIXTIME(%s))",
+                (jti, exp),
+            )
+            # Revocations are only needed until the token would have expired anyway
+            cur.execute("DELETE FROM revoked_tokens WHERE expires_at < NOW() LIMIT 100")
+            conn.commit()
+            cur.close()
+        revocations.add(jti, exp)
+        return jsonify({"message": "Logged out"}), 200
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
+    except Exception as e:
+        return jsonify({"message": f"Error: {e}"}), 500
+
 # =============== USER ROUTES ===============
 
 @app.get("/api/users")
 def get_all_users():
+    """Always one keyset page: ?limit (default DEFAULT_PAGE_SIZE, capped at MAX_PAGE_SIZE), cursor, role, q"""
+    args = request.args
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(dictionary=True)
-        cur.execute("SELECT id, name, email, role, created_at FROM users ORDER BY created_at DESC")
-        users = cur.fetchall()
-        cur.close()
-        conn.close()
-        return jsonify(users), 200
+        limit = parse_limit(args.get("limit"))
+        cursor = decode_cursor(args["cursor"]) if args.get("cursor") else None
+        if cursor:
+            cursor = (cursor[0], int(cursor[1]))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    filters, params = [], []
+    if args.get("role"):
+        filters.append("role = %s")
+        params.append(args["role"])
+    if args.get("q"):
+        filters.append("(name LIKE %s OR email LIKE %s)")
+        params += [like_prefix(args["q"]), like_prefix(args["q"])]
+
+    try:
+        with get_db_connection() as conn:
+            cur = conn.cursor(dictionary=True)
+            users, next_cursor = keyset_page(
+                cur, "SELECT id, name, email, role, created_at FROM users",
+                filters, params, cursor, limit,
+            )
+            cur.close()
+        return jsonify({"items": users, "next_cursor": next_cursor, "limit": limit}), 200
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
     except Exception as e:
         return jsonify({"message": f"Error: {e}"}), 500
 
 # =============== COURSE ROUTES ===============
 
+# Course, lessons and quiz assembled server-side in one statement (one round trip)
+COURSE_DETAIL_SQL = """
+    SELECT c.*,
+           (SELECT JSON_ARRAYAGG(JSON_OBJECT(
+                       'id', l.id, 'course_id', l.course_id, 'title', l.title,
+                       'description', l.description, 'url', l.url,
+                       'position', l.position, 'created_at', l.created_at))
+            FROM lessons l WHERE l.course_id = c.id) AS lessons_json,
+           (SELECT JSON_ARRAYAGG(JSON_OBJECT(
+                       'id', q.id, 'question', q.question,
+                       'options', JSON_ARRAY(q.option1, q.option2, q.option3, q.option4)))
+            FROM quiz_questions q WHERE q.course_id = c.id) AS quiz_json
+    FROM courses c
+    WHERE c.id = %s
+"""
+
+def load_course(course_id):
+    with get_db_connection(primary=True) as conn:
+        cur = conn.cursor(dictionary=True)
+        cur.execute(COURSE_DETAIL_SQL, (course_id,))
+        course = cur.fetchone()
+        cur.close()
+
+    if not course:
+        return None
+
+    # JSON_ARRAYAGG has no ordering guarantee, so order here
+    lessons = json.loads(course.pop("lessons_json") or "[]")
+    lessons.sort(key=lambda l: (l["position"] or 0, l["id"]))
+    quiz = json.loads(course.pop("quiz_json") or "[]")
+    quiz.sort(key=lambda q: q["id"])
+    for q in quiz:
+        del q["id"]
+
+    course["lessons"] = lessons
+    course["quiz"] = quiz
+    return course
+
+def course_etag(course):
+    """Strong validator: changes whenever lessons or quiz questions change"""
+    return f"{course['id']}-v{course['content_version']}"
+
+def bump_content_version(cur, course_id):
+    """Call in the same transaction as any lesson/quiz change for the course"""
+    cur.execute("UPDATE courses SET content_version = content_version + 1 WHERE id = %s", (course_id,))
+
+# Catalog cache fills read from the primary: a lagging replica would re-cache
+# what a course or lesson write has just invalidated
+def load_courses_page(level, created_by, q, cursor, limit):
+    filters, params = [], []
+    if level:
+        filters.append("c.level = %s")
+        params.append(level)
+    if created_by:
+        filters.append("c.created_by = %s")
+        params.append(created_by)
+    if q:
+        filters.append("c.title LIKE %s")
+        params.append(like_prefix(q))
+
+    with get_db_connection(primary=True) as conn:
+        cur = conn.cursor(dictionary=True)
+        courses, next_cursor = keyset_page(
+            cur,
+            f"""SELECT c.*, {COURSE_STATS_COLUMNS}
+               FROM courses c
+               LEFT JOIN course_stats s ON s.course_id = c.id""",
+            filters, params, cursor, limit, alias="c.",
+        )
+        courses = [finish_course_stats(c) for c in courses]
+        cur.close()
+        return {"items": courses, "next_cursor": next_cursor, "limit": limit}
+
 @app.get("/api/courses")
 def get_all_courses():
+    """Always one keyset page, like /api/users: ?limit, cursor, level, created_by, q (title prefix)"""
+    args = request.args
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(dictionary=True)
-        cur.execute("""
-            SELECT c.*, 
-                   (SELECT COUNT(*) FROM lessons WHERE course_id = c.id) as lesson_count
-            FROM courses c
-            ORDER BY c.created_at DESC
-        """)
-        courses = cur.fetchall()
-        cur.close()
-        conn.close()
-        return jsonify(courses), 200
+        limit = parse_limit(args.get("limit"))
+        cursor = args.get("cursor") or None
+        decoded = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    level, created_by, q = args.get("level"), args.get("created_by"), args.get("q")
+    key = COURSE_LIST_KEY + (level, created_by, q, cursor, limit)
+    try:
+        page = catalog_cache.get_or_load(
+            key, lambda: load_courses_page(level, created_by, q, decoded, limit)
+        )
+        return jsonify(page), 200
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
     except Exception as e:
         return jsonify({"message": f"Error: {e}"}), 500
 
+@app.get("/api/courses/search")
+def search_courses():
+    """Ranked search over title, description, level and lesson titles; ?q=, level, limit.
+
+    Every word in q has to match, as a whole word or a prefix. Served from
+    the in-process index, without touching MySQL.
+    """
+    try:
+        limit = parse_limit(request.args.get("limit") or SEARCH_DEFAULT_RESULTS)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    q = request.args.get("q", "")
+    try:
+        total, items = search_index.search(q, level=request.args.get("level"), limit=limit)
+    except (TimeoutError, RuntimeError) as e:
+        print("SEARCH:", e)
+        return jsonify({"message": "Search is warming up, please retry"}), 503, {"Retry-After": "1"}
+    return jsonify({"query": q, "total": total, "items": items}), 200
+
 @app.get("/api/courses/<course_id>")
 def get_course(course_id):
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(dictionary=True)
-        
-        # Get course details
-        cur.execute("SELECT * FROM courses WHERE id = %s", (course_id,))
-        course = cur.fetchone()
-        
+        course = catalog_cache.get_or_load(course_key(course_id), lambda: load_course(course_id))
         if not course:
-            cur.close()
-            conn.close()
             return jsonify({"message": "Course not found"}), 404
-        
-        # Get lessons
-        cur.execute("SELECT * FROM lessons WHERE course_id = %s ORDER BY position", (course_id,))
-        course["lessons"] = cur.fetchall()
-        
-        # Get quiz questions
-        cur.execute("SELECT * FROM quiz_questions WHERE course_id = %s", (course_id,))
-        quiz = cur.fetchall()
-        course["quiz"] = [{
-            "question": q["question"],
-            "options": [q["option1"], q["option2"], q["option3"], q["option4"]],
-            "answerIndex": q["correct_answer"]
-        } for q in quiz]
-        
-        cur.close()
-        conn.close()
-        return jsonify(course), 200
+
+        etag = course_etag(course)
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            response = jsonify(course)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
     except Exception as e:
         return jsonify({"message": f"Error: {e}"}), 500
 
@@ -221,29 +997,56 @@ def create_course():
         return jsonify({"message": "Missing required fields"}), 400
 
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO courses (id, title, description, level, created_by) VALUES (%s, %s, %s, %s, %s)",
-            (course_id, title, description, level, created_by)
-        )
-        conn.commit()
-        cur.close()
-        conn.close()
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "INSERT INTO courses (id, title, description, level, created_by) VALUES (%s, %s, %s, %s, %s)",
+                (course_id, title, description, level, created_by)
+            )
+            cur.execute("INSERT INTO course_stats (course_id) VALUES (%s)", (course_id,))
+            bump_platform_stats(cur, "courses", level_bucket(level))
+            conn.commit()
+            cur.close()
+        invalidate_catalog()
+        search_index.put_course({"id": course_id, "title": title, "description": description,
+                                 "level": level, "created_by": created_by})
         return jsonify({"message": "Course created successfully", "id": course_id}), 201
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
     except Exception as e:
         return jsonify({"message": f"Error: {e}"}), 500
 
 @app.delete("/api/courses/<course_id>")
 def delete_course(course_id):
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM courses WHERE id = %s", (course_id,))
-        conn.commit()
-        cur.close()
-        conn.close()
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            # Rows the cascade is about to remove; anything racing the delete is left to the reconcile
+            cur.execute("""
+                SELECT c.level, COALESCE(s.enrollment_count, 0), COALESCE(s.quiz_attempt_count, 0),
+                       (SELECT COUNT(*) FROM lesson_completions lc WHERE lc.course_num = c.num)
+                FROM courses c LEFT JOIN course_stats s ON s.course_id = c.id
+                WHERE c.id = %s
+            """, (course_id,))
+            doomed = cur.fetchone()
+            cur.execute("DELETE FROM courses WHERE id = %s", (course_id,))
+            if doomed and cur.rowcount:
+                level, enrollments, attempts, completions = doomed
+                bump_platform_stats(cur, "courses", level_bucket(level), -1)
+                bump_platform_stats(cur, "enrollments", delta=-enrollments)
+                bump_platform_stats(cur, "lesson_completions", delta=-completions)
+                bump_platform_stats(cur, "quiz_attempts", delta=-attempts)
+            conn.commit()
+            cur.close()
+        invalidate_catalog(course_id)
+        answer_keys.invalidate(course_id)
+        search_index.remove_course(course_id)
+        # The slug (and its lessons' slugs) may be reused for a new row with a new num
+        key_map.forget("course", course_id)
+        key_map.forget("lesson")
         return jsonify({"message": "Course deleted"}), 200
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
     except Exception as e:
         return jsonify({"message": f"Error: {e}"}), 500
 
@@ -263,29 +1066,48 @@ def create_lesson():
         return jsonify({"message": "Missing required fields"}), 400
 
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO lessons (id, course_id, title, description, url, position) VALUES (%s, %s, %s, %s, %s, %s)",
-            (lesson_id, course_id, title, description, url, position)
-        )
-        conn.commit()
-        cur.close()
-        conn.close()
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "INSERT INTO lessons (id, course_id, title, description, url, position) VALUES (%s, %s, %s, %s, %s, %s)",
+                (lesson_id, course_id, title, description, url, position)
+            )
+            bump_course_stats(cur, course_id, lesson_count=1)
+            bump_content_version(cur, course_id)
+            conn.commit()
+            cur.close()
+        invalidate_catalog(course_id)
+        search_index.put_lesson(course_id, lesson_id, title)
         return jsonify({"message": "Lesson created"}), 201
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
     except Exception as e:
         return jsonify({"message": f"Error: {e}"}), 500
 
 @app.delete("/api/lessons/<lesson_id>")
 def delete_lesson(lesson_id):
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM lessons WHERE id = %s", (lesson_id,))
-        conn.commit()
-        cur.close()
-        conn.close()
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT l.course_id, (SELECT COUNT(*) FROM lesson_completions lc WHERE lc.lesson_num = l.num)
+                FROM lessons l WHERE l.id = %s
+            """, (lesson_id,))
+            row = cur.fetchone()
+            cur.execute("DELETE FROM lessons WHERE id = %s", (lesson_id,))
+            if row and cur.rowcount:
+                bump_course_stats(cur, row[0], lesson_count=-1)
+                bump_content_version(cur, row[0])
+                bump_platform_stats(cur, "lesson_completions", delta=-row[1])
+            conn.commit()
+            cur.close()
+        key_map.forget("lesson", lesson_id)
+        if row:
+            invalidate_catalog(row[0])
+            search_index.remove_lesson(row[0], lesson_id)
         return jsonify({"message": "Lesson deleted"}), 200
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
     except Exception as e:
         return jsonify({"message": f"Error: {e}"}), 500
 
@@ -301,36 +1123,101 @@ def create_enrollment():
         return jsonify({"message": "Missing required fields"}), 400
 
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO enrollments (student_email, course_id) VALUES (%s, %s)",
-            (email, course_id)
-        )
-        conn.commit()
-        cur.close()
-        conn.close()
-        return jsonify({"message": "Enrolled successfully"}), 201
+        with get_db_connection() as conn:
+            student_id, course_num = student_course_keys(conn, email, course_id)
+            if student_id is None or course_num is None:
+                return unknown_keys()
+            cur = conn.cursor()
+            cur.execute(
+                "INSERT INTO enrollments (student_id, course_num) VALUES (%s, %s)",
+                (student_id, course_num)
+            )
+            bump_course_stats(cur, course_id, enrollment_count=1)
+            bump_platform_stats(cur, "enrollments")
+            log_change(cur, "enrollment", student_id, course_num)
+            conn.commit()
+            cur.close()
+            invalidate_catalog()
+            platform_stats.touch(student_id)
+            return jsonify({"message": "Enrolled successfully"}), 201
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
     except mysql.connector.IntegrityError:
         return jsonify({"message": "Already enrolled"}), 409
     except Exception as e:
         return jsonify({"message": f"Error: {e}"}), 500
 
+@app.post("/api/enrollments/bulk")
+def bulk_enroll():
+    """Enroll many (student_email, course_id) pairs in one transaction, reporting per-item status"""
+    parsed, results, error = bulk_items(request.get_json() or {}, ("student_email", "course_id"))
+    if error:
+        return error
+
+    try:
+        with get_db_connection() as conn:
+            users = key_map.resolve(conn, "user", {e for _, (e, _c) in parsed})
+            courses = key_map.resolve(conn, "course", {c for _, (_e, c) in parsed})
+            keys = {(users.get(e.lower()), courses.get(c.lower())) for _, (e, c) in parsed}
+            cur = conn.cursor()
+            existing = fetch_existing(
+                cur, "enrollments", ("student_id", "course_num"), {k for k in keys if None not in k}
+            )
+
+            by_course = {}
+            seen = set()
+            for i, (email, course_id) in parsed:
+                key = (users.get(email.lower()), courses.get(course_id.lower()))
+                if key[0] is None:
+                    results[i] = {"index": i, "status": "invalid", "message": "Unknown student"}
+                elif key[1] is None:
+                    results[i] = {"index": i, "status": "invalid", "message": "Unknown course"}
+                elif norm_key(key) in existing or key in seen:
+                    results[i] = {"index": i, "status": "exists"}
+                else:
+                    seen.add(key)
+                    by_course.setdefault(key[1], (course_id, []))[1].append(key)
+                    results[i] = {"index": i, "status": "created"}
+
+            # One statement group per course keeps the course_stats deltas exact
+            total = 0
+            for course_id, rows in by_course.values():
+                inserted = insert_ignore(cur, "enrollments", ("student_id", "course_num"), rows)
+                if inserted:
+                    bump_course_stats(cur, course_id, enrollment_count=inserted)
+                    total += inserted
+            bump_platform_stats(cur, "enrollments", delta=total)
+            conn.commit()
+            cur.close()
+        if total:
+            invalidate_catalog()
+        return bulk_response(results)
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
+    except Exception as e:
+        return jsonify({"message": f"Error: {e}"}), 500
+
 @app.get("/api/enrollments/<email>")
 def get_user_enrollments(email):
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(dictionary=True)
-        cur.execute("""
-            SELECT e.*, c.title, c.description, c.level
-            FROM enrollments e
-            JOIN courses c ON e.course_id = c.id
-            WHERE e.student_email = %s
-        """, (email,))
-        enrollments = cur.fetchall()
-        cur.close()
-        conn.close()
-        return jsonify(enrollments), 200
+        with get_db_connection() as conn:
+            student_id = key_map.get(conn, "user", email)
+            if student_id is None:
+                return jsonify([]), 200
+            cur = conn.cursor(dictionary=True)
+            cur.execute("""
+                SELECT e.id, u.email AS student_email, c.id AS course_id, e.enrolled_at,
+                       c.title, c.description, c.level
+                FROM enrollments e
+                JOIN users u ON u.id = e.student_id
+                JOIN courses c ON c.num = e.course_num
+                WHERE e.student_id = %s
+            """, (student_id,))
+            enrollments = cur.fetchall()
+            cur.close()
+            return jsonify(enrollments), 200
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
     except Exception as e:
         return jsonify({"message": f"Error: {e}"}), 500
 
@@ -341,16 +1228,24 @@ def delete_enrollment():
     course_id = data.get("course_id")
 
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(
-            "DELETE FROM enrollments WHERE student_email = %s AND course_id = %s",
-            (email, course_id)
-        )
-        conn.commit()
-        cur.close()
-        conn.close()
-        return jsonify({"message": "Unenrolled"}), 200
+        with get_db_connection() as conn:
+            student_id, course_num = student_course_keys(conn, email, course_id)
+            cur = conn.cursor()
+            cur.execute(
+                "DELETE FROM enrollments WHERE student_id = %s AND course_num = %s",
+                (student_id, course_num)
+            )
+            removed = cur.rowcount
+            if removed:
+                bump_course_stats(cur, course_id, enrollment_count=-1)
+                bump_platform_stats(cur, "enrollments", delta=-1)
+            conn.commit()
+            cur.close()
+            if removed:
+                invalidate_catalog()
+            return jsonify({"message": "Unenrolled"}), 200
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
     except Exception as e:
         return jsonify({"message": f"Error: {e}"}), 500
 
@@ -363,78 +1258,503 @@ def update_progress():
     course_id = data.get("course_id")
     progress = data.get("progress", 0)
 
-    try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO course_progress (student_email, course_id, progress)
-            VALUES (%s, %s, %s)
-            ON DUPLICATE KEY UPDATE progress = %s
-        """, (email, course_id, progress, progress))
-        conn.commit()
-        cur.close()
-        conn.close()
+    if progress_buffer is not None:
+        # Buffered rows are written later, so reject what the upsert would reject
+        if not all([email, course_id]) or not isinstance(progress, int):
+            return jsonify({"message": "Missing required fields"}), 400
+        try:
+            student_id, course_num = cached_student_course_keys(email, course_id)
+        except PoolUnavailable as e:
+            return pool_unavailable(e)
+        except Exception as e:
+            return jsonify({"message": f"Error: {e}"}), 500
+        if student_id is None or course_num is None:
+            return unknown_keys()
+        progress_buffer.put(student_id, course_num, progress)
+        platform_stats.touch(student_id)
         return jsonify({"message": "Progress updated"}), 200
+
+    try:
+        with get_db_connection() as conn:
+            student_id, course_num = student_course_keys(conn, email, course_id)
+            if student_id is None or course_num is None:
+                return unknown_keys()
+            cur = conn.cursor()
+            cur.execute("""
+                INSERT INTO course_progress (student_id, course_num, progress)
+                VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE progress = %s
+            """, (student_id, course_num, progress, progress))
+            log_change(cur, "progress", student_id, course_num, progress=progress)
+            conn.commit()
+            cur.close()
+            platform_stats.touch(student_id)
+            return jsonify({"message": "Progress updated"}), 200
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
     except Exception as e:
         return jsonify({"message": f"Error: {e}"}), 500
 
 @app.get("/api/progress/<email>/<course_id>")
 def get_progress(email, course_id):
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(dictionary=True)
-        cur.execute(
-            "SELECT progress FROM course_progress WHERE student_email = %s AND course_id = %s",
-            (email, course_id)
-        )
-        result = cur.fetchone()
-        cur.close()
-        conn.close()
-        progress = result["progress"] if result else 0
-        return jsonify({"progress": progress}), 200
+        student_id, course_num = cached_student_course_keys(email, course_id)
+        if student_id is None or course_num is None:
+            return jsonify({"progress": 0}), 200
+        if progress_buffer is not None:
+            buffered = progress_buffer.get(student_id, course_num)
+            if buffered is not None:
+                return jsonify({"progress": buffered}), 200
+
+        with get_db_connection() as conn:
+            cur = conn.cursor(dictionary=True)
+            cur.execute(
+                "SELECT progress FROM course_progress WHERE student_id = %s AND course_num = %s",
+                (student_id, course_num)
+            )
+            result = cur.fetchone()
+            cur.close()
+            progress = result["progress"] if result else 0
+            return jsonify({"progress": progress}), 200
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
     except Exception as e:
         return jsonify({"message": f"Error: {e}"}), 500
 
 # =============== QUIZ ROUTES ===============
 
-@app.post("/api/quiz/submit")
-def submit_quiz():
+def record_quiz_attempt(cur, student_id, course_num, course_id, score, total):
+    """Insert an attempt and update every quiz summary, in the caller's transaction"""
+    if not (isinstance(score, int) and isinstance(total, int) and 0 <= score <= total and total > 0):
+        raise ValueError("score and total must be integers with 0 <= score <= total")
+    cur.execute(
+        "INSERT INTO quiz_results (student_id, course_num, score, total) VALUES (%s, %s, %s, %s)",
+        (student_id, course_num, score, total)
+    )
+    bump_course_stats(cur, course_id, quiz_attempt_count=1, quiz_score_sum=score, quiz_total_sum=total)
+    bump_platform_stats(cur, "quiz_attempts")
+
+    permille = score * 1000 // total
+    # Assignment order matters: MySQL evaluates left to right, so best_permille goes last
+    cur.execute("""
+        INSERT INTO quiz_latest (student_id, course_num, last_score, last_total, last_submitted_at,
+                                 best_score, best_total, best_submitted_at, best_permille, attempts)
+        VALUES (%s, %s, %s, %s, NOW(), %s, %s, NOW(), %s, 1)
+        ON DUPLICATE KEY UPDATE
+            last_score = VALUES(last_score),
+            last_total = VALUES(last_total),
+            last_submitted_at = VALUES(last_submitted_at),
+            best_score = IF(VALUES(best_permille) > best_permille, VALUES(best_score), best_score),
+            best_total = IF(VALUES(best_permille) > best_permille, VALUES(best_total), best_total),
+            best_submitted_at = IF(VALUES(best_permille) > best_permille, VALUES(best_submitted_at), best_submitted_at),
+            best_permille = GREATEST(best_permille, VALUES(best_permille)),
+            attempts = attempts + 1
+    """, (student_id, course_num, score, total, score, total, permille))
+    cur.execute("""
+        INSERT INTO quiz_score_histogram (course_id, percent, attempts) VALUES (%s, %s, 1)
+        ON DUPLICATE KEY UPDATE attempts = attempts + 1
+    """, (course_id, min(100, max(0, score * 100 // total))))
+
+def histogram_percentile(buckets, total, q):
+    """Nearest-rank percentile over [(percent, attempts)] sorted by percent"""
+    rank = max(1, -(-int(q * total * 1000) // 1000))
+    seen = 0
+    for percent, attempts in buckets:
+        seen += attempts
+        if seen >= rank:
+            return percent
+    return None
+
+def load_answer_key(course_id):
+    with get_db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT c.content_version, q.correct_answer,
+                   CASE WHEN q.option4 IS NOT NULL THEN 4 WHEN q.option3 IS NOT NULL THEN 3
+                        WHEN q.option2 IS NOT NULL THEN 2 ELSE 1 END
+            FROM courses c
+            LEFT JOIN quiz_questions q ON q.course_id = c.id
+            WHERE c.id = %s
+            ORDER BY q.id
+        """, (course_id,))
+        rows = cur.fetchall()
+        cur.close()
+    if not rows:
+        return None
+    version = rows[0][0]
+    rows = [row for row in rows if row[1] is not None]     # no questions: one row of NULLs
+    return {
+        "version": version,
+        "answers": tuple(answer for _, answer, _ in rows),
+        "options": tuple(max(options, answer + 1) for _, answer, options in rows),
+    }
+
+def invalidate_quiz(course_id):
+    answer_keys.invalidate(course_id)
+    invalidate_catalog(course_id)
+
+def valid_answer(given, options):
+    # bool is an int subclass: true must not pass as option 1
+    return isinstance(given, int) and not isinstance(given, bool) and 0 <= given < options
+
+@app.route("/api/quiz/grade", methods=["POST", "OPTIONS"])
+@require_auth("student")
+def grade_quiz():
+    """Grade the token's student's answer indices against the cached answer key and record the attempt.
+
+    Optional "version" is the content_version the client rendered; a
+    mismatch means the quiz changed underneath the student (409). The
+    response has only the score unless QUIZ_SHOW_CORRECT is set.
+    """
     data = request.get_json() or {}
-    email = data.get("student_email")
+    email = g.user.get("email")
     course_id = data.get("course_id")
-    score = data.get("score")
-    total = data.get("total")
+    answers = data.get("answers")
+    version = data.get("version")
+
+    if not all([email, course_id]) or not isinstance(answers, list):
+        return jsonify({"message": "Missing required fields"}), 400
+    if version is not None and not isinstance(version, int):
+        return jsonify({"message": "version must be an integer"}), 400
 
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO quiz_results (student_email, course_id, score, total) VALUES (%s, %s, %s, %s)",
-            (email, course_id, score, total)
-        )
-        conn.commit()
-        cur.close()
-        conn.close()
-        return jsonify({"message": "Quiz submitted"}), 201
+        key = answer_keys.get_or_load(course_id, lambda: load_answer_key(course_id))
+        if key is not None and version is not None and version > key["version"]:
+            # Another process changed the quiz; our cached key is behind
+            answer_keys.invalidate(course_id)
+            key = answer_keys.get_or_load(course_id, lambda: load_answer_key(course_id))
+        if key is None:
+            return jsonify({"message": "Course not found"}), 404
+        if version is not None and version != key["version"]:
+            return jsonify({"message": "Quiz has changed, please reload", "version": key["version"]}), 409
+
+        correct = key["answers"]
+        if not correct:
+            return jsonify({"message": "This course has no quiz"}), 400
+        if len(answers) != len(correct):
+            return jsonify({"message": f"Expected {len(correct)} answers"}), 400
+        for i, (given, options) in enumerate(zip(answers, key["options"])):
+            if not valid_answer(given, options):
+                return jsonify({"message": f"Answer {i + 1} must be an option index from 0 to {options - 1}"}), 400
+
+        results = [given == expected for given, expected in zip(answers, correct)]
+        score, total = sum(results), len(correct)
+
+        with get_db_connection() as conn:
+            student_id, course_num = student_course_keys(conn, email, course_id)
+            if student_id is None or course_num is None:
+                return unknown_keys()
+            cur = conn.cursor()
+            record_quiz_attempt(cur, student_id, course_num, course_id, score, total)
+            log_change(cur, "quiz_result", student_id, course_num, score=score, total=total)
+            conn.commit()
+            cur.close()
+        invalidate_catalog()
+        platform_stats.touch(student_id)
+        graded = {"message": "Quiz graded", "score": score, "total": total}
+        if QUIZ_SHOW_CORRECT:
+            graded["correct"] = results
+        return jsonify(graded), 201
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
+    except Exception as e:
+        return jsonify({"message": f"Error: {e}"}), 500
+
+@app.route("/api/quiz/questions/<course_id>", methods=["GET", "OPTIONS"])
+@require_auth("teacher", "admin")
+def get_quiz_questions(course_id):
+    """Questions with their answers, for quiz authors only"""
+    try:
+        with get_db_connection() as conn:
+            cur = conn.cursor(dictionary=True)
+            cur.execute("SELECT * FROM quiz_questions WHERE course_id = %s ORDER BY id", (course_id,))
+            questions = cur.fetchall()
+            cur.close()
+        return jsonify([{
+            "id": q["id"],
+            "question": q["question"],
+            "options": [q["option1"], q["option2"], q["option3"], q["option4"]],
+            "answerIndex": q["correct_answer"],
+        } for q in questions]), 200
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
+    except Exception as e:
+        return jsonify({"message": f"Error: {e}"}), 500
+
+@app.route("/api/quiz/questions", methods=["POST", "OPTIONS"])
+@require_auth("teacher", "admin")
+def create_quiz_question():
+    data = request.get_json() or {}
+    course_id = data.get("course_id")
+    question = data.get("question")
+    options = data.get("options")
+    correct_answer = data.get("correct_answer")
+
+    if not all([course_id, question]) or not isinstance(options, list) or len(options) != 4:
+        return jsonify({"message": "course_id, question and 4 options are required"}), 400
+    if correct_answer not in range(4):
+        return jsonify({"message": "correct_answer must be 0-3"}), 400
+
+    try:
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """INSERT INTO quiz_questions (course_id, question, option1, option2, option3, option4, correct_answer)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+                (course_id, question, *options, correct_answer)
+            )
+            question_id = cur.lastrowid
+            bump_course_stats(cur, course_id, quiz_question_count=1)
+            bump_content_version(cur, course_id)
+            conn.commit()
+            cur.close()
+        invalidate_quiz(course_id)
+        return jsonify({"message": "Question created", "id": question_id}), 201
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
+    except Exception as e:
+        return jsonify({"message": f"Error: {e}"}), 500
+
+@app.route("/api/quiz/questions/<int:question_id>", methods=["DELETE", "OPTIONS"])
+@require_auth("teacher", "admin")
+def delete_quiz_question(question_id):
+    try:
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT course_id FROM quiz_questions WHERE id = %s", (question_id,))
+            row = cur.fetchone()
+            cur.execute("DELETE FROM quiz_questions WHERE id = %s", (question_id,))
+            if row and cur.rowcount:
+                bump_course_stats(cur, row[0], quiz_question_count=-1)
+                bump_content_version(cur, row[0])
+            conn.commit()
+            cur.close()
+        if row:
+            invalidate_quiz(row[0])
+        return jsonify({"message": "Question deleted"}), 200
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
     except Exception as e:
         return jsonify({"message": f"Error: {e}"}), 500
 
 @app.get("/api/quiz/result/<email>/<course_id>")
 def get_quiz_result(email, course_id):
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(dictionary=True)
-        cur.execute("""
-            SELECT score, total, submitted_at
-            FROM quiz_results
-            WHERE student_email = %s AND course_id = %s
-            ORDER BY submitted_at DESC
-            LIMIT 1
-        """, (email, course_id))
-        result = cur.fetchone()
-        cur.close()
+        with get_db_connection() as conn:
+            student_id, course_num = student_course_keys(conn, email, course_id)
+            if student_id is None or course_num is None:
+                return jsonify({}), 200
+            cur = conn.cursor(dictionary=True)
+            cur.execute("""
+                SELECT last_score AS score, last_total AS total, last_submitted_at AS submitted_at,
+                       best_score, best_total, best_submitted_at, attempts
+                FROM quiz_latest
+                WHERE student_id = %s AND course_num = %s
+            """, (student_id, course_num))
+            result = cur.fetchone()
+            cur.close()
+            return jsonify(result or {}), 200
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
+    except Exception as e:
+        return jsonify({"message": f"Error: {e}"}), 500
+
+@app.get("/api/quiz/analytics/<course_id>")
+def get_quiz_analytics(course_id):
+    """Score distribution for a course from the maintained histogram (at most 101 rows)"""
+    try:
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT percent, attempts FROM quiz_score_histogram WHERE course_id = %s ORDER BY percent",
+                (course_id,)
+            )
+            buckets = cur.fetchall()
+            cur.execute(
+                "SELECT quiz_attempt_count, quiz_score_sum, quiz_total_sum FROM course_stats WHERE course_id = %s",
+                (course_id,)
+            )
+            stats = cur.fetchone() or (0, 0, 0)
+            cur.close()
+
+        graded = sum(attempts for _, attempts in buckets)
+        histogram = [0] * 10      # 0-9%, 10-19%, ... 90-100%
+        for percent, attempts in buckets:
+            histogram[min(percent // 10, 9)] += attempts
+
+        return jsonify({
+            "course_id": course_id,
+            "attempts": stats[0],
+            "mean_score": round(stats[1] / stats[0], 2) if stats[0] else None,
+            "mean_percent": round(sum(p * a for p, a in buckets) / graded, 1) if graded else None,
+            "median_percent": histogram_percentile(buckets, graded, 0.5),
+            "p25_percent": histogram_percentile(buckets, graded, 0.25),
+            "p75_percent": histogram_percentile(buckets, graded, 0.75),
+            "p90_percent": histogram_percentile(buckets, graded, 0.9),
+            "histogram": [
+                {"from": i * 10, "to": 100 if i == 9 else i * 10 + 9, "attempts": n}
+                for i, n in enumerate(histogram)
+            ],
+        }), 200
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
+    except Exception as e:
+        return jsonify({"message": f"Error: {e}"}), 500
+
+# =============== DASHBOARD ROUTES ===============
+
+@app.get("/api/dashboard/<email>")
+def get_student_dashboard(email):
+    """Everything the student dashboard needs, in three queries however many courses there are"""
+    try:
+        with get_db_connection() as conn:
+            student_id = key_map.get(conn, "user", email)
+            if student_id is None:
+                return jsonify({"student_email": email, "courses": []}), 200
+            cur = conn.cursor(dictionary=True)
+
+            # Enrolled courses with lesson totals and stored progress
+            cur.execute("""
+                SELECT c.id AS course_id, e.course_num, e.enrolled_at, c.title, c.description, c.level,
+                       COALESCE(s.lesson_count, 0) AS lesson_count,
+                       COALESCE(p.progress, 0) AS progress
+                FROM enrollments e
+                JOIN courses c ON c.num = e.course_num
+                LEFT JOIN course_stats s ON s.course_id = c.id
+                LEFT JOIN course_progress p ON p.student_id = e.student_id AND p.course_num = e.course_num
+                WHERE e.student_id = %s
+                ORDER BY e.enrolled_at DESC
+            """, (student_id,))
+            courses = cur.fetchall()
+
+            # Completed lessons across all courses
+            cur.execute("""
+                SELECT l.course_id, l.id AS lesson_id
+                FROM lesson_completions lc
+                JOIN lessons l ON l.num = lc.lesson_num
+                WHERE lc.student_id = %s
+            """, (student_id,))
+            completed = {}
+            for row in cur.fetchall():
+                completed.setdefault(row["course_id"], []).append(row["lesson_id"])
+
+            # Latest quiz attempt per course
+            cur.execute("""
+                SELECT c.id AS course_id, ql.last_score AS score, ql.last_total AS total,
+                       ql.last_submitted_at AS submitted_at
+                FROM quiz_latest ql
+                JOIN courses c ON c.num = ql.course_num
+                WHERE ql.student_id = %s
+            """, (student_id,))
+            quiz = {row.pop("course_id"): row for row in cur.fetchall()}
+            cur.close()
+
+        for course in courses:
+            course_id = course["course_id"]
+            course_num = course.pop("course_num")
+            if progress_buffer is not None:
+                buffered = progress_buffer.get(student_id, course_num)
+                if buffered is not None:
+                    course["progress"] = buffered
+            course["completed_lessons"] = completed.get(course_id, [])
+            course["quiz_result"] = quiz.get(course_id)
+
+        return jsonify({"student_email": email, "courses": courses}), 200
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
+    except Exception as e:
+        return jsonify({"message": f"Error: {e}"}), 500
+
+# =============== EXPORT ROUTES ===============
+
+GRADEBOOK_COLUMNS = [
+    "course_id", "student_email", "student_name", "enrolled_at", "progress",
+    "completed_lessons", "total_lessons", "last_score", "last_total",
+    "best_score", "best_total", "quiz_attempts",
+]
+
+# The trailing (student_id, course_num) key each row for the progress buffer and are not exported
+GRADEBOOK_SQL = """
+    SELECT c.id, u.email, u.name, e.enrolled_at,
+           COALESCE(p.progress, 0),
+           (SELECT COUNT(*) FROM lesson_completions lc
+            WHERE lc.student_id = e.student_id AND lc.course_num = e.course_num),
+           COALESCE(s.lesson_count, 0),
+           ql.last_score, ql.last_total, ql.best_score, ql.best_total, COALESCE(ql.attempts, 0),
+           e.student_id, e.course_num
+    FROM enrollments e
+    JOIN users u ON u.id = e.student_id
+    JOIN courses c ON c.num = e.course_num
+    LEFT JOIN course_progress p ON p.student_id = e.student_id AND p.course_num = e.course_num
+    LEFT JOIN course_stats s ON s.course_id = c.id
+    LEFT JOIN quiz_latest ql ON ql.student_id = e.student_id AND ql.course_num = e.course_num
+"""
+
+def stream_gradebook(where, params, filename):
+    """Stream the gradebook as CSV/NDJSON straight off an unbuffered cursor (constant memory)"""
+    fmt = request.args.get("format", "csv")
+    if fmt not in FORMATS:
+        return jsonify({"message": "format must be csv or ndjson"}), 400
+    to_chunks, content_type, extension = FORMATS[fmt]
+    compress = request.args.get("gzip") == "1"
+
+    # Run the query before answering so connection/SQL errors still get a status code
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor(buffered=False)
+        cur.execute(GRADEBOOK_SQL + where + " ORDER BY c.id, u.email", params)
+    except Exception:
         conn.close()
-        return jsonify(result or {}), 200
+        raise
+
+    state = {"finished": False}
+
+    def rows():
+        for row in iter_rows(cur):
+            row, keys = row[:-2], row[-2:]
+            if progress_buffer is not None:
+                buffered = progress_buffer.get(*keys)
+                if buffered is not None:
+                    row = row[:4] + (buffered,) + row[5:]
+            yield row
+        state["finished"] = True
+
+    def cleanup():
+        # Runs when the server closes the response, even if it was never iterated
+        if state["finished"]:
+            cur.close()
+            conn.close()
+        else:
+            # Client went away mid-export: drop the connection rather than drain the result
+            conn.discard()
+
+    body = to_chunks(GRADEBOOK_COLUMNS, rows())
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{extension}"'}
+    if compress:
+        body = gzip_chunks(body)
+        content_type = "application/gzip"
+        headers["Content-Disposition"] = f'attachment; filename="{filename}.{extension}.gz"'
+    response = Response(body, content_type=content_type, headers=headers)
+    response.call_on_close(cleanup)
+    return response
+
+@app.route("/api/courses/<course_id>/export", methods=["GET", "OPTIONS"])
+@require_auth("teacher", "admin")
+def export_course_gradebook(course_id):
+    try:
+        return stream_gradebook(" WHERE c.id = %s", (course_id,), f"gradebook-{course_id}")
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
+    except Exception as e:
+        return jsonify({"message": f"Error: {e}"}), 500
+
+@app.route("/api/export/gradebook", methods=["GET", "OPTIONS"])
+@require_auth("admin")
+def export_platform_gradebook():
+    try:
+        return stream_gradebook("", (), "gradebook-all")
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
     except Exception as e:
         return jsonify({"message": f"Error: {e}"}), 500
 
@@ -448,38 +1768,143 @@ def complete_lesson():
     lesson_id = data.get("lesson_id")
 
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO lesson_completions (student_email, course_id, lesson_id) VALUES (%s, %s, %s)",
-            (email, course_id, lesson_id)
-        )
-        conn.commit()
-        cur.close()
-        conn.close()
-        return jsonify({"message": "Lesson marked as complete"}), 201
+        with get_db_connection() as conn:
+            student_id, course_num = student_course_keys(conn, email, course_id)
+            lesson = key_map.get(conn, "lesson", lesson_id)
+            if student_id is None or lesson is None or lesson[1] != course_num:
+                return jsonify({"message": "Unknown student or lesson for this course"}), 404
+            cur = conn.cursor()
+            cur.execute(
+                "INSERT INTO lesson_completions (student_id, course_num, lesson_num) VALUES (%s, %s, %s)",
+                (student_id, course_num, lesson[0])
+            )
+            bump_platform_stats(cur, "lesson_completions")
+            log_change(cur, "lesson_completed", student_id, course_num, lesson_id=lesson_id)
+            conn.commit()
+            cur.close()
+            platform_stats.touch(student_id)
+            return jsonify({"message": "Lesson marked as complete"}), 201
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
     except mysql.connector.IntegrityError:
         return jsonify({"message": "Already completed"}), 200
     except Exception as e:
         return jsonify({"message": f"Error: {e}"}), 500
 
+@app.post("/api/lessons/complete/bulk")
+def bulk_complete_lessons():
+    """Record many lesson completions in one transaction, reporting per-item status"""
+    parsed, results, error = bulk_items(
+        request.get_json() or {}, ("student_email", "course_id", "lesson_id")
+    )
+    if error:
+        return error
+
+    try:
+        with get_db_connection() as conn:
+            users = key_map.resolve(conn, "user", {e for _, (e, _c, _l) in parsed})
+            courses = key_map.resolve(conn, "course", {c for _, (_e, c, _l) in parsed})
+            lessons = key_map.resolve(conn, "lesson", {l for _, (_e, _c, l) in parsed})
+            keys = {(users.get(e.lower()), lessons.get(l.lower(), (None,))[0]) for _, (e, _c, l) in parsed}
+            cur = conn.cursor()
+            existing = fetch_existing(
+                cur, "lesson_completions", ("student_id", "lesson_num"), {k for k in keys if None not in k}
+            )
+
+            rows = []
+            seen = set()
+            for i, (email, course_id, lesson_id) in parsed:
+                student_id = users.get(email.lower())
+                lesson = lessons.get(lesson_id.lower())
+                if student_id is None:
+                    results[i] = {"index": i, "status": "invalid", "message": "Unknown student"}
+                elif lesson is None or lesson[1] != courses.get(course_id.lower()):
+                    results[i] = {"index": i, "status": "invalid", "message": "Unknown lesson for this course"}
+                elif norm_key((student_id, lesson[0])) in existing or (student_id, lesson[0]) in seen:
+                    results[i] = {"index": i, "status": "exists"}
+                else:
+                    seen.add((student_id, lesson[0]))
+                    rows.append((student_id, lesson[1], lesson[0]))
+                    results[i] = {"index": i, "status": "created"}
+
+            inserted = insert_ignore(cur, "lesson_completions", ("student_id", "course_num", "lesson_num"), rows)
+            bump_platform_stats(cur, "lesson_completions", delta=inserted)
+            conn.commit()
+            cur.close()
+        return bulk_response(results)
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
+    except Exception as e:
+        return jsonify({"message": f"Error: {e}"}), 500
+
 @app.get("/api/lessons/completed/<email>/<course_id>")
 def get_completed_lessons(email, course_id):
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(dictionary=True)
-        cur.execute(
-            "SELECT lesson_id FROM lesson_completions WHERE student_email = %s AND course_id = %s",
-            (email, course_id)
-        )
-        results = cur.fetchall()
-        cur.close()
-        conn.close()
-        lesson_ids = [r["lesson_id"] for r in results]
-        return jsonify({"completed_lessons": lesson_ids}), 200
+        with get_db_connection() as conn:
+            student_id, course_num = student_course_keys(conn, email, course_id)
+            if student_id is None or course_num is None:
+                return jsonify({"completed_lessons": []}), 200
+            cur = conn.cursor(dictionary=True)
+            cur.execute("""
+                SELECT l.id AS lesson_id
+                FROM lesson_completions lc
+                JOIN lessons l ON l.num = lc.lesson_num
+                WHERE lc.student_id = %s AND lc.course_num = %s
+            """, (student_id, course_num))
+            results = cur.fetchall()
+            cur.close()
+            lesson_ids = [r["lesson_id"] for r in results]
+            return jsonify({"completed_lessons": lesson_ids}), 200
+    except PoolUnavailable as e:
+        return pool_unavailable(e)
     except Exception as e:
         return jsonify({"message": f"Error: {e}"}), 500
 
+# =============== CHANGE FEED ROUTES ===============
+
+def event_stream(**key):
+    """text/event-stream of one course's or one student's events, resuming after Last-Event-ID.
+
+    Holds a server thread for as long as the client stays connected, so at most
+    SSE_THREAD_STREAMS run at once and the next client is told to retry later;
+    asgi_app.py serves the same streams on its event loop instead.
+    """
+    if not thread_streams.acquire(blocking=False):
+        return feed_full(FeedFull(f"{SSE_THREAD_STREAMS} threaded change feed streams already open"))
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        sub = change_feed.subscribe(last_event_id=last_event_id, **key)
+    except FeedFull as e:
+        thread_streams.release()
+        return feed_full(e)
+
+    def close():
+        sub.close()
+        thread_streams.release()
+
+    def body():
+        yield preamble(SSE_RETRY_MS)
+        while True:
+            batch = sub.next_batch(SSE_HEARTBEAT)
+            if batch is None:
+                return
+            yield frames(batch) if batch else HEARTBEAT
+
+    response = Response(body(), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    response.call_on_close(close)
+    return response
+
+@app.get("/api/events/course/<course_id>")
+def course_events(course_id):
+    """Live progress, completions, quiz results and enrollments for one course"""
+    return event_stream(course_id=course_id)
+
+@app.get("/api/events/student/<email>")
+def student_events(email):
+    """Live events for one student across all their courses"""
+    return event_stream(student_email=email)
+
 if __name__ == "__main__":
     print("Starting EduTrack Flask Backend...")
     print("Database:", MYSQL_DB)
@@ -0,0 +1,611 @@
+"""Asyncio entry point for the EduTrack API (Starlette + aiomysql).
+
+The request-per-user hot paths (auth, enrollments, progress, completions,
+quiz results, dashboard) and the SSE change feed run natively on the
+event loop over an async MySQL pool, so an idle-waiting request or an
+open event stream costs a coroutine, not a thread.
+Every other /api/* route falls through to the Flask app (app.py) via
+a2wsgi, so both modes serve exactly the same API and share the same
+in-process caches, hasher and progress buffer.
+
+Native routes always read from the primary (the aiomysql pool has no
+replicas), so they need no stickiness; their writes still hand the client
+the same X-Read-After pin as Flask writes, for the reads Flask serves.
+
+    pip install starlette uvicorn aiomysql a2wsgi
+    python asgi_app.py
+"""
+import os
+import json
+import time
+import asyncio
+import decimal
+from datetime import date, datetime
+
+import aiomysql
+import uvicorn
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Match, Mount, Route
+from werkzeug.http import http_date
+
+import app as backend
+from db_pool import PoolUnavailable
+from platform_stats import bump_sql, role_bucket
+from change_feed import FeedFull, HEARTBEAT, preamble, retry_later, frames, event_sql
+from hashing import HasherBusy
+
+# =============== CONFIG ===============
+ASYNC_PORT = int(os.environ.get("ASYNC_PORT", 4001))
+ASYNC_DB_POOL_MIN = int(os.environ.get("ASYNC_DB_POOL_MIN", 5))
+ASYNC_DB_POOL_SIZE = int(os.environ.get("ASYNC_DB_POOL_SIZE", 50))
+
+# =============== JSON ===============
+
+def _json_default(o):
+    # Same wire format as Flask's jsonify
+    if isinstance(o, datetime):
+        return http_date(o)
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class JSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content):
+        return json.dumps(content, default=_json_default).encode("utf-8")
+
+
+def json_response(data, status=200, headers=None):
+    return JSONResponse(data, status_code=status, headers=headers)
+
+# =============== DB HELPERS ===============
+db_pool = None
+
+
+class db_connection:
+    """async with db_connection() as conn: checkout with a timeout, always returned"""
+
+    async def __aenter__(self):
+        try:
+            self.conn = await asyncio.wait_for(db_pool.acquire(), backend.DB_POOL_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise PoolUnavailable(f"No database connection available after {backend.DB_POOL_TIMEOUT}s")
+        except Exception as e:
+            raise PoolUnavailable(f"Database connection failed: {e}") from e
+        return self.conn
+
+    async def __aexit__(self, exc_type, exc, tb):
+        db_pool.release(self.conn)
+        return False
+
+
+async def fetch_one(sql, params=()):
+    async with db_connection() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            await cur.execute(sql, params)
+            return await cur.fetchone()
+
+
+async def resolve(conn, kind, value):
+    """Async key_map.get(): the cached id, else one lookup on conn"""
+    cached = backend.key_map.peek(kind, value)
+    if cached is not None or not isinstance(value, str) or not value:
+        return cached
+    async with conn.cursor() as cur:
+        await cur.execute(backend.key_map.lookup_sql(kind, 1), (value,))
+        found = backend.key_map.remember(kind, await cur.fetchall())
+    return found.get(value.lower())
+
+
+async def student_course_keys(conn, email, course_id):
+    return await resolve(conn, "user", email), await resolve(conn, "course", course_id)
+
+
+async def cached_student_course_keys(email, course_id):
+    """student_course_keys() that only checks out a connection on a cache miss"""
+    student_id = backend.key_map.peek("user", email)
+    course_num = backend.key_map.peek("course", course_id)
+    if student_id is None or course_num is None:
+        async with db_connection() as conn:
+            student_id, course_num = await student_course_keys(conn, email, course_id)
+    return student_id, course_num
+
+
+def unknown_keys():
+    return json_response({"message": "Unknown student or course"}, 404)
+
+
+async def startup():
+    global db_pool
+    # Primary only, for reads too: native reads can never miss the client's own writes.
+    # autocommit on: reads never hold a transaction; writes open one explicitly
+    db_pool = await aiomysql.create_pool(
+        host=backend.MYSQL_HOST,
+        user=backend.MYSQL_USER,
+        password=backend.MYSQL_PASSWORD,
+        db=backend.MYSQL_DB,
+        minsize=ASYNC_DB_POOL_MIN,
+        maxsize=ASYNC_DB_POOL_SIZE,
+        autocommit=True,
+        pool_recycle=int(backend.DB_POOL_MAX_LIFETIME),
+    )
+
+
+async def shutdown():
+    db_pool.close()
+    await db_pool.wait_closed()
+
+
+async def request_user(request):
+    """app.request_user() for native routes: the email in the path, else in the JSON body"""
+    email = request.path_params.get("email")
+    if not email and request.method not in backend.READ_METHODS:
+        data = await read_json(request)
+        email = data.get("student_email") or data.get("email")
+    return email.lower() if isinstance(email, str) and email else None
+
+
+async def pin_write(request, response):
+    """The read-your-writes pin app.record_request_metrics() gives Flask writes"""
+    if request.method in backend.READ_METHODS or response.status_code >= 400:
+        return response
+    user = await request_user(request)
+    backend.db_router.note_write(user)
+    if user and backend.db_router.replicas:
+        response.headers[backend.READ_AFTER_HEADER] = backend.token_signer.pin(user, backend.DB_STICKY_SECONDS)
+    return response
+
+
+def api(handler):
+    """Map the shared error types to the same responses the Flask routes give"""
+    async def endpoint(request):
+        try:
+            return await pin_write(request, await handler(request, **request.path_params))
+        except PoolUnavailable as e:
+            print("DB POOL:", e)
+            return json_response({"message": "Database busy, please retry"}, 503, {"Retry-After": "1"})
+        except HasherBusy as e:
+            print("HASHER:", e)
+            return json_response({"message": "Server busy, please retry"}, 503, {"Retry-After": "1"})
+        except Exception as e:
+            return json_response({"message": f"Error: {e}"}, 500)
+    return endpoint
+
+
+async def read_json(request):
+    try:
+        data = await request.json()
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+# =============== ROUTES ===============
+
+async def ping(request):
+    return json_response({"ok": True, "message": "Ping success", "mode": "async"})
+
+
+async def register(request):
+    data = await read_json(request)
+    name = data.get("name")
+    email = data.get("email")
+    password = data.get("password")
+    role = data.get("role")
+
+    if not all([name, email, password, role]):
+        return json_response({"message": "All fields required"}, 400)
+
+    if await fetch_one("SELECT id FROM users WHERE email = %s", (email,)):
+        return json_response({"message": "Email already exists"}, 409)
+
+    hashed = await backend.hasher.hash_async(password)
+    async with db_connection() as conn:
+        await conn.begin()
+        try:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    "INSERT INTO users (name, email, password, role) VALUES (%s, %s, %s, %s)",
+                    (name, email, hashed, role),
+                )
+                await cur.execute(*bump_sql("users", role_bucket(role)))
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            raise
+    return json_response({"message": "User registered successfully"})
+
+
+async def login(request):
+    data = await read_json(request)
+    email = data.get("email")
+    password = data.get("password")
+    role_input = (data.get("role") or "").lower()
+
+    if not all([email, password, role_input]):
+        return json_response({"message": "All fields required"}, 400)
+
+    user = await fetch_one("SELECT * FROM users WHERE email = %s", (email,))
+    if not user:
+        return json_response({"message": "Invalid email or password"}, 400)
+    if (user["role"] or "").lower() != role_input:
+        return json_response({"message": "Invalid role selected"}, 400)
+    if not await backend.hasher.verify_async(password, user["password"]):
+        return json_response({"message": "Invalid email or password"}, 400)
+
+    if backend.hasher.needs_rehash(user["password"]):
+        try:
+            rehashed = await backend.hasher.hash_async(password)
+            async with db_connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(
+                        "UPDATE users SET password = %s WHERE id = %s AND password = %s",
+                        (rehashed, user["id"], user["password"]),
+                    )
+            backend.hasher.record_rehash()
+        except Exception as e:
+            print("REHASH ERROR:", e)
+
+    return json_response({
+        "message": "Login successful",
+        "token": backend.token_signer.issue(user["id"], user["email"], user["role"]),
+        "user": {
+            "id": user["id"],
+            "name": user["name"],
+            "email": user["email"],
+            "role": user["role"],
+        },
+    })
+
+
+async def create_enrollment(request):
+    data = await read_json(request)
+    email = data.get("student_email")
+    course_id = data.get("course_id")
+
+    if not all([email, course_id]):
+        return json_response({"message": "Missing required fields"}, 400)
+
+    async with db_connection() as conn:
+        student_id, course_num = await student_course_keys(conn, email, course_id)
+        if student_id is None or course_num is None:
+            return unknown_keys()
+        await conn.begin()
+        try:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    "INSERT INTO enrollments (student_id, course_num) VALUES (%s, %s)",
+                    (student_id, course_num)
+                )
+                await cur.execute(*backend.course_stats_sql(course_id, enrollment_count=1))
+                await cur.execute(*bump_sql("enrollments"))
+                await cur.execute(*event_sql("enrollment", student_id, course_num))
+            await conn.commit()
+        except aiomysql.IntegrityError:
+            await conn.rollback()
+            return json_response({"message": "Already enrolled"}, 409)
+        except Exception:
+            await conn.rollback()
+            raise
+    backend.invalidate_catalog()
+    backend.platform_stats.touch(student_id)
+    return json_response({"message": "Enrolled successfully"}, 201)
+
+
+async def get_user_enrollments(request, email):
+    async with db_connection() as conn:
+        student_id = await resolve(conn, "user", email)
+        if student_id is None:
+            return json_response([])
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            await cur.execute("""
+                SELECT e.id, u.email AS student_email, c.id AS course_id, e.enrolled_at,
+                       c.title, c.description, c.level
+                FROM enrollments e
+                JOIN users u ON u.id = e.student_id
+                JOIN courses c ON c.num = e.course_num
+                WHERE e.student_id = %s
+            """, (student_id,))
+            enrollments = await cur.fetchall()
+    return json_response(list(enrollments))
+
+
+async def update_progress(request):
+    data = await read_json(request)
+    email = data.get("student_email")
+    course_id = data.get("course_id")
+    progress = data.get("progress", 0)
+
+    if backend.progress_buffer is not None:
+        if not all([email, course_id]) or not isinstance(progress, int):
+            return json_response({"message": "Missing required fields"}, 400)
+        student_id, course_num = await cached_student_course_keys(email, course_id)
+        if student_id is None or course_num is None:
+            return unknown_keys()
+        backend.progress_buffer.put(student_id, course_num, progress)
+        backend.platform_stats.touch(student_id)
+        return json_response({"message": "Progress updated"})
+
+    async with db_connection() as conn:
+        student_id, course_num = await student_course_keys(conn, email, course_id)
+        if student_id is None or course_num is None:
+            return unknown_keys()
+        await conn.begin()
+        try:
+            async with conn.cursor() as cur:
+                await cur.execute("""
+                    INSERT INTO course_progress (student_id, course_num, progress)
+                    VALUES (%s, %s, %s)
+                    ON DUPLICATE KEY UPDATE progress = %s
+                """, (student_id, course_num, progress, progress))
+                await cur.execute(*event_sql("progress", student_id, course_num, progress=progress))
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            raise
+    backend.platform_stats.touch(student_id)
+    return json_response({"message": "Progress updated"})
+
+
+async def get_progress(request, email, course_id):
+    student_id, course_num = await cached_student_course_keys(email, course_id)
+    if student_id is None or course_num is None:
+        return json_response({"progress": 0})
+    if backend.progress_buffer is not None:
+        buffered = backend.progress_buffer.get(student_id, course_num)
+        if buffered is not None:
+            return json_response({"progress": buffered})
+
+    result = await fetch_one(
+        "SELECT progress FROM course_progress WHERE student_id = %s AND course_num = %s",
+        (student_id, course_num)
+    )
+    return json_response({"progress": result["progress"] if result else 0})
+
+
+async def get_quiz_result(request, email, course_id):
+    async with db_connection() as conn:
+        student_id, course_num = await student_course_keys(conn, email, course_id)
+        if student_id is None or course_num is None:
+            return json_response({})
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            await cur.execute("""
+                SELECT last_score AS score, last_total AS total, last_submitted_at AS submitted_at,
+                       best_score, best_total, best_submitted_at, attempts
+                FROM quiz_latest
+                WHERE student_id = %s AND course_num = %s
+            """, (student_id, course_num))
+            result = await cur.fetchone()
+    return json_response(result or {})
+
+
+async def complete_lesson(request):
+    data = await read_json(request)
+    email = data.get("student_email")
+    course_id = data.get("course_id")
+    lesson_id = data.get("lesson_id")
+
+    async with db_connection() as conn:
+        student_id, course_num = await student_course_keys(conn, email, course_id)
+        lesson = await resolve(conn, "lesson", lesson_id)
+        if student_id is None or lesson is None or lesson[1] != course_num:
+            return json_response({"message": "Unknown student or lesson for this course"}, 404)
+        await conn.begin()
+        try:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    "INSERT INTO lesson_completions (student_id, course_num, lesson_num) VALUES (%s, %s, %s)",
+                    (student_id, course_num, lesson[0])
+                )
+                await cur.execute(*bump_sql("lesson_completions"))
+                await cur.execute(*event_sql("lesson_completed", student_id, course_num, lesson_id=lesson_id))
+            await conn.commit()
+        except aiomysql.IntegrityError:
+            await conn.rollback()
+            return json_response({"message": "Already completed"})
+        except Exception:
+            await conn.rollback()
+            raise
+    backend.platform_stats.touch(student_id)
+    return json_response({"message": "Lesson marked as complete"}, 201)
+
+
+async def get_completed_lessons(request, email, course_id):
+    async with db_connection() as conn:
+        student_id, course_num = await student_course_keys(conn, email, course_id)
+        if student_id is None or course_num is None:
+            return json_response({"completed_lessons": []})
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            await cur.execute("""
+                SELECT l.id AS lesson_id
+                FROM lesson_completions lc
+                JOIN lessons l ON l.num = lc.lesson_num
+                WHERE lc.student_id = %s AND lc.course_num = %s
+            """, (student_id, course_num))
+            results = await cur.fetchall()
+    return json_response({"completed_lessons": [r["lesson_id"] for r in results]})
+
+
+async def get_student_dashboard(request, email):
+    async with db_connection() as conn:
+        student_id = await resolve(conn, "user", email)
+        if student_id is None:
+            return json_response({"student_email": email, "courses": []})
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            await cur.execute("""
+                SELECT c.id AS course_id, e.course_num, e.enrolled_at, c.title, c.description, c.level,
+                       COALESCE(s.lesson_count, 0) AS lesson_count,
+                       COALESCE(p.progress, 0) AS progress
+                FROM enrollments e
+                JOIN courses c ON c.num = e.course_num
+                LEFT JOIN course_stats s ON s.course_id = c.id
+                LEFT JOIN course_progress p ON p.student_id = e.student_id AND p.course_num = e.course_num
+                WHERE e.student_id = %s
+                ORDER BY e.enrolled_at DESC
+            """, (student_id,))
+            courses = list(await cur.fetchall())
+
+            await cur.execute("""
+                SELECT l.course_id, l.id AS lesson_id
+                FROM lesson_completions lc
+                JOIN lessons l ON l.num = lc.lesson_num
+                WHERE lc.student_id = %s
+            """, (student_id,))
+            completions = await cur.fetchall()
+
+            await cur.execute("""
+                SELECT c.id AS course_id, ql.last_score AS score, ql.last_total AS total,
+                       ql.last_submitted_at AS submitted_at
+                FROM quiz_latest ql
+                JOIN courses c ON c.num = ql.course_num
+                WHERE ql.student_id = %s
+            """, (student_id,))
+            quiz = await cur.fetchall()
+
+    completed = {}
+    for row in completions:
+        completed.setdefault(row["course_id"], []).append(row["lesson_id"])
+    latest = {row.pop("course_id"): row for row in quiz}
+
+    for course in courses:
+        course_id = course["course_id"]
+        course_num = course.pop("course_num")
+        if backend.progress_buffer is not None:
+            buffered = backend.progress_buffer.get(student_id, course_num)
+            if buffered is not None:
+                course["progress"] = buffered
+        course["completed_lessons"] = completed.get(course_id, [])
+        course["quiz_result"] = latest.get(course_id)
+
+    return json_response({"student_email": email, "courses": courses})
+
+
+async def event_stream(request, **key):
+    """Same stream as app.event_stream, woken by the feed instead of holding a thread"""
+    loop = asyncio.get_running_loop()
+    ready = asyncio.Event()
+    last_event_id = request.headers.get("last-event-id") or request.query_params.get("last_event_id")
+    try:
+        sub = backend.change_feed.subscribe(
+            last_event_id=last_event_id,
+            waker=lambda: loop.call_soon_threadsafe(ready.set),
+            **key,
+        )
+    except FeedFull as e:
+        # Same as app.feed_full: a 503 would make EventSource stop reconnecting
+        print("CHANGE FEED:", e)
+        return Response(retry_later(backend.SSE_RETRY_MS), media_type="text/event-stream",
+                        headers={"Cache-Control": "no-cache"})
+
+    async def body():
+        try:
+            yield preamble(backend.SSE_RETRY_MS)
+            while True:
+                # Clear before draining so a publish in between still wakes the wait below
+                ready.clear()
+                batch = sub.next_batch()
+                if batch is None:
+                    return
+                if batch:
+                    yield frames(batch)
+                    continue
+                try:
+                    await asyncio.wait_for(ready.wait(), backend.SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+        finally:
+            sub.close()
+
+    # The background close also covers a client that leaves before the body starts
+    return StreamingResponse(body(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+                             background=BackgroundTask(sub.close))
+
+
+async def course_events(request, course_id):
+    return await event_stream(request, course_id=course_id)
+
+
+async def student_events(request, email):
+    return await event_stream(request, student_email=email)
+
+
+routes = [
+    Route("/api/ping", api(ping), methods=["GET"]),
+    Route("/api/auth/register", api(register), methods=["POST"]),
+    Route("/api/auth/login", api(login), methods=["POST"]),
+    Route("/api/enrollments", api(create_enrollment), methods=["POST"]),
+    Route("/api/enrollments/{email}", api(get_user_enrollments), methods=["GET"]),
+    Route("/api/progress", api(update_progress), methods=["POST"]),
+    Route("/api/progress/{email}/{course_id}", api(get_progress), methods=["GET"]),
+    Route("/api/quiz/result/{email}/{course_id}", api(get_quiz_result), methods=["GET"]),
+    Route("/api/lessons/complete", api(complete_lesson), methods=["POST"]),
+    Route("/api/lessons/completed/{email}/{course_id}", api(get_completed_lessons), methods=["GET"]),
+    Route("/api/dashboard/{email}", api(get_student_dashboard), methods=["GET"]),
+    Route("/api/events/course/{course_id}", api(course_events), methods=["GET"]),
+    Route("/api/events/student/{email}", api(student_events), methods=["GET"]),
+    # Everything else: the Flask app, run on a2wsgi's thread pool
+    Mount("/", app=WSGIMiddleware(backend.app)),
+]
+
+
+
+class RequestMetrics:
+    """Latency and status metrics for the native routes, recorded into app.metrics.
+
+    Requests that fall through to Flask are recorded by its own hooks. As
+    there, the duration runs until the response starts, so an event stream
+    counts only its setup. aiomysql statements are not timed.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        # Same labels as Flask's url_rule: /api/progress/<email>/<course_id>
+        self.native = [(route, route.path.replace("{", "<").replace("}", ">"))
+                       for route in routes if isinstance(route, Route)]
+
+    def _route(self, scope):
+        for route, label in self.native:
+            if route.matches(scope)[0] == Match.FULL:
+                return label
+        return None
+
+    async def __call__(self, scope, receive, send):
+        label = self._route(scope) if scope["type"] == "http" else None
+        if label is None:
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        labels = (("route", label), ("method", scope["method"]))
+
+        async def send_timed(message):
+            if message["type"] == "http.response.start":
+                backend.metrics.observe("http_request_duration_seconds", time.perf_counter() - started, labels)
+                backend.metrics.inc("http_requests_total", labels + (("status", message["status"]),))
+            await send(message)
+
+        await self.app(scope, receive, send_timed)
+
+
+app = Starlette(
+    routes=routes,
+    middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"],
+                           expose_headers=[backend.READ_AFTER_HEADER]),
+                Middleware(RequestMetrics)],
+    on_startup=[startup],
+    on_shutdown=[shutdown],
+)
+
+if __name__ == "__main__":
+    print("Starting EduTrack async backend...")
+    print("Database:", backend.MYSQL_DB)
+    print(f"Server: http://127.0.0.1:{ASYNC_PORT}")
+    uvicorn.run(app, host="127.0.0.1", port=ASYNC_PORT, log_level="warning")
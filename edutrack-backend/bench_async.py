@@ -0,0 +1,113 @@
+"""Side-by-side throughput/latency benchmark: sync (app.py) vs async (asgi_app.py).
+
+Start both servers against the same database, then:
+
+    python bench_async.py --concurrency 200 --duration 20
+
+Uses only the standard library (the HTTP/1.1 keep-alive client from loadtest.py),
+one connection per simulated user, each looping over the same route mix.
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from urllib.parse import urlsplit
+
+from loadtest import request, percentile
+
+EMAIL = "student@gmail.com"
+COURSE = "web-dev"
+
+# (weight, method, path, body)
+ROUTES = [
+    (3, "GET", "/api/ping", None),
+    (4, "GET", f"/api/progress/{EMAIL}/{COURSE}", None),
+    (2, "POST", "/api/progress", {"student_email": EMAIL, "course_id": COURSE, "progress": 40}),
+    (3, "GET", f"/api/lessons/completed/{EMAIL}/{COURSE}", None),
+    (2, "GET", f"/api/quiz/result/{EMAIL}/{COURSE}", None),
+    (2, "GET", f"/api/enrollments/{EMAIL}", None),
+    (2, "GET", f"/api/dashboard/{EMAIL}", None),
+]
+
+
+async def user(base, deadline, latencies, errors, weights):
+    parts = urlsplit(base)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    try:
+        while time.monotonic() < deadline:
+            _, method, path, body = random.choices(ROUTES, weights)[0]
+            started = time.perf_counter()
+            try:
+                status, headers, _ = await request(reader, writer, parts.netloc, method, path, body)
+            except (ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+                errors.append("connection")
+                writer.close()
+                reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+                continue
+            latencies.setdefault(path if method == "GET" else f"{method} {path}", []).append(
+                time.perf_counter() - started
+            )
+            if status >= 400:
+                errors.append(status)
+            if headers.get("connection", "").lower() == "close":
+                writer.close()
+                reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    finally:
+        writer.close()
+
+
+async def run(base, concurrency, duration):
+    latencies, errors = {}, []
+    weights = [w for w, *_ in ROUTES]
+    started = time.monotonic()
+    deadline = started + duration
+    await asyncio.gather(*(user(base, deadline, latencies, errors, weights) for _ in range(concurrency)))
+    elapsed = time.monotonic() - started
+
+    every = sorted(t for ts in latencies.values() for t in ts)
+    return {
+        "url": base,
+        "requests": len(every),
+        "errors": len(errors),
+        "rps": round(len(every) / elapsed, 1),
+        "p50_ms": round(percentile(every, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(every, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(every, 0.99) * 1000, 2),
+        "routes": {
+            path: round(percentile(sorted(ts), 0.95) * 1000, 2) for path, ts in latencies.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sync-url", default="http://127.0.0.1:4000")
+    parser.add_argument("--async-url", default="http://127.0.0.1:4001")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for base in (args.sync_url, args.async_url):
+        print(f"Benchmarking {base} ({args.concurrency} connections, {args.duration}s)...", file=sys.stderr)
+        results.append(asyncio.run(run(base, args.concurrency, args.duration)))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    sync, async_ = results
+    print(f"\n{'':<44}{'sync':>12}{'async':>12}")
+    for key in ("requests", "errors", "rps", "p50_ms", "p95_ms", "p99_ms"):
+        print(f"{key:<44}{sync[key]:>12}{async_[key]:>12}")
+    print("\np95 per route (ms)")
+    for path in sorted(set(sync["routes"]) | set(async_["routes"])):
+        print(f"  {path:<42}{sync['routes'].get(path, '-'):>12}{async_['routes'].get(path, '-'):>12}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class _Flight:
+    """One in-progress load that concurrent misses wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.stale = False   # set when the key is invalidated mid-load
+
+
+class CatalogCache:
+    """In-process read-through cache with TTL, LRU eviction and single-flight loads.
+
+    Entries are only as fresh as this process knows about: writes served by
+    this process invalidate immediately, everything else ages out via the TTL.
+    """
+
+    def __init__(self, max_entries=1024, ttl=60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self._flights = {}              # key -> _Flight
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.coalesced = 0
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for key, calling loader() at most once per miss burst.
+
+        A loader result of None (e.g. course not found) is returned but not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.expirations += 1
+
+            self.misses += 1
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                flight = self._flights[key] = _Flight()
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                # Skip the store if the key was invalidated while we were loading
+                if flight.error is None and flight.value is not None and not flight.stale:
+                    self._store(key, flight.value)
+            flight.done.set()
+
+        return flight.value
+
+    def peek(self, key):
+        """Cached value for key or None, without loading"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _invalidate_key(self, key):
+        # Detach any in-progress load so later misses start a fresh one
+        flight = self._flights.pop(key, None)
+        if flight is not None:
+            flight.stale = True
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._invalidate_key(key)
+
+    def invalidate_prefix(self, prefix):
+        """Invalidate every key starting with the given tuple prefix (e.g. all course-list pages)"""
+        n = len(prefix)
+        with self._lock:
+            for key in list(self._entries) + list(self._flights):
+                if key[:n] == prefix:
+                    self._invalidate_key(key)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries) + list(self._flights):
+                self._invalidate_key(key)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "coalesced_misses": self.coalesced,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "in_flight": len(self._flights),
+            }
@@ -0,0 +1,395 @@
+import json
+import time
+import random
+import threading
+from collections import deque, namedtuple
+
+# Sent between events so proxies keep the connection open and dead clients are noticed
+HEARTBEAT = ": keepalive\n\n"
+
+# seq is the change_events id, shared by every process; frame is the encoded SSE
+# message, built once for every subscriber
+Event = namedtuple("Event", "seq key_course key_student frame")
+
+INSERT_SQL = "INSERT INTO change_events (kind, student_id, course_num, data) VALUES "
+
+# Slugs and emails are joined in when read, so writers only need the integer keys.
+# LEFT JOINs keep events whose course or student was deleted since, so they don't look like gaps.
+FETCH_SQL = """
+    SELECT e.id, e.kind, c.id, u.email, e.data, UNIX_TIMESTAMP(e.created_at)
+    FROM change_events e
+    LEFT JOIN courses c ON c.num = e.course_num
+    LEFT JOIN users u ON u.id = e.student_id
+    WHERE e.id >= %s
+    ORDER BY e.id
+    LIMIT %s
+"""
+
+PRUNE_SQL = "DELETE FROM change_events WHERE created_at < NOW() - INTERVAL %s SECOND ORDER BY id LIMIT %s"
+
+
+class FeedFull(Exception):
+    """Raised by subscribe() when max_subscribers streams are already open"""
+
+
+def events_sql(events):
+    """(sql, params) logging [(kind, student_id, course_num, fields)]; run it in the transaction of the writes"""
+    return (
+        INSERT_SQL + ", ".join(["(%s, %s, %s, %s)"] * len(events)),
+        [v for kind, student_id, course_num, fields in events
+         for v in (kind, student_id, course_num, json.dumps(fields, separators=(",", ":")))],
+    )
+
+
+def event_sql(kind, student_id, course_num, **fields):
+    """(sql, params) logging one change event; run it last, just before the write's commit"""
+    return events_sql([(kind, student_id, course_num, fields)])
+
+
+def format_event(event_id, kind, data):
+    return f"id: {event_id}\nevent: {kind}\ndata: {json.dumps(data, separators=(',', ':'), default=str)}\n\n"
+
+
+def preamble(retry_ms):
+    """First bytes of every stream: the browser's reconnect delay"""
+    return f"retry: {int(retry_ms)}\n\n"
+
+
+def retry_later(retry_ms):
+    """The whole body of a stream turned away at a cap. EventSource gives up on an error
+    status but reconnects after a stream ends, so this asks it to come back later, at a
+    spread-out delay so turned-away clients don't all return at once."""
+    return preamble(random.randint(2 * retry_ms, 4 * retry_ms))
+
+
+def frames(batch):
+    return "".join(event.frame for event in batch)
+
+
+def _key(value):
+    return value.lower() if isinstance(value, str) and value else None
+
+
+class Subscription:
+    """One open stream: a bounded queue of events for one course or one student"""
+
+    def __init__(self, feed, key, limit, after=0, waker=None):
+        self.key = key                  # ("course", id) or ("student", email)
+        self._feed = feed
+        self._limit = limit
+        self._after = after             # the client already has every event up to this id
+        self._waker = waker             # called after each enqueue, e.g. to wake an event loop
+        self._events = deque()
+        self._cond = threading.Condition()
+        self.closed = False
+        self.overflowed = False
+
+    def _offer(self, event):
+        """Queue an event (feed lock held); a full queue closes the stream instead of blocking the feed"""
+        with self._cond:
+            if self.closed or event.seq <= self._after:
+                return False
+            if len(self._events) >= self._limit:
+                # The client reconnects with Last-Event-ID and catches up from the feed's history
+                self._events.clear()
+                self.closed = self.overflowed = True
+            else:
+                self._events.append(event)
+            self._cond.notify()
+        self._wake()
+        return not self.overflowed
+
+    def _wake(self):
+        if self._waker is not None:
+            try:
+                self._waker()
+            except RuntimeError:
+                pass                    # the event loop is gone; the stream is being torn down
+
+    def next_batch(self, timeout=None):
+        """Queued events, waiting up to `timeout` seconds for one; [] on timeout, None once closed"""
+        with self._cond:
+            if not self._events and not self.closed and timeout:
+                self._cond.wait(timeout)
+            if self._events:
+                batch = list(self._events)
+                self._events.clear()
+                return batch
+            return None if self.closed else []
+
+    def close(self):
+        self._feed._remove(self)
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+        self._wake()
+
+
+class ChangeFeed:
+    """Broker behind the SSE change feed, shared by every process through the change_events table.
+
+    Write routes log an event in the same transaction as the write (see
+    event_sql). Each process polls the table every `poll_interval` seconds
+    and hands new events to the streams open for their course and student,
+    in id order: an id that is missing, because its transaction has not
+    committed yet, holds back the ones after it for up to `gap_grace`
+    seconds before it is taken as rolled back and skipped. Event ids are
+    the table ids, so a client can resume on any worker.
+
+    A process with no open stream for `idle_after` seconds stops polling.
+    The next stream to open waits while the feed catches up: it re-reads
+    the last `history` events from the table, then resumes or starts that
+    stream as usual.
+
+    Every stream has its own queue of at most `buffer_size` events; one
+    that falls that far behind is closed rather than slowing the others.
+    The last `history` events are kept in memory for Last-Event-ID resume;
+    a client further behind gets a "reset" event and should re-fetch its
+    state. Rows older than `retention` seconds are pruned.
+    """
+
+    def __init__(self, get_connection, history=2000, buffer_size=256, max_subscribers=200,
+                 poll_interval=0.25, gap_grace=2.0, retention=3600, batch_size=500, idle_after=30.0):
+        self._get_connection = get_connection
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self.poll_interval = poll_interval
+        self.gap_grace = gap_grace
+        self.retention = retention
+        self.batch_size = batch_size
+        self.idle_after = idle_after
+
+        self._history = deque(maxlen=history)
+        self._next_id = None            # first id not yet handed out; None until caught up
+        self._seed_until = 0            # gaps at or below this id were settled before we caught up
+        self._gap_since = None
+        self._subscribers = {}          # key -> set of Subscription
+        self._pending = {}              # Subscription -> asked to resume; opened while idle
+        self._count = 0                 # attached and pending
+        self._live = False              # polling; False while idle
+        self._idle_since = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+        self.published = 0
+        self.delivered = 0
+        self.overflows = 0
+        self.resumes = 0
+        self.resets = 0
+        self.rejected = 0
+        self.gaps_skipped = 0
+        self.poll_errors = 0
+        self.catch_ups = 0
+
+    # ---------- polling ----------
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="change-feed", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        next_prune = 0.0
+        while not self._stopped.is_set():
+            busy = False
+            try:
+                self._check_idle()
+                if not self._live and self._count:
+                    self._catch_up()
+                if self._live:
+                    busy = self.poll() >= self.batch_size
+                if time.monotonic() >= next_prune:
+                    self.prune()
+                    next_prune = time.monotonic() + 60
+            except Exception as e:
+                with self._lock:
+                    self.poll_errors += 1
+                print("CHANGE FEED ERROR:", e)
+            if busy:
+                continue
+            if self._live:
+                self._stopped.wait(self.poll_interval)
+            else:
+                # Parked until a stream opens (still waking up to prune), or retrying a failed catch-up
+                self._wakeup.wait(self.poll_interval if self._count else 60)
+                self._wakeup.clear()
+
+    def _check_idle(self):
+        with self._lock:
+            if self._count:
+                self._idle_since = None
+            elif self._idle_since is None:
+                self._idle_since = time.monotonic()
+            elif self._live and time.monotonic() - self._idle_since >= self.idle_after:
+                self._live = False
+
+    def _catch_up(self):
+        """Refill the resume history up to the newest event, then attach the streams opened meanwhile"""
+        with self._get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT COALESCE(MAX(id), 0) FROM change_events")
+            last = cur.fetchone()[0]
+            cur.close()
+            conn.commit()
+        with self._lock:
+            self._history.clear()
+            self._seed_until = last
+            self._next_id = max(1, last - self._history.maxlen + 1)
+            self._gap_since = None
+        while self._next_id <= last and self.poll():
+            pass
+        with self._lock:
+            self._live = True
+            self.catch_ups += 1
+            for sub, resume in self._pending.items():
+                if not resume:
+                    # Opened before the catch-up started: everything up to `last` came before it
+                    sub._after = last
+                self._attach(sub, resume or last > 0)
+            self._pending.clear()
+
+    def poll(self):
+        """Publish newly committed events in id order; returns the rows read"""
+        with self._get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(FETCH_SQL, (self._next_id, self.batch_size))
+            rows = cur.fetchall()
+            cur.close()
+            conn.commit()           # end the snapshot so the next poll sees later commits
+        now = time.monotonic()
+        for row in rows:
+            event_id = row[0]
+            if event_id > self._next_id and event_id > self._seed_until:
+                if self._gap_since is None:
+                    self._gap_since = now
+                if now - self._gap_since < self.gap_grace:
+                    break           # an earlier write may still commit; publish in order
+                with self._lock:
+                    self.gaps_skipped += event_id - self._next_id
+            self._gap_since = None
+            self._publish(row)
+        return len(rows)
+
+    def prune(self):
+        with self._get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(PRUNE_SQL, (int(self.retention), 5000))
+            conn.commit()
+            cur.close()
+
+    def _publish(self, row):
+        event_id, kind, course_id, email, data, at = row
+        fields = json.loads(data) if data else {}
+        course, student = _key(course_id), _key(email)
+        payload = {"type": kind, "course_id": course_id, "student_email": student, **fields,
+                   "at": float(at) if at is not None else None}
+        event = Event(event_id, course, student, format_event(event_id, kind, payload))
+        with self._lock:
+            # Advanced together with the fan-out, so a subscriber never sees the id before the event
+            self._next_id = event_id + 1
+            self._history.append(event)
+            self.published += 1
+            for key in (("course", course), ("student", student)):
+                for sub in list(self._subscribers.get(key, ())):
+                    if sub._offer(event):
+                        self.delivered += 1
+                    elif sub.overflowed:
+                        self.overflows += 1
+                        self._discard(sub)
+
+    def close(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 5)
+
+    # ---------- subscribing ----------
+
+    def subscribe(self, course_id=None, student_email=None, last_event_id=None, waker=None):
+        """Open a stream for one course or one student, replaying what it missed since last_event_id"""
+        key = ("course", _key(course_id)) if course_id else ("student", _key(student_email))
+        after = int(last_event_id) if last_event_id and str(last_event_id).isdigit() else 0
+        sub = Subscription(self, key, self.buffer_size, after, waker)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                self.rejected += 1
+                raise FeedFull(f"{self._count} change feed streams already open")
+            self._count += 1
+            if self._live:
+                self._attach(sub, bool(last_event_id))
+                return sub
+            # Idle: the poller attaches it once the history is current again
+            self._pending[sub] = bool(last_event_id)
+        self._wakeup.set()
+        return sub
+
+    def _attach(self, sub, resume):
+        """Replay what sub missed since sub._after if asked to, then add it for live events (lock held)"""
+        if resume:
+            after = sub._after
+            missed = self._since(after, sub.key) if after else None
+            with sub._cond:
+                if missed is None or len(missed) > self.buffer_size:
+                    self.resets += 1
+                    last = self.last_id()
+                    sub._after = max(after, last)
+                    sub._events.append(Event(last, None, None, format_event(last, "reset", {"type": "reset"})))
+                else:
+                    self.resumes += 1
+                    sub._events.extend(missed)
+                sub._cond.notify()
+            # A stream that waited for a catch-up may already be blocked on its queue
+            sub._wake()
+        self._subscribers.setdefault(sub.key, set()).add(sub)
+
+    def last_id(self):
+        return self._next_id - 1 if self._next_id else 0
+
+    def _since(self, after, key):
+        """Events for key after id `after`, or None when they are no longer all in the history"""
+        last = self.last_id()
+        if after >= last:
+            return []
+        if not self._history or after < self._history[0].seq - 1:
+            return None
+        kind, value = key
+        return [e for e in self._history
+                if e.seq > after and (e.key_course if kind == "course" else e.key_student) == value]
+
+    def _remove(self, sub):
+        with self._lock:
+            if self._pending.pop(sub, None) is not None:
+                self._count -= 1
+            else:
+                self._discard(sub)
+
+    def _discard(self, sub):
+        subs = self._subscribers.get(sub.key)
+        if subs is not None and sub in subs:
+            subs.discard(sub)
+            if not subs:
+                del self._subscribers[sub.key]
+            self._count -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "subscribers": self._count,
+                "courses": sum(1 for kind, _ in self._subscribers if kind == "course"),
+                "students": sum(1 for kind, _ in self._subscribers if kind == "student"),
+                "last_event_id": self.last_id(),
+                "history": len(self._history),
+                "published": self.published,
+                "delivered": self.delivered,
+                "overflows": self.overflows,
+                "resumes": self.resumes,
+                "resets": self.resets,
+                "rejected": self.rejected,
+                "gaps_skipped": self.gaps_skipped,
+                "poll_errors": self.poll_errors,
+                "polling": self._live,
+                "waiting": len(self._pending),
+                "catch_ups": self.catch_ups,
+            }
@@ -0,0 +1,174 @@
+"""Verify or rebuild the maintained aggregates from the base tables.
+
+Covers course_stats, the quiz summaries (quiz_latest and
+quiz_score_histogram) and the platform_stats counters behind the admin
+dashboard.
+
+    python course_stats.py            # report drift only
+    python course_stats.py --rebuild  # recompute and overwrite every row
+"""
+import sys
+import mysql.connector
+
+import platform_stats
+
+STAT_COLUMNS = [
+    "lesson_count",
+    "quiz_question_count",
+    "enrollment_count",
+    "quiz_attempt_count",
+    "quiz_score_sum",
+    "quiz_total_sum",
+]
+
+# Ground truth, computed with one grouped pass per table
+ACTUAL_STATS_SQL = """
+    SELECT c.id AS course_id,
+           COALESCE(l.n, 0) AS lesson_count,
+           COALESCE(q.n, 0) AS quiz_question_count,
+           COALESCE(e.n, 0) AS enrollment_count,
+           COALESCE(r.n, 0) AS quiz_attempt_count,
+           COALESCE(r.score_sum, 0) AS quiz_score_sum,
+           COALESCE(r.total_sum, 0) AS quiz_total_sum
+    FROM courses c
+    LEFT JOIN (SELECT course_id, COUNT(*) AS n FROM lessons GROUP BY course_id) l ON l.course_id = c.id
+    LEFT JOIN (SELECT course_id, COUNT(*) AS n FROM quiz_questions GROUP BY course_id) q ON q.course_id = c.id
+    LEFT JOIN (SELECT course_num, COUNT(*) AS n FROM enrollments GROUP BY course_num) e ON e.course_num = c.num
+    LEFT JOIN (
+        SELECT course_num, COUNT(*) AS n, SUM(score) AS score_sum, SUM(total) AS total_sum
+        FROM quiz_results GROUP BY course_num
+    ) r ON r.course_num = c.num
+"""
+
+
+def find_drift(cur):
+    """Return [(course_id, column, stored, actual)] for every mismatch"""
+    cur.execute(ACTUAL_STATS_SQL)
+    actual = {row["course_id"]: row for row in cur.fetchall()}
+
+    cur.execute(f"SELECT course_id, {', '.join(STAT_COLUMNS)} FROM course_stats")
+    stored = {row["course_id"]: row for row in cur.fetchall()}
+
+    drift = []
+    for course_id, real in actual.items():
+        have = stored.get(course_id)
+        for col in STAT_COLUMNS:
+            stored_value = have[col] if have else None
+            if stored_value != real[col]:
+                drift.append((course_id, col, stored_value, int(real[col])))
+    return drift
+
+
+def rebuild(cur):
+    cur.execute(f"""
+        INSERT INTO course_stats (course_id, {', '.join(STAT_COLUMNS)})
+        {ACTUAL_STATS_SQL}
+        ON DUPLICATE KEY UPDATE {', '.join(f'{c} = VALUES({c})' for c in STAT_COLUMNS)}
+    """)
+
+
+def find_quiz_drift(cur):
+    """Return [(table, description, stored, actual)] for summary-level mismatches"""
+    drift = []
+    cur.execute("SELECT COUNT(*) AS n FROM (SELECT DISTINCT student_id, course_num FROM quiz_results WHERE total > 0) t")
+    actual = cur.fetchone()["n"]
+    cur.execute("SELECT COUNT(*) AS n FROM quiz_latest")
+    stored = cur.fetchone()["n"]
+    if stored != actual:
+        drift.append(("quiz_latest", "rows", stored, actual))
+
+    cur.execute("""
+        SELECT c.id AS course_id, r.n AS actual, COALESCE(h.n, 0) AS stored
+        FROM (SELECT course_num, COUNT(*) AS n FROM quiz_results WHERE total > 0 GROUP BY course_num) r
+        JOIN courses c ON c.num = r.course_num
+        LEFT JOIN (SELECT course_id, SUM(attempts) AS n FROM quiz_score_histogram GROUP BY course_id) h
+               ON h.course_id = c.id
+        WHERE COALESCE(h.n, 0) <> r.n
+    """)
+    for row in cur.fetchall():
+        drift.append(("quiz_score_histogram", f"{row['course_id']} attempts", int(row["stored"]), int(row["actual"])))
+    return drift
+
+
+def rebuild_quiz_summaries(cur):
+    cur.execute("DELETE FROM quiz_latest")
+    cur.execute("""
+        INSERT INTO quiz_latest (student_id, course_num, last_score, last_total, last_submitted_at,
+                                 best_score, best_total, best_submitted_at, best_permille, attempts)
+        SELECT l.student_id, l.course_num, l.score, l.total, l.submitted_at,
+               b.score, b.total, b.submitted_at, b.permille, l.attempts
+        FROM (
+            SELECT student_id, course_num, score, total, submitted_at,
+                   COUNT(*) OVER w_all AS attempts,
+                   ROW_NUMBER() OVER (PARTITION BY student_id, course_num
+                                      ORDER BY submitted_at DESC, id DESC) AS rn
+            FROM quiz_results
+            WHERE total > 0
+            WINDOW w_all AS (PARTITION BY student_id, course_num)
+        ) l
+        JOIN (
+            SELECT student_id, course_num, score, total, submitted_at,
+                   score * 1000 DIV total AS permille,
+                   ROW_NUMBER() OVER (PARTITION BY student_id, course_num
+                                      ORDER BY score * 1000 DIV total DESC, submitted_at, id) AS rn
+            FROM quiz_results
+            WHERE total > 0
+        ) b ON b.student_id = l.student_id AND b.course_num = l.course_num AND b.rn = 1
+        WHERE l.rn = 1
+    """)
+    cur.execute("DELETE FROM quiz_score_histogram")
+    cur.execute("""
+        INSERT INTO quiz_score_histogram (course_id, percent, attempts)
+        SELECT c.id, LEAST(100, GREATEST(0, r.score * 100 DIV r.total)) AS percent, COUNT(*)
+        FROM quiz_results r
+        JOIN courses c ON c.num = r.course_num
+        WHERE r.total > 0
+        GROUP BY c.id, percent
+    """)
+
+
+def main():
+    conn = mysql.connector.connect(
+        host='localhost',
+        user='root',
+        password='040506',
+        database='edutrack_lms'
+    )
+    cur = conn.cursor(dictionary=True)
+
+    drift = find_drift(cur)
+    print("\n=== COURSE STATS DRIFT ===")
+    for course_id, col, stored, actual in drift:
+        print(f"  {course_id}: {col} stored={stored} actual={actual}")
+
+    quiz_drift = find_quiz_drift(cur)
+    print("\n=== QUIZ SUMMARY DRIFT ===")
+    for table, what, stored, actual in quiz_drift:
+        print(f"  {table}: {what} stored={stored} actual={actual}")
+
+    platform_drift = platform_stats.find_drift(conn)
+    print("\n=== PLATFORM STATS DRIFT ===")
+    for stat, bucket, counted, actual in platform_drift:
+        print(f"  {stat}/{bucket or '-'}: stored={counted} actual={actual}")
+
+    drift += quiz_drift + platform_drift
+    print(f"\nMismatches: {len(drift)}")
+
+    if "--rebuild" in sys.argv:
+        rebuild(cur)
+        rebuild_quiz_summaries(cur)
+        conn.commit()
+        # Corrects the live counters by the drift seen in one snapshot, so the API can keep writing
+        if platform_stats.reconcile(conn) is None:
+            print("\nplatform_stats: another process is reconciling; skipped")
+        platform_stats.refresh_active(conn)
+        remaining = find_drift(cur) + find_quiz_drift(cur) + platform_stats.find_drift(conn)
+        print(f"\nRebuilt aggregates. Mismatches after rebuild: {len(remaining)}")
+
+    cur.close()
+    conn.close()
+    return 1 if drift and "--rebuild" not in sys.argv else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolUnavailable(Exception):
+    """Raised when the pool cannot hand out a connection"""
+
+
+class PoolTimeout(PoolUnavailable):
+    """Raised when no connection frees up within the checkout timeout"""
+
+
+class PooledConnection:
+    """Wraps a driver connection; close() hands it back to the pool"""
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._last_used = time.monotonic()
+        self._checked_out = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        if self._checked_out:
+            self._checked_out = False
+            self._pool.release(self)
+
+    def cursor(self, *args, **kwargs):
+        cur = self._raw.cursor(*args, **kwargs)
+        if self._pool.wrap_cursor is not None:
+            cur = self._pool.wrap_cursor(cur)
+        return cur
+
+    def discard(self):
+        """Close instead of returning, e.g. when abandoning a half-read streaming result"""
+        if self._checked_out:
+            self._checked_out = False
+            self._pool._discard(self)
+
+
+class ConnectionPool:
+    """Fixed-size pool of validated, lifetime-bounded connections"""
+
+    def __init__(self, connect, size=10, timeout=5.0, max_lifetime=1800.0, ping_after=5.0,
+                 on_acquire=None, wrap_cursor=None):
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_after = ping_after
+        self.on_acquire = on_acquire      # called with the checkout wait in seconds
+        self.wrap_cursor = wrap_cursor    # applied to every cursor handed out
+
+        self._idle = deque()
+        self._open = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+        self._checkouts = 0
+        self._checkout_failures = 0
+        self._created = 0
+        self._discarded = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # ---------- checkout / return ----------
+
+    def acquire(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._open < self.size:
+                    conn = None
+                    self._open += 1
+                    self._in_use += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._checkout_failures += 1
+                    raise PoolTimeout(f"No database connection available after {self.timeout}s")
+                self._cond.wait(remaining)
+
+        # Network work (connect / ping) happens outside the lock
+        try:
+            if conn is not None and not self._usable(conn):
+                self._discard(conn, reserve=True)
+                conn = None
+            if conn is None:
+                conn = self._new_connection()
+        except Exception as e:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._checkout_failures += 1
+                self._cond.notify()
+            raise PoolUnavailable(f"Database connection failed: {e}") from e
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self._checkouts += 1
+            self._wait_total += waited
+            if waited > self._wait_max:
+                self._wait_max = waited
+        if self.on_acquire is not None:
+            self.on_acquire(waited)
+
+        conn._checked_out = True
+        return conn
+
+    def release(self, conn):
+        try:
+            if conn._raw.unread_result:
+                conn._raw.consume_results()
+            if conn._raw.in_transaction:
+                conn._raw.rollback()
+            healthy = True
+        except Exception:
+            healthy = False
+
+        if not healthy or self._expired(conn):
+            self._discard(conn)
+            return
+
+        conn._last_used = time.monotonic()
+        with self._cond:
+            self._in_use -= 1
+            self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # ---------- internals ----------
+
+    def _new_connection(self):
+        raw = self._connect()
+        with self._cond:
+            self._created += 1
+        return PooledConnection(self, raw, time.monotonic())
+
+    def _expired(self, conn):
+        return self.max_lifetime and time.monotonic() - conn._created_at > self.max_lifetime
+
+    def _usable(self, conn):
+        if self._expired(conn):
+            return False
+        if time.monotonic() - conn._last_used < self.ping_after:
+            return True
+        try:
+            return conn._raw.is_connected()
+        except Exception:
+            return False
+
+    def _discard(self, conn, reserve=False):
+        """Close a connection; with reserve=True its slot stays claimed by the caller"""
+        try:
+            conn._raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._discarded += 1
+            if not reserve:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "open": self._open,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "checkouts": self._checkouts,
+                "checkout_failures": self._checkout_failures,
+                "created": self._created,
+                "discarded": self._discarded,
+                "wait_time_total_ms": round(self._wait_total * 1000, 3),
+                "wait_time_avg_ms": round(self._wait_total * 1000 / self._checkouts, 3) if self._checkouts else 0.0,
+                "wait_time_max_ms": round(self._wait_max * 1000, 3),
+            }
+
+    def close_all(self):
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+        for conn in idle:
+            try:
+                conn._raw.close()
+            except Exception:
+                pass
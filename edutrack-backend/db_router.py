@@ -0,0 +1,236 @@
+import time
+import threading
+from collections import OrderedDict
+
+from db_pool import PoolUnavailable, PoolTimeout
+
+
+def replica_lag(conn, lag_sql=None):
+    """Seconds the replica is behind, or None when replication is broken.
+
+    With lag_sql, its single value is the lag (e.g. a heartbeat-table age, or
+    a stand-in table updated by hand). Otherwise SHOW REPLICA STATUS is used;
+    a server with no replication configured reports no lag, so a second
+    plain instance (or the primary itself) can stand in for a replica.
+    """
+    cur = conn.cursor(dictionary=lag_sql is None)
+    try:
+        if lag_sql:
+            cur.execute(lag_sql)
+            row = cur.fetchone()
+            return float(row[0]) if row and row[0] is not None else None
+        cur.execute("SHOW REPLICA STATUS")
+        rows = cur.fetchall()
+        if not rows:
+            return 0.0
+        lag = rows[0].get("Seconds_Behind_Source")
+        if rows[0].get("Replica_SQL_Running") != "Yes" or lag is None:
+            return None
+        return float(lag)
+    finally:
+        cur.close()
+
+
+class Replica:
+    """One read replica: its pool, the raw connect used for health checks, and its last state"""
+
+    def __init__(self, name, pool, connect):
+        self.name = name
+        self.pool = pool
+        self.connect = connect
+        self.healthy = False        # until the first check passes
+        self.lag = None
+        self.error = None
+        self.checked_at = None
+        self._probe_conn = None
+
+
+class ReplicaRouter:
+    """Sends reads to healthy replicas and everything else to the primary.
+
+    A replica serves reads only while its last health check found it
+    reachable and at most `max_lag` seconds behind. Users who wrote in the
+    last `sticky_for` seconds read from the primary, so they see their own
+    writes: note_write() remembers that in this process, and callers pass
+    pinned=True when the client proved a recent write handled by another
+    process. A replica that fails at checkout is taken out of rotation until
+    the next passing check; if none is usable, reads go to the primary.
+    """
+
+    def __init__(self, primary, replicas=(), max_lag=2.0, check_interval=1.0, sticky_for=5.0,
+                 max_sticky=100000, lag_sql=None, on_route=None):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.sticky_for = sticky_for
+        self.max_sticky = max_sticky
+        self.lag_sql = lag_sql
+        self.on_route = on_route        # called with (target, reason) for every read checkout
+
+        self._sticky = OrderedDict()    # user key -> monotonic time the stickiness ends, oldest first
+        self._next = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self._routes = {}
+
+    # ---------- routing ----------
+
+    def write(self):
+        """Check out a primary connection"""
+        return self.primary.acquire()
+
+    def read(self, user=None, pinned=False):
+        """Check out a connection for a read-only request by `user` (any hashable, or None)"""
+        if not self.replicas:
+            return self._route(self.primary, "primary", "no_replicas")
+        if pinned:
+            return self._route(self.primary, "primary", "pinned")
+        if user is not None and self.is_sticky(user):
+            return self._route(self.primary, "primary", "sticky")
+
+        for replica in self._candidates():
+            try:
+                conn = replica.pool.acquire()
+            except PoolTimeout:
+                continue                # saturated, not broken: try the next one
+            except PoolUnavailable as e:
+                self._mark_down(replica, e)
+                continue
+            self._count(replica.name, "replica")
+            return conn
+        return self._route(self.primary, "primary", "fallback")
+
+    def _candidates(self):
+        """Healthy replicas, round-robin"""
+        with self._lock:
+            healthy = [r for r in self.replicas if r.healthy]
+            if not healthy:
+                return []
+            start = self._next % len(healthy)
+            self._next += 1
+        return healthy[start:] + healthy[:start]
+
+    def _route(self, pool, target, reason):
+        conn = pool.acquire()
+        self._count(target, reason)
+        return conn
+
+    def _count(self, target, reason):
+        with self._lock:
+            key = f"{target}:{reason}"
+            self._routes[key] = self._routes.get(key, 0) + 1
+        if self.on_route is not None:
+            self.on_route(target, reason)
+
+    # ---------- read-your-writes ----------
+
+    def note_write(self, user):
+        """Pin `user`'s reads to the primary for the next sticky_for seconds"""
+        if user is None or not self.replicas:
+            return
+        until = time.monotonic() + self.sticky_for
+        with self._lock:
+            self._sticky[user] = until
+            self._sticky.move_to_end(user)
+            # Same window for everyone, so the front of the dict expires first
+            while self._sticky and (len(self._sticky) > self.max_sticky
+                                    or next(iter(self._sticky.values())) <= time.monotonic()):
+                self._sticky.popitem(last=False)
+
+    def is_sticky(self, user):
+        with self._lock:
+            until = self._sticky.get(user)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._sticky[user]
+                return False
+            return True
+
+    # ---------- health checks ----------
+
+    def start(self):
+        if self.replicas and self._thread is None:
+            self.check()
+            self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.check_interval):
+            self.check()
+
+    def check(self):
+        """Probe every replica once and update its state"""
+        for replica in self.replicas:
+            try:
+                if replica._probe_conn is None:
+                    replica._probe_conn = replica.connect()
+                    replica._probe_conn.autocommit = True   # every probe sees fresh data
+                lag = replica_lag(replica._probe_conn, self.lag_sql)
+                error = None if lag is not None else "replication not running"
+            except Exception as e:
+                lag, error = None, str(e)
+                self._close_probe(replica)
+            healthy = lag is not None and lag <= self.max_lag
+            if lag is not None and not healthy:
+                error = f"lag {lag:.1f}s exceeds {self.max_lag}s"
+            with self._lock:
+                if replica.healthy and not healthy:
+                    print(f"REPLICA {replica.name} OUT OF ROTATION: {error}")
+                elif healthy and not replica.healthy and replica.checked_at is not None:
+                    print(f"REPLICA {replica.name} BACK IN ROTATION")
+                replica.healthy = healthy
+                replica.lag = lag
+                replica.error = error
+                replica.checked_at = time.time()
+
+    def _mark_down(self, replica, e):
+        with self._lock:
+            if replica.healthy:
+                print(f"REPLICA {replica.name} OUT OF ROTATION: {e}")
+            replica.healthy = False
+            replica.error = str(e)
+
+    @staticmethod
+    def _close_probe(replica):
+        try:
+            if replica._probe_conn is not None:
+                replica._probe_conn.close()
+        except Exception:
+            pass
+        replica._probe_conn = None
+
+    def close(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.check_interval + 5)
+        for replica in self.replicas:
+            self._close_probe(replica)
+            replica.pool.close_all()
+
+    def stats(self):
+        with self._lock:
+            sticky = sum(1 for until in self._sticky.values() if until > time.monotonic())
+            routes = dict(sorted(self._routes.items()))
+            replicas = [
+                {
+                    "name": r.name,
+                    "healthy": r.healthy,
+                    "lag_s": r.lag,
+                    "error": r.error,
+                    "checked_at": r.checked_at,
+                }
+                for r in self.replicas
+            ]
+        for entry, replica in zip(replicas, self.replicas):
+            entry["pool"] = replica.pool.stats()
+        return {
+            "max_lag_s": self.max_lag,
+            "sticky_for_s": self.sticky_for,
+            "sticky_users": sticky,
+            "reads": routes,
+            "replicas": replicas,
+        }
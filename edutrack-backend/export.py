@@ -0,0 +1,59 @@
+import io
+import csv
+import json
+import zlib
+
+# Rows per chunk handed to the WSGI server
+CHUNK_ROWS = 500
+
+
+def iter_rows(cur, size=CHUNK_ROWS):
+    """Iterate an unbuffered cursor in fetchmany() batches"""
+    while True:
+        rows = cur.fetchmany(size)
+        if not rows:
+            return
+        yield from rows
+
+
+def csv_chunks(columns, rows, chunk_rows=CHUNK_ROWS):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    n = 0
+    for row in rows:
+        writer.writerow(row)
+        n += 1
+        if n % chunk_rows == 0:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def ndjson_chunks(columns, rows, chunk_rows=CHUNK_ROWS):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(columns, row)), default=str))
+        if len(lines) >= chunk_rows:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress a byte-chunk stream into one gzip member on the fly"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)   # wbits=31: gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+FORMATS = {
+    "csv": (csv_chunks, "text/csv; charset=utf-8", "csv"),
+    "ndjson": (ndjson_chunks, "application/x-ndjson", "ndjson"),
+}
@@ -0,0 +1,136 @@
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import bcrypt
+
+
+class HasherBusy(Exception):
+    """Raised when the hash queue is full or a hash takes too long"""
+
+
+def bcrypt_cost(hashed):
+    """Cost factor of a $2b$NN$... hash, or None if it can't be parsed"""
+    try:
+        return int(hashed.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded worker pool so request threads never burn CPU on it.
+
+    bcrypt releases the GIL while hashing, so plain threads give real
+    parallelism. Work beyond max_queue pending jobs is rejected immediately
+    instead of piling up behind a login storm.
+    """
+
+    def __init__(self, rounds=12, workers=None, max_queue=64, timeout=10.0, on_complete=None):
+        self.rounds = rounds
+        self.workers = workers or os.cpu_count() or 2
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.on_complete = on_complete    # called with (op, queue_wait, hash_time) in seconds
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+
+        self._pending = 0
+        self._max_pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._rehashed = 0
+        self._queue_wait_total = 0.0
+        self._hash_time_total = 0.0
+        self._hash_time_max = 0.0
+
+    def _submit(self, op, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_queue:
+                self._rejected += 1
+                raise HasherBusy("Password hashing queue is full")
+            self._pending += 1
+            if self._pending > self._max_pending:
+                self._max_pending = self._pending
+
+        submitted = time.monotonic()
+
+        def job():
+            started = time.monotonic()
+            try:
+                return fn(*args)
+            finally:
+                finished = time.monotonic()
+                with self._lock:
+                    self._pending -= 1
+                    self._completed += 1
+                    self._queue_wait_total += started - submitted
+                    self._hash_time_total += finished - started
+                    self._hash_time_max = max(self._hash_time_max, finished - started)
+                if self.on_complete is not None:
+                    self.on_complete(op, started - submitted, finished - started)
+
+        return self._executor.submit(job)
+
+    def _timed_out(self):
+        with self._lock:
+            self._timeouts += 1
+        return HasherBusy(f"Password hashing took longer than {self.timeout}s")
+
+    def _run(self, op, fn, *args):
+        future = self._submit(op, fn, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise self._timed_out()
+
+    async def _run_async(self, op, fn, *args):
+        future = asyncio.wrap_future(self._submit(op, fn, *args))
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            raise self._timed_out()
+
+    def hash(self, password):
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._run("hash", bcrypt.hashpw, password.encode("utf-8"), salt).decode("utf-8")
+
+    def verify(self, password, hashed):
+        return self._run("verify", bcrypt.checkpw, password.encode("utf-8"), hashed.encode("utf-8"))
+
+    async def hash_async(self, password):
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return (await self._run_async("hash", bcrypt.hashpw, password.encode("utf-8"), salt)).decode("utf-8")
+
+    async def verify_async(self, password, hashed):
+        return await self._run_async("verify", bcrypt.checkpw, password.encode("utf-8"), hashed.encode("utf-8"))
+
+    def needs_rehash(self, hashed):
+        return bcrypt_cost(hashed) != self.rounds
+
+    def record_rehash(self):
+        with self._lock:
+            self._rehashed += 1
+
+    def stats(self):
+        with self._lock:
+            done = self._completed
+            return {
+                "rounds": self.rounds,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self._pending,
+                "queue_depth_max": self._max_pending,
+                "completed": done,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+                "rehashed": self._rehashed,
+                "queue_wait_avg_ms": round(self._queue_wait_total * 1000 / done, 3) if done else 0.0,
+                "hash_time_avg_ms": round(self._hash_time_total * 1000 / done, 3) if done else 0.0,
+                "hash_time_max_ms": round(self._hash_time_max * 1000, 3),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,83 @@
+from catalog_cache import CatalogCache
+
+# kind -> lookup returning (key, *ids) rows; {} is filled with one %s per key
+LOOKUPS = {
+    "user": "SELECT email, id FROM users WHERE email IN ({})",
+    "course": "SELECT id, num FROM courses WHERE id IN ({})",
+    "lesson": "SELECT l.id, l.num, c.num FROM lessons l JOIN courses c ON c.id = l.course_id WHERE l.id IN ({})",
+}
+
+
+class KeyMap:
+    """In-process email/slug -> integer id map for the integer-keyed hot tables.
+
+    The API takes emails and slug ids; enrollments, lesson_completions,
+    quiz_results, course_progress and quiz_latest store users.id,
+    courses.num and lessons.num. Users map to their id, courses to their
+    num, lessons to (lesson num, course num). An id never changes for a
+    row, so entries only go stale when a course or lesson is deleted and
+    its slug reused: deletes served by this process forget() at once,
+    other processes catch up within the TTL.
+    """
+
+    def __init__(self, max_entries=100000, ttl=600.0, chunk_size=500):
+        self.chunk_size = chunk_size
+        self._cache = CatalogCache(max_entries=max_entries, ttl=ttl)
+
+    @staticmethod
+    def _key(kind, value):
+        # MySQL compares emails and slugs case-insensitively; so do we
+        return (kind, value.lower())
+
+    def peek(self, kind, value):
+        """Cached id or None, without touching the database"""
+        if not isinstance(value, str) or not value:
+            return None
+        return self._cache.peek(self._key(kind, value))
+
+    def remember(self, kind, rows):
+        """Store lookup rows, returning {lowercased key: id}"""
+        found = {}
+        for key, *ids in rows:
+            value = ids[0] if len(ids) == 1 else tuple(ids)
+            self._cache.put(self._key(kind, key), value)
+            found[key.lower()] = value
+        return found
+
+    def lookup_sql(self, kind, count):
+        return LOOKUPS[kind].format(", ".join(["%s"] * count))
+
+    def resolve(self, conn, kind, values):
+        """{lowercased value: id} for the values that exist; one query per chunk of misses"""
+        found, missing = {}, set()
+        for value in values:
+            cached = self.peek(kind, value)
+            if cached is not None:
+                found[value.lower()] = cached
+            elif isinstance(value, str) and value:
+                missing.add(value.lower())
+        if missing:
+            cur = conn.cursor()
+            missing = sorted(missing)
+            for i in range(0, len(missing), self.chunk_size):
+                chunk = missing[i:i + self.chunk_size]
+                cur.execute(self.lookup_sql(kind, len(chunk)), chunk)
+                found.update(self.remember(kind, cur.fetchall()))
+            cur.close()
+        return found
+
+    def get(self, conn, kind, value):
+        """Id for one email/slug, or None if there is no such row"""
+        if not isinstance(value, str) or not value:
+            return None
+        return self.resolve(conn, kind, (value,)).get(value.lower())
+
+    def forget(self, kind, value=None):
+        """Drop one mapping, or every mapping of a kind"""
+        if value is None:
+            self._cache.invalidate_prefix((kind,))
+        else:
+            self._cache.invalidate(self._key(kind, value))
+
+    def stats(self):
+        return self._cache.stats()
@@ -0,0 +1,549 @@
+"""HTTP load test for the EduTrack API.
+
+Simulated users log in, then loop over a weighted mix of operations until the
+duration is up. Results (req/s, p50/p95/p99 per operation) are printed and saved
+as JSON under loadtest_results/ so runs can be compared across commits.
+
+    python loadtest.py --mix class_start --concurrency 200 --duration 60
+    python loadtest.py --mix exam --accounts seed --students 5000
+    python loadtest.py --compare loadtest_results/old.json loadtest_results/new.json
+
+Point --base-url at any running instance (app.py, the gunicorn launcher or
+asgi_app.py). With --accounts seed it uses the users created by seed_data.py;
+the default "sample" accounts come from schema.sql.
+
+Bulk, unenroll and lesson-delete operations only touch a scratch course that
+setup creates and teardown deletes (with everything that cascades from it), so
+repeated runs start from the same data.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import subprocess
+from datetime import datetime
+from urllib.parse import urlsplit, quote
+
+SEED_DOMAIN = "seed.edutrack.test"
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "loadtest_results")
+
+# Operation weights per mix; "full" covers every API route except the live event streams, the
+# diagnostics endpoints and the platform-wide gradebook export
+MIXES = {
+    "browse": {
+        "catalog": 25, "catalog_filtered": 10, "search": 10, "course_detail": 25, "my_enrollments": 10,
+        "dashboard": 10, "me": 5, "ping": 5,
+    },
+    "class_start": {
+        "login": 35, "dashboard": 30, "me": 5, "course_detail": 10, "progress_get": 5,
+        "completed_lessons": 5, "my_enrollments": 5, "catalog": 5,
+    },
+    "study": {
+        "course_detail": 15, "complete_lesson": 20, "completed_lessons": 15, "progress_post": 20,
+        "progress_get": 15, "dashboard": 10, "enroll": 5,
+    },
+    "exam": {
+        "quiz_grade": 45, "quiz_result": 25, "course_detail": 10, "dashboard": 10, "quiz_analytics": 5,
+        "login": 5,
+    },
+    "full": {
+        "ping": 2, "login": 5, "register": 1, "me": 3, "logout": 1, "catalog": 8, "catalog_filtered": 4,
+        "search": 3, "course_detail": 10, "enroll": 4, "my_enrollments": 4, "progress_post": 6, "progress_get": 6,
+        "complete_lesson": 6, "completed_lessons": 5, "quiz_grade": 7, "quiz_result": 5,
+        "quiz_analytics": 2, "dashboard": 8, "quiz_questions": 2, "author_course": 1, "users_page": 2,
+        "export_course": 1, "bulk_enroll": 1, "unenroll": 1, "bulk_complete": 1, "delete_lesson": 1,
+        "admin_stats": 1,
+    },
+}
+
+# Statuses that are a correct answer rather than a failure for that operation
+EXPECTED = {
+    "register": {200, 409},
+    "enroll": {201, 409},
+    "course_detail": {200, 304},
+    "complete_lesson": {200, 201},
+    "quiz_grade": {201, 409},
+}
+
+
+# =============== HTTP CLIENT ===============
+
+async def request(reader, writer, host, method, path, body=None, headers=None):
+    """One HTTP/1.1 keep-alive request; returns (status, headers, body bytes)"""
+    payload = json.dumps(body).encode() if body is not None else b""
+    head = f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n"
+    for name, value in (headers or {}).items():
+        head += f"{name}: {value}\r\n"
+    if body is not None:
+        head += "Content-Type: application/json\r\n"
+    if body is not None or method in ("POST", "PUT", "DELETE"):
+        head += f"Content-Length: {len(payload)}\r\n"
+    writer.write(head.encode() + b"\r\n" + payload)
+    await writer.drain()
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("server closed the connection")
+    status = int(status_line.split()[1])
+    response_headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        response_headers[name.strip().lower()] = value.strip()
+
+    if "chunked" in response_headers.get("transfer-encoding", "").lower():
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            chunks.append(await reader.readexactly(size + 2))
+            if size == 0:
+                break
+        data = b"".join(c[:-2] for c in chunks)
+    elif "content-length" in response_headers:
+        data = await reader.readexactly(int(response_headers["content-length"]))
+    elif status in (204, 304):
+        data = b""
+    else:
+        # No length and not chunked: the body runs until the server closes the connection
+        data = await reader.read()
+        response_headers["connection"] = "close"
+    return status, response_headers, data
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def summarize(latencies):
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+    }
+
+
+# =============== SIMULATED USER ===============
+
+class User:
+    """One keep-alive connection and one student identity, plus what it learned about the catalog"""
+
+    def __init__(self, run, index):
+        self.run = run
+        self.rng = random.Random(run.args.seed * 100003 + index)
+        self.email = run.student(index)
+        self.token = None
+        self.etags = {}
+        self.reader = self.writer = None
+
+    async def connect(self):
+        self.close()
+        self.reader, self.writer = await asyncio.open_connection(self.run.host, self.run.port)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    async def call(self, method, path, body=None, headers=None, token=None):
+        if token:
+            headers = dict(headers or {}, Authorization=f"Bearer {token}")
+        response = await request(self.reader, self.writer, self.run.netloc, method, path, body, headers)
+        if response[1].get("connection", "").lower() == "close":
+            await self.connect()
+        return response
+
+    def course(self):
+        return self.run.pick_course(self.rng)
+
+    # ---------- operations: each returns the HTTP status ----------
+
+    async def op_ping(self):
+        return (await self.call("GET", "/api/ping"))[0]
+
+    async def op_login(self):
+        status, _, data = await self.call("POST", "/api/auth/login", {
+            "email": self.email, "password": self.run.args.password, "role": "student",
+        })
+        if status == 200:
+            self.token = json.loads(data)["token"]
+        return status
+
+    async def op_register(self):
+        n = self.rng.randrange(10 ** 9)
+        return (await self.call("POST", "/api/auth/register", {
+            "name": "Load Test", "email": f"lt{n}@{SEED_DOMAIN}", "password": self.run.args.password,
+            "role": "student",
+        }))[0]
+
+    async def op_me(self):
+        return (await self.call("GET", "/api/auth/me", token=self.token))[0]
+
+    async def op_logout(self):
+        status = (await self.call("POST", "/api/auth/logout", token=self.token))[0]
+        await self.op_login()
+        return status
+
+    async def op_catalog(self):
+        return (await self.call("GET", "/api/courses?limit=50"))[0]
+
+    async def op_catalog_filtered(self):
+        level = self.rng.choice(("Beginner", "Intermediate", "Advanced"))
+        return (await self.call("GET", f"/api/courses?limit=20&level={level}"))[0]
+
+    async def op_search(self):
+        # First word of a known title, cut to a prefix as if still typing
+        word = (self.course()["title"].split() or ["python"])[0].lower()
+        prefix = word[:self.rng.randint(min(2, len(word)), len(word))]
+        return (await self.call("GET", f"/api/courses/search?q={quote(prefix)}&limit=10"))[0]
+
+    async def op_course_detail(self):
+        course = self.course()
+        headers = {"If-None-Match": self.etags[course["id"]]} if course["id"] in self.etags else None
+        status, resp_headers, _ = await self.call("GET", f"/api/courses/{quote(course['id'])}", headers=headers)
+        if "etag" in resp_headers:
+            self.etags[course["id"]] = resp_headers["etag"]
+        return status
+
+    async def op_enroll(self):
+        return (await self.call("POST", "/api/enrollments", {
+            "student_email": self.email, "course_id": self.course()["id"],
+        }))[0]
+
+    async def op_my_enrollments(self):
+        return (await self.call("GET", f"/api/enrollments/{quote(self.email)}"))[0]
+
+    async def op_progress_post(self):
+        return (await self.call("POST", "/api/progress", {
+            "student_email": self.email, "course_id": self.course()["id"], "progress": self.rng.randint(0, 100),
+        }))[0]
+
+    async def op_progress_get(self):
+        return (await self.call("GET", f"/api/progress/{quote(self.email)}/{quote(self.course()['id'])}"))[0]
+
+    async def op_complete_lesson(self):
+        course = self.course()
+        if not course["lessons"]:
+            return await self.op_progress_get()
+        return (await self.call("POST", "/api/lessons/complete", {
+            "student_email": self.email, "course_id": course["id"], "lesson_id": self.rng.choice(course["lessons"]),
+        }))[0]
+
+    async def op_completed_lessons(self):
+        return (await self.call("GET", f"/api/lessons/completed/{quote(self.email)}/{quote(self.course()['id'])}"))[0]
+
+    async def op_quiz_grade(self):
+        course = self.run.pick_course(self.rng, with_quiz=True)
+        if course is None:
+            return await self.op_quiz_result()
+        return (await self.call("POST", "/api/quiz/grade", {
+            "course_id": course["id"], "version": course["version"],
+            "answers": [self.rng.randint(0, 3) for _ in range(course["questions"])],
+        }, token=self.token))[0]
+
+    async def op_quiz_result(self):
+        return (await self.call("GET", f"/api/quiz/result/{quote(self.email)}/{quote(self.course()['id'])}"))[0]
+
+    async def op_quiz_analytics(self):
+        return (await self.call("GET", f"/api/quiz/analytics/{quote(self.course()['id'])}"))[0]
+
+    async def op_dashboard(self):
+        return (await self.call("GET", f"/api/dashboard/{quote(self.email)}"))[0]
+
+    async def op_quiz_questions(self):
+        return (await self.call("GET", f"/api/quiz/questions/{quote(self.course()['id'])}",
+                                token=self.run.teacher_token))[0]
+
+    async def op_author_course(self):
+        """Create a course with a lesson and a question, then delete it (cascades)"""
+        course_id = f"lt-{self.rng.randrange(10 ** 9)}"
+        status = (await self.call("POST", "/api/courses", {
+            "id": course_id, "title": "Load test course", "description": "temporary", "level": "Beginner",
+            "created_by": self.run.teacher_email,
+        }))[0]
+        if status >= 400:
+            return status
+        await self.call("POST", "/api/lessons", {
+            "id": f"{course_id}-l1", "course_id": course_id, "title": "Lesson", "url": "", "position": 1,
+        })
+        await self.call("POST", "/api/quiz/questions", {
+            "course_id": course_id, "question": "Q?", "options": ["a", "b", "c", "d"], "correct_answer": 0,
+        }, token=self.run.teacher_token)
+        return (await self.call("DELETE", f"/api/courses/{course_id}"))[0]
+
+    async def op_bulk_enroll(self):
+        students = {self.email} | {self.run.student(self.rng.randrange(self.run.args.students)) for _ in range(4)}
+        return (await self.call("POST", "/api/enrollments/bulk", {
+            "items": [{"student_email": email, "course_id": self.run.scratch_id} for email in sorted(students)],
+        }))[0]
+
+    async def op_unenroll(self):
+        return (await self.call("DELETE", "/api/enrollments", {
+            "student_email": self.email, "course_id": self.run.scratch_id,
+        }))[0]
+
+    async def op_bulk_complete(self):
+        return (await self.call("POST", "/api/lessons/complete/bulk", {
+            "items": [{"student_email": self.email, "course_id": self.run.scratch_id, "lesson_id": lesson_id}
+                      for lesson_id in self.run.scratch_lessons],
+        }))[0]
+
+    async def op_delete_lesson(self):
+        """Add a lesson to the scratch course, then delete it"""
+        lesson_id = f"{self.run.scratch_id}-t{self.rng.randrange(10 ** 9)}"
+        status = (await self.call("POST", "/api/lessons", {
+            "id": lesson_id, "course_id": self.run.scratch_id, "title": "Temporary lesson", "url": "", "position": 99,
+        }))[0]
+        if status >= 400:
+            return status
+        return (await self.call("DELETE", f"/api/lessons/{quote(lesson_id)}"))[0]
+
+    async def op_users_page(self):
+        return (await self.call("GET", "/api/users?limit=50&role=student"))[0]
+
+    async def op_admin_stats(self):
+        return (await self.call("GET", "/api/admin/stats"))[0]
+
+    async def op_export_course(self):
+        return (await self.call("GET", f"/api/courses/{quote(self.course()['id'])}/export?format=ndjson",
+                                token=self.run.teacher_token))[0]
+
+    async def loop(self, deadline, mix):
+        names, weights = zip(*mix.items())
+        await self.connect()
+        await self.op_login()
+        try:
+            while time.monotonic() < deadline:
+                name = self.rng.choices(names, weights)[0]
+                started = time.perf_counter()
+                try:
+                    status = await getattr(self, f"op_{name}")()
+                except (ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+                    self.run.record(name, time.perf_counter() - started, None, str(e))
+                    await self.connect()
+                    continue
+                self.run.record(name, time.perf_counter() - started, status)
+        finally:
+            self.close()
+
+
+# =============== RUN ===============
+
+class Run:
+    def __init__(self, args):
+        self.args = args
+        parts = urlsplit(args.base_url)
+        self.host, self.port, self.netloc = parts.hostname, parts.port or 80, parts.netloc
+        self.courses = []
+        self.quiz_courses = []
+        self.cum_weights = []
+        self.teacher_email = "teacher1@gmail.com" if args.accounts == "sample" else f"teacher1@{SEED_DOMAIN}"
+        self.teacher_token = None
+        self.scratch_id = f"lt-scratch-{args.seed}"
+        self.scratch_lessons = [f"{self.scratch_id}-l{i}" for i in range(1, 6)]
+        self.latencies = {}
+        self.statuses = {}
+        self.errors = {}
+
+    def student(self, index):
+        if self.args.accounts == "sample":
+            return "student@gmail.com"
+        return f"student{index % self.args.students + 1}@{SEED_DOMAIN}"
+
+    def pick_course(self, rng, with_quiz=False):
+        pool = self.quiz_courses if with_quiz else self.courses
+        if not pool:
+            return None
+        # Earlier catalog entries get more traffic, like the skewed seed data
+        return pool[min(len(pool) - 1, int(rng.paretovariate(1.2)) - 1)]
+
+    def record(self, name, seconds, status, error=None):
+        self.latencies.setdefault(name, []).append(seconds)
+        if status is not None:
+            self.statuses.setdefault(name, {}).setdefault(status, 0)
+            self.statuses[name][status] += 1
+        ok = status in EXPECTED[name] if name in EXPECTED else status is not None and status < 400
+        if error is not None or not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    async def setup(self):
+        """Learn course ids, lesson ids and quiz shapes, and log in a teacher"""
+        user = User(self, 0)
+        await user.connect()
+        status, _, data = await user.call("GET", f"/api/courses?limit={self.args.courses}")
+        if status != 200:
+            raise SystemExit(f"GET /api/courses failed with {status}; is the server running at {self.args.base_url}?")
+        for item in json.loads(data)["items"]:
+            status, _, data = await user.call("GET", f"/api/courses/{quote(item['id'])}")
+            if status != 200:
+                continue
+            detail = json.loads(data)
+            course = {
+                "id": detail["id"],
+                "title": detail.get("title") or "",
+                "lessons": [l["id"] for l in detail.get("lessons", [])],
+                "questions": len(detail.get("quiz", [])),
+                "version": detail.get("content_version"),
+            }
+            self.courses.append(course)
+            if course["questions"]:
+                self.quiz_courses.append(course)
+
+        status, _, data = await user.call("POST", "/api/auth/login", {
+            "email": self.teacher_email, "password": self.args.password, "role": "teacher",
+        })
+        if status == 200:
+            self.teacher_token = json.loads(data)["token"]
+        if not self.courses:
+            user.close()
+            raise SystemExit("No courses found; load some data first (schema.sql or seed_data.py)")
+
+        # A run killed before its teardown leaves the scratch course behind; start from a fresh one
+        await user.call("DELETE", f"/api/courses/{self.scratch_id}")
+        status = (await user.call("POST", "/api/courses", {
+            "id": self.scratch_id, "title": "Load test scratch course", "description": "temporary",
+            "level": "Beginner", "created_by": self.teacher_email,
+        }))[0]
+        for position, lesson_id in enumerate(self.scratch_lessons, 1):
+            await user.call("POST", "/api/lessons", {
+                "id": lesson_id, "course_id": self.scratch_id, "title": f"Lesson {position}", "url": "",
+                "position": position,
+            })
+        user.close()
+        if status >= 400:
+            raise SystemExit(f"Creating the scratch course failed with {status}")
+
+    async def teardown(self):
+        """Delete the scratch course; its enrollments and completions cascade with it"""
+        user = User(self, 0)
+        await user.connect()
+        try:
+            await user.call("DELETE", f"/api/courses/{self.scratch_id}")
+        finally:
+            user.close()
+
+    async def execute(self):
+        await self.setup()
+        mix = MIXES[self.args.mix]
+        started = time.monotonic()
+        deadline = started + self.args.duration
+        users = [User(self, i) for i in range(self.args.concurrency)]
+        try:
+            await asyncio.gather(*(u.loop(deadline, mix) for u in users))
+        finally:
+            elapsed = time.monotonic() - started
+            await self.teardown()
+        return elapsed
+
+    def results(self, elapsed):
+        every = [t for ts in self.latencies.values() for t in ts]
+        total = len(every)
+        return {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "host": platform.node(),
+            "config": {k: v for k, v in vars(self.args).items() if k not in ("compare", "password")},
+            "courses_seen": len(self.courses),
+            "elapsed_s": round(elapsed, 2),
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "rps": round(total / elapsed, 1) if elapsed else 0.0,
+            **{k: v for k, v in summarize(every).items() if k != "count"},
+            "operations": {
+                name: {
+                    **summarize(ts),
+                    "rps": round(len(ts) / elapsed, 1) if elapsed else 0.0,
+                    "errors": self.errors.get(name, 0),
+                    "statuses": {str(s): n for s, n in sorted(self.statuses.get(name, {}).items())},
+                }
+                for name, ts in sorted(self.latencies.items())
+            },
+        }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_results(r):
+    print(f"\n=== {r['config']['mix']} mix: {r['config']['concurrency']} users, {r['elapsed_s']}s, commit {r['commit']} ===")
+    print(f"requests={r['requests']} errors={r['errors']} rps={r['rps']} "
+          f"p50={r['p50_ms']}ms p95={r['p95_ms']}ms p99={r['p99_ms']}ms")
+    print(f"\n{'operation':<20}{'count':>8}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'errors':>8}  statuses")
+    for name, op in r["operations"].items():
+        statuses = " ".join(f"{s}:{n}" for s, n in op["statuses"].items())
+        print(f"{name:<20}{op['count']:>8}{op['rps']:>9}{op['p50_ms']:>9}{op['p95_ms']:>9}{op['p99_ms']:>9}"
+              f"{op['errors']:>8}  {statuses}")
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    def delta(a, b):
+        return f"{(b - a) / a * 100:+.1f}%" if a else "n/a"
+
+    print(f"\n{old_path} ({old['commit']})  ->  {new_path} ({new['commit']})")
+    for key in ("rps", "p50_ms", "p95_ms", "p99_ms", "errors"):
+        print(f"  {key:<8}{old[key]:>10} -> {new[key]:<10} {delta(old[key], new[key])}")
+    print(f"\n{'operation':<20}{'p95 old':>10}{'p95 new':>10}{'change':>10}")
+    for name in sorted(set(old["operations"]) | set(new["operations"])):
+        a = old["operations"].get(name, {}).get("p95_ms")
+        b = new["operations"].get(name, {}).get("p95_ms")
+        print(f"{name:<20}{a if a is not None else '-':>10}{b if b is not None else '-':>10}"
+              f"{delta(a, b) if a and b is not None else '':>10}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the EduTrack API")
+    parser.add_argument("--base-url", default="http://127.0.0.1:4000")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="full")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--accounts", choices=("sample", "seed"), default="sample")
+    parser.add_argument("--students", type=int, default=1000, help="seeded students to spread users over")
+    parser.add_argument("--courses", type=int, default=200, help="catalog entries to discover during setup")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="results file (default loadtest_results/<time>-<mix>-<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two saved results and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare)
+
+    run = Run(args)
+    elapsed = asyncio.run(run.execute())
+    results = run.results(elapsed)
+    print_results(results)
+
+    path = args.output
+    if not path:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(RESULTS_DIR, f"{stamp}-{args.mix}-{results['commit'] or 'nogit'}.json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
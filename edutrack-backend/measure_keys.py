@@ -0,0 +1,256 @@
+"""Index size and hot-query latency for the enrollment/progress/quiz tables.
+
+Detects whether the hot tables are still keyed by email/slug (before
+migration 0008) or by integer ids, then reports per-table and per-index
+sizes and p50/p95/p99 latency for the queries the API runs most. Writes
+are timed inside a transaction that is rolled back.
+
+    python measure_keys.py --save                  # before: run on the migrated-to-7 database
+    python migrate.py && python measure_keys.py --save
+    python measure_keys.py --compare measure_results/old.json measure_results/new.json
+
+Sizes come from InnoDB's persistent statistics, refreshed with ANALYZE
+TABLE, so run both sides against the same data (e.g. a seed_data.py load).
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from datetime import datetime
+
+import mysql.connector
+
+from loadtest import summarize, git_commit
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "measure_results")
+
+HOT_TABLES = ["enrollments", "lesson_completions", "quiz_results", "course_progress", "quiz_latest"]
+
+# One random enrollment per sample supplies the parameters
+SAMPLE_SQL = {
+    "string": "SELECT student_email AS student, course_id AS course FROM enrollments WHERE id >= %s ORDER BY id LIMIT 1",
+    "int": "SELECT student_id AS student, course_num AS course FROM enrollments WHERE id >= %s ORDER BY id LIMIT 1",
+}
+
+# name -> (is_write, SQL) per key layout; same result shape on both sides
+QUERIES = {
+    "string": {
+        "dashboard_courses": (False, """
+            SELECT c.id, c.title FROM enrollments e JOIN courses c ON c.id = e.course_id
+            WHERE e.student_email = %(student)s"""),
+        "completed_lessons": (False, """
+            SELECT lesson_id FROM lesson_completions
+            WHERE student_email = %(student)s AND course_id = %(course)s"""),
+        "quiz_history": (False, """
+            SELECT score, total, submitted_at FROM quiz_results
+            WHERE student_email = %(student)s AND course_id = %(course)s
+            ORDER BY submitted_at DESC LIMIT 10"""),
+        "gradebook": (False, """
+            SELECT u.name, u.email, p.progress, q.best_score, q.best_total
+            FROM enrollments e
+            JOIN users u ON u.email = e.student_email
+            LEFT JOIN course_progress p ON p.student_email = e.student_email AND p.course_id = e.course_id
+            LEFT JOIN quiz_latest q ON q.student_email = e.student_email AND q.course_id = e.course_id
+            WHERE e.course_id = %(course)s"""),
+        "progress_upsert": (True, """
+            INSERT INTO course_progress (student_email, course_id, progress) VALUES (%(student)s, %(course)s, 50)
+            ON DUPLICATE KEY UPDATE progress = VALUES(progress)"""),
+        "quiz_insert": (True, """
+            INSERT INTO quiz_results (student_email, course_id, score, total)
+            VALUES (%(student)s, %(course)s, 3, 5)"""),
+    },
+    "int": {
+        "dashboard_courses": (False, """
+            SELECT c.id, c.title FROM enrollments e JOIN courses c ON c.num = e.course_num
+            WHERE e.student_id = %(student)s"""),
+        "completed_lessons": (False, """
+            SELECT l.id FROM lesson_completions lc JOIN lessons l ON l.num = lc.lesson_num
+            WHERE lc.student_id = %(student)s AND lc.course_num = %(course)s"""),
+        "quiz_history": (False, """
+            SELECT score, total, submitted_at FROM quiz_results
+            WHERE student_id = %(student)s AND course_num = %(course)s
+            ORDER BY submitted_at DESC LIMIT 10"""),
+        "gradebook": (False, """
+            SELECT u.name, u.email, p.progress, q.best_score, q.best_total
+            FROM enrollments e
+            JOIN users u ON u.id = e.student_id
+            LEFT JOIN course_progress p ON p.student_id = e.student_id AND p.course_num = e.course_num
+            LEFT JOIN quiz_latest q ON q.student_id = e.student_id AND q.course_num = e.course_num
+            WHERE e.course_num = %(course)s"""),
+        "progress_upsert": (True, """
+            INSERT INTO course_progress (student_id, course_num, progress) VALUES (%(student)s, %(course)s, 50)
+            ON DUPLICATE KEY UPDATE progress = VALUES(progress)"""),
+        "quiz_insert": (True, """
+            INSERT INTO quiz_results (student_id, course_num, score, total)
+            VALUES (%(student)s, %(course)s, 3, 5)"""),
+    },
+}
+
+
+def connect():
+    return mysql.connector.connect(
+        host='localhost',
+        user='root',
+        password='040506',
+        database='edutrack_lms'
+    )
+
+
+def key_layout(cur):
+    """'string' while enrollments still has student_email, 'int' after the contract migration"""
+    cur.execute("""
+        SELECT COUNT(*) FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = 'enrollments' AND column_name = 'student_email'
+    """)
+    return "string" if cur.fetchone()[0] else "int"
+
+
+def sizes(cur):
+    """{table: {rows, data_bytes, index_bytes, indexes: {name: bytes}}}"""
+    for table in HOT_TABLES:
+        cur.execute(f"ANALYZE TABLE {table}")
+        cur.fetchall()
+    marks = ", ".join(["%s"] * len(HOT_TABLES))
+    cur.execute(f"""
+        SELECT table_name, table_rows, data_length, index_length FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name IN ({marks})
+    """, HOT_TABLES)
+    result = {
+        name: {"rows": int(rows or 0), "data_bytes": int(data or 0), "index_bytes": int(index or 0), "indexes": {}}
+        for name, rows, data, index in cur.fetchall()
+    }
+    cur.execute(f"""
+        SELECT table_name, index_name, stat_value * @@innodb_page_size FROM mysql.innodb_index_stats
+        WHERE database_name = DATABASE() AND stat_name = 'size' AND table_name IN ({marks})
+        ORDER BY table_name, index_name
+    """, HOT_TABLES)
+    for table, index, size in cur.fetchall():
+        result[table]["indexes"][index] = int(size)
+    return result
+
+
+def samples(cur, layout, count, rng):
+    cur.execute("SELECT MIN(id), MAX(id) FROM enrollments")
+    low, high = cur.fetchone()
+    if low is None:
+        return []
+    found = []
+    for _ in range(count):
+        cur.execute(SAMPLE_SQL[layout], (rng.randint(low, high),))
+        row = cur.fetchone()
+        if row:
+            found.append({"student": row[0], "course": row[1]})
+    return found
+
+
+def time_queries(conn, layout, params, rounds):
+    latencies = {name: [] for name in QUERIES[layout]}
+    cur = conn.cursor()
+    for _ in range(rounds):
+        for p in params:
+            for name, (is_write, sql) in QUERIES[layout].items():
+                if is_write:
+                    conn.start_transaction()
+                started = time.perf_counter()
+                cur.execute(sql, p)
+                if cur.with_rows:
+                    cur.fetchall()
+                latencies[name].append(time.perf_counter() - started)
+                if is_write:
+                    conn.rollback()
+    cur.close()
+    return {name: summarize(ts) for name, ts in latencies.items()}
+
+
+def mb(n):
+    return round(n / 1048576, 1)
+
+
+def print_results(r):
+    print(f"\n=== {r['layout']} keys, commit {r['commit']} ===")
+    print(f"\n{'table / index':<44}{'rows':>12}{'data MB':>10}{'index MB':>10}")
+    for table, t in r["tables"].items():
+        print(f"{table:<44}{t['rows']:>12}{mb(t['data_bytes']):>10}{mb(t['index_bytes']):>10}")
+        for index, size in t["indexes"].items():
+            print(f"  {index:<42}{'':>12}{'':>10}{mb(size):>10}")
+    print(f"\n{'query':<20}{'count':>8}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for name, q in r["queries"].items():
+        print(f"{name:<20}{q['count']:>8}{q['p50_ms']:>9}{q['p95_ms']:>9}{q['p99_ms']:>9}")
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    def delta(a, b):
+        return f"{(b - a) / a * 100:+.1f}%" if a else "n/a"
+
+    print(f"\n{old_path} ({old['layout']}, {old['commit']})  ->  {new_path} ({new['layout']}, {new['commit']})")
+    print(f"\n{'table':<20}{'index MB old':>14}{'index MB new':>14}{'change':>10}{'data MB old':>13}{'data MB new':>13}")
+    for table in sorted(set(old["tables"]) | set(new["tables"])):
+        a = old["tables"].get(table, {})
+        b = new["tables"].get(table, {})
+        ai, bi = a.get("index_bytes", 0), b.get("index_bytes", 0)
+        print(f"{table:<20}{mb(ai):>14}{mb(bi):>14}{delta(ai, bi):>10}"
+              f"{mb(a.get('data_bytes', 0)):>13}{mb(b.get('data_bytes', 0)):>13}")
+    print(f"\n{'query':<20}{'p50 old':>10}{'p50 new':>10}{'p95 old':>10}{'p95 new':>10}{'change':>10}")
+    for name in sorted(set(old["queries"]) | set(new["queries"])):
+        a = old["queries"].get(name, {})
+        b = new["queries"].get(name, {})
+        p95 = delta(a["p95_ms"], b["p95_ms"]) if a and b else ""
+        print(f"{name:<20}{a.get('p50_ms', '-'):>10}{b.get('p50_ms', '-'):>10}"
+              f"{a.get('p95_ms', '-'):>10}{b.get('p95_ms', '-'):>10}{p95:>10}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure hot-table index sizes and query latency")
+    parser.add_argument("--samples", type=int, default=200, help="random enrollments to query with")
+    parser.add_argument("--rounds", type=int, default=5, help="passes over the samples")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", action="store_true", help="write the results under measure_results/")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two saved results and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare)
+
+    conn = connect()
+    cur = conn.cursor()
+    layout = key_layout(cur)
+    tables = sizes(cur)
+    params = samples(cur, layout, args.samples, random.Random(args.seed))
+    cur.close()
+    if not params:
+        print("enrollments is empty; load data first (python seed_data.py)")
+        conn.close()
+        return 1
+
+    results = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "layout": layout,
+        "samples": len(params),
+        "rounds": args.rounds,
+        "tables": tables,
+        "queries": time_queries(conn, layout, params, args.rounds),
+    }
+    conn.close()
+    print_results(results)
+
+    if args.save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(RESULTS_DIR, f"{stamp}-{layout}-{results['commit'] or 'nogit'}.json")
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
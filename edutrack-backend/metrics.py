@@ -0,0 +1,209 @@
+import bisect
+import threading
+import time
+import weakref
+
+# Default latency buckets in seconds (Prometheus client defaults plus a finer low end)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+
+class _Shard:
+    """One thread's private counters; only its owner writes, so no lock is needed"""
+
+    __slots__ = ("histograms", "counters")
+
+    def __init__(self):
+        self.histograms = {}   # (name, labels) -> [bucket counts..., sum]
+        self.counters = {}     # (name, labels) -> value
+
+    def fold(self, other):
+        """Add other's counts into this shard"""
+        # list() snapshots the dict in one C call, so concurrent inserts can't break iteration
+        for key, series in list(other.histograms.items()):
+            total = self.histograms.setdefault(key, [0] * len(series))
+            for i, v in enumerate(list(series)):
+                total[i] += v
+        for key, value in list(other.counters.items()):
+            self.counters[key] = self.counters.get(key, 0) + value
+
+
+class _Owner:
+    """Lives in a thread's locals; collected when the thread exits, which retires its shard"""
+
+    __slots__ = ("__weakref__",)
+
+
+class Metrics:
+    """Process-local histograms and counters rendered in Prometheus text format.
+
+    Each thread records into its own shard, so the hot path is a dict lookup
+    and a couple of additions. The registry lock is only taken when a thread
+    records for the first time, when it exits and when rendering. An exited
+    thread's counts are folded into one retired shard, so servers that start
+    a thread per request don't accumulate shards.
+    """
+
+    def __init__(self, prefix="edutrack"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards = set()
+        self._retired = _Shard()
+        self._meta = {}        # name -> (type, help, buckets)
+        self._gauges = []      # callables returning [(name, help, labels, value)]
+        self.histogram("db_query_duration_seconds", "Duration of every DB statement")
+
+    # ---------- registration ----------
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        self._meta[name] = ("histogram", help, tuple(buckets))
+
+    def counter(self, name, help):
+        self._meta[name] = ("counter", help, None)
+
+    def gauges(self, collect):
+        """Register a callable returning [(name, help, labels, value)], evaluated on render"""
+        self._gauges.append(collect)
+
+    # ---------- recording ----------
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            owner = self._local.owner = _Owner()
+            with self._lock:
+                self._shards.add(shard)
+            weakref.finalize(owner, self._retire, shard)
+        return shard
+
+    def _retire(self, shard):
+        with self._lock:
+            self._shards.discard(shard)
+            self._retired.fold(shard)
+
+    def observe(self, name, value, labels=()):
+        hist = self._shard().histograms
+        series = hist.get((name, labels))
+        if series is None:
+            series = hist[(name, labels)] = [0] * (len(self._meta[name][2]) + 2)
+        series[bisect.bisect_left(self._meta[name][2], value)] += 1
+        series[-1] += value
+
+    def inc(self, name, labels=(), amount=1):
+        counters = self._shard().counters
+        counters[(name, labels)] = counters.get((name, labels), 0) + amount
+
+    # ---------- per-request DB accounting ----------
+
+    def begin_request(self):
+        local = self._local
+        local.started = time.perf_counter()
+        local.db_queries = 0
+        local.db_time = 0.0
+
+    def end_request(self):
+        """(elapsed, db_queries, db_time) for the current request, or None outside one"""
+        local = self._local
+        started = getattr(local, "started", None)
+        if started is None:
+            return None
+        local.started = None
+        return time.perf_counter() - started, local.db_queries, local.db_time
+
+    def record_query(self, seconds):
+        local = self._local
+        if getattr(local, "started", None) is not None:
+            local.db_queries += 1
+            local.db_time += seconds
+        self.observe("db_query_duration_seconds", seconds)
+
+    # ---------- exposition ----------
+
+    def _merged(self):
+        # Under the lock so a thread retiring mid-scrape is counted exactly once
+        merged = _Shard()
+        with self._lock:
+            merged.fold(self._retired)
+            for shard in self._shards:
+                merged.fold(shard)
+        return merged.histograms, merged.counters
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ""
+        escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+    def render(self):
+        histograms, counters = self._merged()
+        lines = []
+        for name, (kind, help, buckets) in self._meta.items():
+            full = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {full} {help}")
+            lines.append(f"# TYPE {full} {kind}")
+            if kind == "histogram":
+                for (series_name, labels), series in sorted(histograms.items()):
+                    if series_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, n in zip(buckets + ("+Inf",), series):
+                        cumulative += n
+                        lines.append(f"{full}_bucket{self._labels(labels, [('le', bound)])} {cumulative}")
+                    lines.append(f"{full}_sum{self._labels(labels)} {series[-1]:.6f}")
+                    lines.append(f"{full}_count{self._labels(labels)} {cumulative}")
+            else:
+                for (series_name, labels), value in sorted(counters.items()):
+                    if series_name == name:
+                        lines.append(f"{full}{self._labels(labels)} {value}")
+
+        seen = set()
+        for collect in self._gauges:
+            for name, help, labels, value in collect():
+                full = f"{self.prefix}_{name}"
+                if full not in seen:
+                    seen.add(full)
+                    lines.append(f"# HELP {full} {help}")
+                    lines.append(f"# TYPE {full} gauge")
+                lines.append(f"{full}{self._labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class TimedCursor:
+    """Cursor proxy that reports the duration of every execute() to a callback"""
+
+    __slots__ = ("_cur", "_on_query")
+
+    def __init__(self, cur, on_query):
+        self._cur = cur
+        self._on_query = on_query
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cur.close()
+        return False
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cur.execute(operation, params, *args, **kwargs)
+        finally:
+            self._on_query(operation, params, time.perf_counter() - started)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cur.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            self._on_query(operation, seq_params, time.perf_counter() - started)
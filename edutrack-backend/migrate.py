@@ -0,0 +1,405 @@
+"""Versioned schema migrations.
+
+Migrations live in migrations/ as NNNN_name.sql or NNNN_name.py (a module
+with up(m)). Applied versions are recorded in schema_version, so each runs
+once, in order.
+
+    python migrate.py                # apply pending migrations
+    python migrate.py --dry-run      # print the statements and backfill plans instead
+    python migrate.py --status       # list applied and pending versions
+    python migrate.py --target 7     # stop after version 7 (e.g. between expand and contract)
+    python migrate.py --baseline 6   # mark 1..6 as applied without running them
+
+MySQL commits DDL implicitly, so a migration cannot be rolled back as a
+whole. The Migrator helpers check information_schema first instead, which
+means a migration that failed halfway can simply be run again.
+"""
+import os
+import re
+import sys
+import time
+import hashlib
+import argparse
+import importlib.util
+
+import mysql.connector
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+BACKFILL_CHUNK = int(os.environ.get("BACKFILL_CHUNK", 2000))           # driver rows per backfill statement
+BACKFILL_THROTTLE = float(os.environ.get("BACKFILL_THROTTLE", 1.0))    # sleep this many times each chunk's runtime
+
+SCHEMA_VERSION_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INT PRIMARY KEY,
+        name VARCHAR(200) NOT NULL,
+        checksum CHAR(40) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        duration_ms INT NOT NULL DEFAULT 0
+    )
+"""
+
+_MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.(sql|py)$")
+
+
+def split_sql(text):
+    """Split a SQL script into statements, respecting quotes and comments"""
+    statements, current = [], []
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if ch in "'\"`":
+            j = i + 1
+            while j < n and text[j] != ch:
+                j += 2 if text[j] == "\\" else 1
+            current.append(text[i:j + 1])
+            i = j + 1
+        elif text.startswith("--", i) or ch == "#":
+            end = text.find("\n", i)
+            i = n if end == -1 else end
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+        elif ch == ";":
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+            i += 1
+        else:
+            current.append(ch)
+            i += 1
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+class Migrator:
+    """What a migration's up(m) works with: idempotent DDL helpers and throttled backfills"""
+
+    def __init__(self, conn, dry_run=False, chunk=BACKFILL_CHUNK, throttle=BACKFILL_THROTTLE):
+        self.conn = conn
+        self.cur = conn.cursor()
+        self.dry_run = dry_run
+        self.chunk = chunk
+        self.throttle = throttle
+
+    def _show(self, sql, params=None):
+        text = " ".join(sql.split())
+        print(f"    {'[dry-run] ' if self.dry_run else ''}{text[:300]}{' ...' if len(text) > 300 else ''}"
+              + (f"  -- {params}" if params else ""))
+
+    def execute(self, sql, params=None):
+        self._show(sql, params)
+        if not self.dry_run:
+            self.cur.execute(sql, params or ())
+            if self.cur.with_rows:
+                self.cur.fetchall()
+            self.conn.commit()
+
+    def _scalar(self, sql, params=()):
+        self.cur.execute(sql, params)
+        row = self.cur.fetchone()
+        return row[0] if row else None
+
+    # ---------- introspection ----------
+
+    def table_exists(self, table):
+        return bool(self._scalar(
+            "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s",
+            (table,)
+        ))
+
+    def column_exists(self, table, column):
+        return bool(self._scalar(
+            "SELECT COUNT(*) FROM information_schema.columns "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s",
+            (table, column)
+        ))
+
+    def index_exists(self, table, index):
+        return bool(self._scalar(
+            "SELECT COUNT(*) FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s",
+            (table, index)
+        ))
+
+    def is_nullable(self, table, column):
+        return self._scalar(
+            "SELECT is_nullable FROM information_schema.columns "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s",
+            (table, column)
+        ) == "YES"
+
+    def constraint_exists(self, table, name):
+        return bool(self._scalar(
+            "SELECT COUNT(*) FROM information_schema.table_constraints "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND constraint_name = %s",
+            (table, name)
+        ))
+
+    def foreign_keys(self, table, column):
+        """Names of the foreign keys on table.column"""
+        self.cur.execute(
+            "SELECT constraint_name FROM information_schema.key_column_usage "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s "
+            "AND referenced_table_name IS NOT NULL",
+            (table, column)
+        )
+        return [row[0] for row in self.cur.fetchall()]
+
+    def primary_key(self, table):
+        self.cur.execute(
+            "SELECT column_name FROM information_schema.key_column_usage "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND constraint_name = 'PRIMARY' "
+            "ORDER BY ordinal_position",
+            (table,)
+        )
+        return [row[0] for row in self.cur.fetchall()]
+
+    def trigger_exists(self, trigger):
+        return bool(self._scalar(
+            "SELECT COUNT(*) FROM information_schema.triggers WHERE trigger_schema = DATABASE() AND trigger_name = %s",
+            (trigger,)
+        ))
+
+    # ---------- DDL ----------
+
+    def create_table(self, table, ddl):
+        if self.table_exists(table):
+            print(f"    table {table} exists, skipping")
+            return
+        self.execute(ddl)
+
+    def alter(self, table, clauses, lock="NONE"):
+        """Online ALTER TABLE; fails fast instead of blocking writes if the server can't honour `lock`"""
+        self.execute(f"ALTER TABLE {table} {clauses}, ALGORITHM=INPLACE, LOCK={lock}")
+
+    def add_column(self, table, column, definition, lock="NONE"):
+        """Online ADD COLUMN: concurrent reads and writes continue while the table is rebuilt"""
+        if self.column_exists(table, column):
+            print(f"    column {table}.{column} exists, skipping")
+            return
+        self.alter(table, f"ADD COLUMN {column} {definition}", lock)
+
+    def drop_columns(self, table, *columns):
+        """Drop the given columns that still exist, in one rebuild"""
+        present = [c for c in columns if self.column_exists(table, c)]
+        if not present:
+            print(f"    columns {table}.{', '.join(columns)} already dropped, skipping")
+            return
+        self.alter(table, ", ".join(f"DROP COLUMN {c}" for c in present))
+
+    def add_index(self, table, index, columns, unique=False):
+        """Online index build; fails fast instead of locking if the server can't do it in place"""
+        if self.index_exists(table, index):
+            print(f"    index {table}.{index} exists, skipping")
+            return
+        self.alter(table, f"ADD {'UNIQUE ' if unique else ''}INDEX {index} ({columns})")
+
+    def drop_index(self, table, index):
+        if not self.index_exists(table, index):
+            print(f"    index {table}.{index} already dropped, skipping")
+            return
+        self.alter(table, f"DROP INDEX {index}")
+
+    def add_foreign_key(self, table, name, column, reference):
+        """Add a cascading foreign key without re-checking existing rows.
+
+        MySQL can only build a foreign key in place with foreign_key_checks
+        off, so call this once a backfill has made the column consistent.
+        """
+        if self.constraint_exists(table, name):
+            print(f"    constraint {table}.{name} exists, skipping")
+            return
+        self.execute("SET SESSION foreign_key_checks = 0")
+        try:
+            self.alter(table, f"ADD CONSTRAINT {name} FOREIGN KEY ({column}) REFERENCES {reference} ON DELETE CASCADE")
+        finally:
+            self.execute("SET SESSION foreign_key_checks = 1")
+
+    def drop_foreign_keys(self, table, column):
+        for name in self.foreign_keys(table, column):
+            self.alter(table, f"DROP FOREIGN KEY {name}")
+
+    def create_trigger(self, trigger, ddl):
+        if self.trigger_exists(trigger):
+            print(f"    trigger {trigger} exists, skipping")
+            return
+        self.execute(ddl)
+
+    def drop_trigger(self, trigger):
+        self.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+    # ---------- data ----------
+
+    def backfill(self, driver, key, sql):
+        """Run sql once per chunk of `driver` rows, ordered by its indexed column `key`.
+
+        sql refers to the chunk's bounds as %(first)s and %(last)s, inclusive
+        on both ends. Each chunk commits on its own, then the runner
+        sleeps throttle x the chunk's runtime, so row locks stay short and
+        replicas keep up.
+        """
+        if self.dry_run:
+            rows = self._scalar(f"SELECT COUNT(*) FROM {driver}") if self.table_exists(driver) else 0
+            self._show(sql)
+            print(f"    [dry-run] backfill over {driver}.{key}: ~{rows} rows in chunks of {self.chunk}")
+            return
+
+        first = self._scalar(f"SELECT MIN({key}) FROM {driver}")
+        chunks = 0
+        started = time.monotonic()
+        while first is not None:
+            last = self._scalar(
+                f"SELECT {key} FROM {driver} WHERE {key} >= %s ORDER BY {key} LIMIT 1 OFFSET %s",
+                (first, self.chunk - 1)
+            )
+            if last is None:
+                last = self._scalar(f"SELECT MAX({key}) FROM {driver}")
+
+            chunk_started = time.monotonic()
+            self.cur.execute(sql, {"first": first, "last": last})
+            self.conn.commit()
+            chunks += 1
+            elapsed = time.monotonic() - chunk_started
+            if chunks % 50 == 0:
+                print(f"    ... {chunks} chunks, at {key} = {last!r}")
+            if self.throttle:
+                time.sleep(elapsed * self.throttle)
+
+            first = self._scalar(f"SELECT MIN({key}) FROM {driver} WHERE {key} > %s", (last,))
+        print(f"    backfilled {chunks} chunks of {driver} in {time.monotonic() - started:.1f}s")
+
+
+# =============== RUNNER ===============
+
+def discover(directory=MIGRATIONS_DIR):
+    """[(version, name, path)] sorted by version"""
+    found = []
+    for filename in os.listdir(directory):
+        match = _MIGRATION_FILE.match(filename)
+        if match:
+            found.append((int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    found.sort()
+    versions = [v for v, _, _ in found]
+    if len(versions) != len(set(versions)):
+        raise SystemExit(f"Duplicate migration versions in {directory}")
+    return found
+
+
+def checksum(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def load_up(path):
+    if path.endswith(".sql"):
+        with open(path, encoding="utf-8") as f:
+            statements = split_sql(f.read())
+        return lambda m: [m.execute(s) for s in statements]
+    spec = importlib.util.spec_from_file_location(os.path.basename(path)[:-3], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.up
+
+
+def applied_versions(cur):
+    cur.execute("SELECT version, checksum FROM schema_version")
+    return dict(cur.fetchall())
+
+
+def migrate(conn, dry_run=False, baseline=None, target=None):
+    """Apply (or with dry_run, print) pending migrations up to target; returns the number handled"""
+    cur = conn.cursor()
+    if not dry_run:
+        cur.execute(SCHEMA_VERSION_DDL)
+    # One runner at a time, e.g. when several app servers deploy together
+    cur.execute("SELECT GET_LOCK('edutrack_migrate', 10)")
+    if cur.fetchone()[0] != 1:
+        raise SystemExit("Another migration run holds the lock")
+
+    try:
+        applied = applied_versions(cur) if Migrator(conn).table_exists("schema_version") else {}
+        pending = 0
+        for version, name, path in discover():
+            if target is not None and version > target:
+                break
+            digest = checksum(path)
+            if version in applied:
+                if applied[version] != digest:
+                    print(f"[WARNING] {version:04d}_{name} changed after it was applied")
+                continue
+            pending += 1
+
+            if baseline is not None and version <= baseline:
+                print(f"[=] {version:04d}_{name} marked as applied (baseline)")
+                if not dry_run:
+                    cur.execute("INSERT INTO schema_version (version, name, checksum) VALUES (%s, %s, %s)",
+                                (version, name, digest))
+                    conn.commit()
+                continue
+
+            print(f"[{'~' if dry_run else '+'}] {version:04d}_{name}")
+            started = time.monotonic()
+            load_up(path)(Migrator(conn, dry_run=dry_run))
+            if not dry_run:
+                cur.execute(
+                    "INSERT INTO schema_version (version, name, checksum, duration_ms) VALUES (%s, %s, %s, %s)",
+                    (version, name, digest, int((time.monotonic() - started) * 1000))
+                )
+                conn.commit()
+        return pending
+    finally:
+        cur.execute("SELECT RELEASE_LOCK('edutrack_migrate')")
+        cur.fetchall()
+        cur.close()
+
+
+def status(conn):
+    cur = conn.cursor()
+    cur.execute(SCHEMA_VERSION_DDL)
+    cur.execute("SELECT version, applied_at, duration_ms FROM schema_version")
+    applied = {v: (at, ms) for v, at, ms in cur.fetchall()}
+    cur.close()
+    print("\n=== MIGRATIONS ===")
+    for version, name, _ in discover():
+        if version in applied:
+            at, ms = applied[version]
+            print(f"  [x] {version:04d}_{name}  applied {at} ({ms} ms)")
+        else:
+            print(f"  [ ] {version:04d}_{name}  pending")
+
+
+def connect():
+    return mysql.connector.connect(
+        host='localhost',
+        user='root',
+        password='040506',
+        database='edutrack_lms'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply EduTrack schema migrations")
+    parser.add_argument("--dry-run", action="store_true", help="print statements without running them")
+    parser.add_argument("--status", action="store_true", help="list applied and pending migrations")
+    parser.add_argument("--baseline", type=int, metavar="VERSION",
+                        help="record migrations up to VERSION as applied without running them")
+    parser.add_argument("--target", type=int, metavar="VERSION", help="apply migrations up to VERSION only")
+    args = parser.parse_args()
+
+    conn = connect()
+    try:
+        if args.status:
+            status(conn)
+            return 0
+        handled = migrate(conn, dry_run=args.dry_run, baseline=args.baseline, target=args.target)
+        print(f"\n{'Would apply' if args.dry_run else 'Applied'} {handled} migration(s)")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+-- Initial schema (the tables as first released)
+
+-- Users table
+CREATE TABLE IF NOT EXISTS users (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    name VARCHAR(100) NOT NULL,
+    email VARCHAR(120) UNIQUE NOT NULL,
+    password VARCHAR(255) NOT NULL,
+    role VARCHAR(20) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Courses table
+CREATE TABLE IF NOT EXISTS courses (
+    id VARCHAR(50) PRIMARY KEY,
+    title VARCHAR(200) NOT NULL,
+    description TEXT,
+    level VARCHAR(50),
+    created_by VARCHAR(120),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (created_by) REFERENCES users(email) ON DELETE SET NULL
+);
+
+-- Lessons table
+CREATE TABLE IF NOT EXISTS lessons (
+    id VARCHAR(50) PRIMARY KEY,
+    course_id VARCHAR(50) NOT NULL,
+    title VARCHAR(200) NOT NULL,
+    description TEXT,
+    url VARCHAR(500),
+    position INT DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
+);
+
+-- Quiz questions table
+CREATE TABLE IF NOT EXISTS quiz_questions (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    course_id VARCHAR(50) NOT NULL,
+    question TEXT NOT NULL,
+    option1 VARCHAR(200),
+    option2 VARCHAR(200),
+    option3 VARCHAR(200),
+    option4 VARCHAR(200),
+    correct_answer INT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
+);
+
+-- Enrollments table
+CREATE TABLE IF NOT EXISTS enrollments (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    student_email VARCHAR(120) NOT NULL,
+    course_id VARCHAR(50) NOT NULL,
+    enrolled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (student_email) REFERENCES users(email) ON DELETE CASCADE,
+    FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
+    UNIQUE KEY unique_enrollment (student_email, course_id)
+);
+
+-- Lesson completion tracking
+CREATE TABLE IF NOT EXISTS lesson_completions (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    student_email VARCHAR(120) NOT NULL,
+    course_id VARCHAR(50) NOT NULL,
+    lesson_id VARCHAR(50) NOT NULL,
+    completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (student_email) REFERENCES users(email) ON DELETE CASCADE,
+    FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
+    FOREIGN KEY (lesson_id) REFERENCES lessons(id) ON DELETE CASCADE,
+    UNIQUE KEY unique_completion (student_email, lesson_id)
+);
+
+-- Quiz results table
+CREATE TABLE IF NOT EXISTS quiz_results (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    student_email VARCHAR(120) NOT NULL,
+    course_id VARCHAR(50) NOT NULL,
+    score INT NOT NULL,
+    total INT NOT NULL,
+    submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (student_email) REFERENCES users(email) ON DELETE CASCADE,
+    FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
+);
+
+-- Course progress table
+CREATE TABLE IF NOT EXISTS course_progress (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    student_email VARCHAR(120) NOT NULL,
+    course_id VARCHAR(50) NOT NULL,
+    progress INT DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (student_email) REFERENCES users(email) ON DELETE CASCADE,
+    FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
+    UNIQUE KEY unique_progress (student_email, course_id)
+);
@@ -0,0 +1,12 @@
+"""Indexes for keyset pagination of users/courses and per-student quiz lookups"""
+
+
+def up(m):
+    m.add_index("users", "idx_users_created", "created_at, id")
+    m.add_index("users", "idx_users_role_created", "role, created_at, id")
+    m.add_index("users", "idx_users_name", "name")
+    m.add_index("courses", "idx_courses_created", "created_at, id")
+    m.add_index("courses", "idx_courses_level_created", "level, created_at, id")
+    m.add_index("courses", "idx_courses_creator_created", "created_by, created_at, id")
+    m.add_index("courses", "idx_courses_title", "title")
+    m.add_index("quiz_results", "idx_quiz_results_student_course", "student_email, course_id, submitted_at")
@@ -0,0 +1,5 @@
+"""courses.content_version: bumped on lesson/quiz changes, drives the course ETag and answer-key cache"""
+
+
+def up(m):
+    m.add_column("courses", "content_version", "INT NOT NULL DEFAULT 1 AFTER created_by")
@@ -0,0 +1,39 @@
+"""Per-course aggregates maintained by the write routes, backfilled one chunk of courses at a time"""
+
+
+def up(m):
+    m.create_table("course_stats", """
+        CREATE TABLE course_stats (
+            course_id VARCHAR(50) PRIMARY KEY,
+            lesson_count INT NOT NULL DEFAULT 0,
+            quiz_question_count INT NOT NULL DEFAULT 0,
+            enrollment_count INT NOT NULL DEFAULT 0,
+            quiz_attempt_count INT NOT NULL DEFAULT 0,
+            quiz_score_sum BIGINT NOT NULL DEFAULT 0,
+            quiz_total_sum BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
+        )
+    """)
+
+    # Correlated subqueries hit the course_id index of each table for just this chunk's courses
+    m.backfill("courses", "id", """
+        INSERT INTO course_stats (course_id, lesson_count, quiz_question_count, enrollment_count,
+                                  quiz_attempt_count, quiz_score_sum, quiz_total_sum)
+        SELECT c.id,
+               (SELECT COUNT(*) FROM lessons l WHERE l.course_id = c.id),
+               (SELECT COUNT(*) FROM quiz_questions q WHERE q.course_id = c.id),
+               (SELECT COUNT(*) FROM enrollments e WHERE e.course_id = c.id),
+               (SELECT COUNT(*) FROM quiz_results r WHERE r.course_id = c.id),
+               (SELECT COALESCE(SUM(score), 0) FROM quiz_results r WHERE r.course_id = c.id),
+               (SELECT COALESCE(SUM(total), 0) FROM quiz_results r WHERE r.course_id = c.id)
+        FROM courses c
+        WHERE c.id BETWEEN %(first)s AND %(last)s
+        ON DUPLICATE KEY UPDATE
+            lesson_count = VALUES(lesson_count),
+            quiz_question_count = VALUES(quiz_question_count),
+            enrollment_count = VALUES(enrollment_count),
+            quiz_attempt_count = VALUES(quiz_attempt_count),
+            quiz_score_sum = VALUES(quiz_score_sum),
+            quiz_total_sum = VALUES(quiz_total_sum)
+    """)
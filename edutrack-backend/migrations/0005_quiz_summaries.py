@@ -0,0 +1,70 @@
+"""quiz_latest (latest/best attempt per student and course) and quiz_score_histogram, with backfills"""
+
+
+def up(m):
+    m.create_table("quiz_latest", """
+        CREATE TABLE quiz_latest (
+            student_email VARCHAR(120) NOT NULL,
+            course_id VARCHAR(50) NOT NULL,
+            last_score INT NOT NULL,
+            last_total INT NOT NULL,
+            last_submitted_at TIMESTAMP NOT NULL,
+            best_score INT NOT NULL,
+            best_total INT NOT NULL,
+            best_submitted_at TIMESTAMP NOT NULL,
+            best_permille INT NOT NULL,
+            attempts INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (student_email, course_id),
+            FOREIGN KEY (student_email) REFERENCES users(email) ON DELETE CASCADE,
+            FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
+        )
+    """)
+    m.create_table("quiz_score_histogram", """
+        CREATE TABLE quiz_score_histogram (
+            course_id VARCHAR(50) NOT NULL,
+            percent TINYINT UNSIGNED NOT NULL,
+            attempts INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (course_id, percent),
+            FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
+        )
+    """)
+
+    # Chunked by student so each statement reads one range of idx_quiz_results_student_course
+    m.backfill("users", "email", """
+        INSERT INTO quiz_latest (student_email, course_id, last_score, last_total, last_submitted_at,
+                                 best_score, best_total, best_submitted_at, best_permille, attempts)
+        SELECT l.student_email, l.course_id, l.score, l.total, l.submitted_at,
+               b.score, b.total, b.submitted_at, b.permille, l.attempts
+        FROM (
+            SELECT student_email, course_id, score, total, submitted_at,
+                   COUNT(*) OVER (PARTITION BY student_email, course_id) AS attempts,
+                   ROW_NUMBER() OVER (PARTITION BY student_email, course_id
+                                      ORDER BY submitted_at DESC, id DESC) AS rn
+            FROM quiz_results
+            WHERE total > 0 AND student_email BETWEEN %(first)s AND %(last)s
+        ) l
+        JOIN (
+            SELECT student_email, course_id, score, total, submitted_at,
+                   score * 1000 DIV total AS permille,
+                   ROW_NUMBER() OVER (PARTITION BY student_email, course_id
+                                      ORDER BY score * 1000 DIV total DESC, submitted_at, id) AS rn
+            FROM quiz_results
+            WHERE total > 0 AND student_email BETWEEN %(first)s AND %(last)s
+        ) b ON b.student_email = l.student_email AND b.course_id = l.course_id AND b.rn = 1
+        WHERE l.rn = 1
+        ON DUPLICATE KEY UPDATE
+            last_score = VALUES(last_score), last_total = VALUES(last_total),
+            last_submitted_at = VALUES(last_submitted_at),
+            best_score = VALUES(best_score), best_total = VALUES(best_total),
+            best_submitted_at = VALUES(best_submitted_at), best_permille = VALUES(best_permille),
+            attempts = VALUES(attempts)
+    """)
+
+    m.backfill("courses", "id", """
+        INSERT INTO quiz_score_histogram (course_id, percent, attempts)
+        SELECT course_id, LEAST(100, GREATEST(0, score * 100 DIV total)) AS pct, COUNT(*)
+        FROM quiz_results
+        WHERE total > 0 AND course_id BETWEEN %(first)s AND %(last)s
+        GROUP BY course_id, pct
+        ON DUPLICATE KEY UPDATE attempts = VALUES(attempts)
+    """)
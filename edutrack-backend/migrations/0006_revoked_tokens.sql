@@ -0,0 +1,6 @@
+-- Revoked session tokens (logout); rows can be dropped once expired
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    jti CHAR(32) PRIMARY KEY,
+    expires_at TIMESTAMP NOT NULL,
+    INDEX idx_revoked_expires (expires_at)
+);
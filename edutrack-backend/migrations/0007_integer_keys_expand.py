@@ -0,0 +1,91 @@
+"""Integer keys for the hot tables, expand step.
+
+Adds courses.num / lessons.num and integer student/course/lesson columns
+next to the email and slug ones, keeps both sets filled by BEFORE INSERT
+triggers (so the previous release and this one can run side by side),
+backfills existing rows and builds the integer indexes. 0008 drops the
+string columns once every server runs the integer-keyed code.
+"""
+
+# key -> (string column, integer column, lookup table, string key, integer key)
+KEYS = {
+    "student": ("student_email", "student_id", "users", "email", "id"),
+    "course": ("course_id", "course_num", "courses", "id", "num"),
+    "lesson": ("lesson_id", "lesson_num", "lessons", "id", "num"),
+}
+
+HOT_TABLES = {
+    "enrollments": ("student", "course"),
+    "lesson_completions": ("student", "course", "lesson"),
+    "quiz_results": ("student", "course"),
+    "course_progress": ("student", "course"),
+    "quiz_latest": ("student", "course"),
+}
+
+INDEXES = [
+    ("enrollments", "uq_enrollments_student_course", "student_id, course_num", True),
+    ("enrollments", "idx_enrollments_course_student", "course_num, student_id", False),
+    ("lesson_completions", "uq_completions_student_lesson", "student_id, lesson_num", True),
+    ("lesson_completions", "idx_completions_student_course", "student_id, course_num, lesson_num", False),
+    ("lesson_completions", "idx_completions_course", "course_num", False),
+    ("lesson_completions", "idx_completions_lesson", "lesson_num", False),
+    ("quiz_results", "idx_quiz_results_student_course_at", "student_id, course_num, submitted_at", False),
+    ("quiz_results", "idx_quiz_results_course", "course_num", False),
+    ("course_progress", "uq_progress_student_course", "student_id, course_num", True),
+    ("course_progress", "idx_progress_course", "course_num", False),
+    ("quiz_latest", "uq_quiz_latest_student_course", "student_id, course_num", True),
+    ("quiz_latest", "idx_quiz_latest_course", "course_num", False),
+]
+
+
+def sync_trigger(table, keys):
+    """Fill whichever key set the inserting release left out"""
+    assignments = []
+    for key in keys:
+        string_col, int_col, ref, ref_string, ref_int = KEYS[key]
+        assignments.append(
+            f"NEW.{int_col} = COALESCE(NEW.{int_col}, "
+            f"(SELECT {ref_int} FROM {ref} WHERE {ref_string} = NEW.{string_col}))"
+        )
+        assignments.append(
+            f"NEW.{string_col} = COALESCE(NULLIF(NEW.{string_col}, ''), "
+            f"(SELECT {ref_string} FROM {ref} WHERE {ref_int} = NEW.{int_col}))"
+        )
+    return (f"CREATE TRIGGER {table}_sync_keys BEFORE INSERT ON {table} FOR EACH ROW "
+            f"SET {', '.join(assignments)}")
+
+
+def backfill_sql(table, keys, bound):
+    joins = " ".join(
+        f"JOIN {KEYS[k][2]} {k[0]} ON {k[0]}.{KEYS[k][3]} = x.{KEYS[k][0]}" for k in keys
+    )
+    sets = ", ".join(f"x.{KEYS[k][1]} = {k[0]}.{KEYS[k][4]}" for k in keys)
+    return (f"UPDATE {table} x {joins} SET {sets} "
+            f"WHERE x.{bound} BETWEEN %(first)s AND %(last)s AND x.student_id IS NULL")
+
+
+def up(m):
+    # Catalog tables are small; AUTO_INCREMENT columns can't be added without blocking writes
+    m.add_column("courses", "num", "INT NOT NULL AUTO_INCREMENT UNIQUE", lock="SHARED")
+    m.add_column("lessons", "num", "INT NOT NULL AUTO_INCREMENT UNIQUE", lock="SHARED")
+
+    for table, keys in HOT_TABLES.items():
+        for key in keys:
+            string_col, int_col = KEYS[key][:2]
+            m.add_column(table, int_col, "INT NULL")
+            # Lets the integer-keyed release insert without the strings; the trigger fills them in
+            m.alter(table, f"ALTER COLUMN {string_col} SET DEFAULT ''")
+
+    # Triggers first, so rows written during the backfill are covered too
+    for table, keys in HOT_TABLES.items():
+        m.create_trigger(f"{table}_sync_keys", sync_trigger(table, keys))
+
+    for table, keys in HOT_TABLES.items():
+        if table == "quiz_latest":
+            # No surrogate id; its primary key starts with student_email
+            m.backfill("users", "email", backfill_sql(table, keys, "student_email"))
+        else:
+            m.backfill(table, "id", backfill_sql(table, keys, "id"))
+
+    for table, index, columns, unique in INDEXES:
+        m.add_index(table, index, columns, unique=unique)
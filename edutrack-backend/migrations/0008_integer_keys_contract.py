@@ -0,0 +1,50 @@
+"""Integer keys for the hot tables, contract step.
+
+Run only once every server runs the integer-keyed code (see 0007): drops
+the sync triggers, makes the integer columns the enforced foreign keys
+and removes the email/slug columns along with their indexes.
+"""
+
+# key -> (string column, integer column, referenced table and column)
+KEYS = {
+    "student": ("student_email", "student_id", "users(id)"),
+    "course": ("course_id", "course_num", "courses(num)"),
+    "lesson": ("lesson_id", "lesson_num", "lessons(num)"),
+}
+
+HOT_TABLES = {
+    "enrollments": ("student", "course"),
+    "lesson_completions": ("student", "course", "lesson"),
+    "quiz_results": ("student", "course"),
+    "course_progress": ("student", "course"),
+    "quiz_latest": ("student", "course"),
+}
+
+STRING_INDEXES = {
+    "enrollments": ["unique_enrollment"],
+    "lesson_completions": ["unique_completion"],
+    "quiz_results": ["idx_quiz_results_student_course"],
+    "course_progress": ["unique_progress"],
+}
+
+
+def up(m):
+    for table in HOT_TABLES:
+        m.drop_trigger(f"{table}_sync_keys")
+
+    for table, keys in HOT_TABLES.items():
+        for key in keys:
+            string_col, int_col, reference = KEYS[key]
+            if m.is_nullable(table, int_col):
+                m.alter(table, f"MODIFY {int_col} INT NOT NULL")
+            m.add_foreign_key(table, f"fk_{table}_{key}", int_col, reference)
+            m.drop_foreign_keys(table, string_col)
+        for index in STRING_INDEXES.get(table, []):
+            m.drop_index(table, index)
+
+    if m.primary_key("quiz_latest") != ["student_id", "course_num"]:
+        m.alter("quiz_latest", "DROP PRIMARY KEY, ADD PRIMARY KEY (student_id, course_num)")
+    m.drop_index("quiz_latest", "uq_quiz_latest_student_course")
+
+    for table, keys in HOT_TABLES.items():
+        m.drop_columns(table, *(KEYS[key][0] for key in keys))
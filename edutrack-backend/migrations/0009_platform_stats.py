@@ -0,0 +1,49 @@
+"""Platform-wide counters for the admin dashboard, plus each student's last activity.
+
+The counters start empty: the first reconcile run by the backend (or
+`python course_stats.py --rebuild`) fills them from a consistent snapshot
+without locking the base tables. student_activity is backfilled from the
+hot tables one chunk of users at a time.
+"""
+
+
+NEVER = "CAST('1970-01-02' AS DATETIME)"
+
+
+def up(m):
+    m.create_table("platform_stats", """
+        CREATE TABLE platform_stats (
+            stat VARCHAR(32) NOT NULL,
+            bucket VARCHAR(50) NOT NULL DEFAULT '',
+            slot TINYINT UNSIGNED NOT NULL DEFAULT 0,
+            value BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (stat, bucket, slot)
+        )
+    """)
+
+    m.create_table("student_activity", """
+        CREATE TABLE student_activity (
+            student_id INT PRIMARY KEY,
+            last_active_at TIMESTAMP NOT NULL,
+            INDEX idx_student_activity_at (last_active_at),
+            CONSTRAINT fk_student_activity_student FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    """)
+
+    # Correlated subqueries use each hot table's student_id index for just this chunk's users
+    m.backfill("users", "id", f"""
+        INSERT INTO student_activity (student_id, last_active_at)
+        SELECT id, last_at FROM (
+            SELECT u.id, GREATEST(
+                       COALESCE((SELECT MAX(enrolled_at) FROM enrollments WHERE student_id = u.id), {NEVER}),
+                       COALESCE((SELECT MAX(completed_at) FROM lesson_completions WHERE student_id = u.id), {NEVER}),
+                       COALESCE((SELECT MAX(submitted_at) FROM quiz_results WHERE student_id = u.id), {NEVER}),
+                       COALESCE((SELECT MAX(updated_at) FROM course_progress WHERE student_id = u.id), {NEVER})
+                   ) AS last_at
+            FROM users u
+            WHERE u.id BETWEEN %(first)s AND %(last)s
+        ) t
+        WHERE last_at > {NEVER}
+        ON DUPLICATE KEY UPDATE last_active_at = GREATEST(last_active_at, VALUES(last_active_at))
+    """)
@@ -0,0 +1,13 @@
+-- Change log behind the SSE feed (see change_feed.py). Write routes add a row in the
+-- same transaction as the write; every backend process polls it by id. Rows are
+-- pruned after SSE_RETENTION seconds, so no foreign keys: a deleted course or
+-- student must not block or cascade into the log.
+CREATE TABLE IF NOT EXISTS change_events (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    kind VARCHAR(32) NOT NULL,
+    student_id INT NOT NULL,
+    course_num INT NOT NULL,
+    data VARCHAR(255) NOT NULL DEFAULT '{}',
+    created_at TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    INDEX idx_change_events_created (created_at)
+);
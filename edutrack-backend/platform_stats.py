@@ -0,0 +1,277 @@
+import time
+import random
+import threading
+
+from catalog_cache import CatalogCache
+
+# Each counter is spread over this many rows so concurrent writers rarely
+# wait on the same row lock; readers sum them
+COUNTER_SLOTS = 16
+
+BUMP_SQL = ("INSERT INTO platform_stats (stat, bucket, slot, value) VALUES (%s, %s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE value = value + VALUES(value)")
+
+# Ground truth per counter, as (bucket, value) rows
+ACTUAL_SQL = {
+    "users": "SELECT LOWER(role), COUNT(*) FROM users GROUP BY LOWER(role)",
+    "courses": "SELECT COALESCE(level, ''), COUNT(*) FROM courses GROUP BY COALESCE(level, '')",
+    "enrollments": "SELECT '', COUNT(*) FROM enrollments",
+    "lesson_completions": "SELECT '', COUNT(*) FROM lesson_completions",
+    "quiz_attempts": "SELECT '', COUNT(*) FROM quiz_results",
+}
+
+# Active-student windows in days; recounted from student_activity on every refresh
+ACTIVE_WINDOWS = {"24h": 1, "7d": 7}
+
+RECONCILE_LOCK = "edutrack_platform_stats"
+
+
+def bump_sql(stat, bucket="", delta=1):
+    """(sql, params) adding delta to one counter; run it in the transaction of the write it counts"""
+    return BUMP_SQL, (stat, bucket or "", random.randrange(COUNTER_SLOTS), delta)
+
+
+def role_bucket(role):
+    return (role or "").lower()
+
+
+def level_bucket(level):
+    return level or ""
+
+
+def read_counters(cur, stats=None):
+    """{(stat, bucket): (value, updated_at)} summed over slots"""
+    where = f" WHERE stat IN ({', '.join(['%s'] * len(stats))})" if stats else ""
+    cur.execute(f"SELECT stat, bucket, SUM(value), MAX(updated_at) FROM platform_stats{where} "
+                f"GROUP BY stat, bucket", tuple(stats or ()))
+    return {(stat, bucket): (int(value), updated_at) for stat, bucket, value, updated_at in cur.fetchall()}
+
+
+def find_drift(conn):
+    """[(stat, bucket, counted, actual)], both sides read from one consistent snapshot.
+
+    Writes committed after the snapshot are missing from both sides, so
+    adding actual - counted to the live counters corrects them exactly.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    conn.start_transaction(consistent_snapshot=True, isolation_level="REPEATABLE READ", readonly=True)
+    cur = conn.cursor()
+    try:
+        actual = {}
+        for stat, sql in ACTUAL_SQL.items():
+            cur.execute(sql)
+            for bucket, value in cur.fetchall():
+                actual[(stat, bucket)] = int(value)
+        counted = {k: v for k, (v, _) in read_counters(cur, list(ACTUAL_SQL)).items()}
+    finally:
+        cur.close()
+        conn.commit()
+    return [
+        (stat, bucket, counted.get((stat, bucket), 0), actual.get((stat, bucket), 0))
+        for stat, bucket in sorted(set(actual) | set(counted))
+        if counted.get((stat, bucket), 0) != actual.get((stat, bucket), 0)
+    ]
+
+
+def reconcile(conn, min_interval=0):
+    """Correct counter drift; returns the drift found, or None if skipped.
+
+    Skipped when another process holds the reconcile lock, or when any
+    process reconciled less than min_interval seconds ago.
+    """
+    cur = conn.cursor()
+    cur.execute("SELECT GET_LOCK(%s, 0)", (RECONCILE_LOCK,))
+    if not cur.fetchone()[0]:
+        cur.close()
+        return None
+    try:
+        cur.execute("SELECT UNIX_TIMESTAMP(MAX(updated_at)) FROM platform_stats WHERE stat = 'reconciled'")
+        last = cur.fetchone()[0]
+        cur.execute("SELECT UNIX_TIMESTAMP()")
+        now = cur.fetchone()[0]
+        if min_interval and last is not None and now - last < min_interval:
+            return None
+
+        drift = find_drift(conn)
+        for stat, bucket, counted, actual in drift:
+            cur.execute(*bump_sql(stat, bucket, actual - counted))
+        cur.execute("""
+            INSERT INTO platform_stats (stat, bucket, slot, value, updated_at) VALUES ('reconciled', '', 0, 1, NOW())
+            ON DUPLICATE KEY UPDATE value = value + 1, updated_at = NOW()
+        """)
+        conn.commit()
+        return drift
+    finally:
+        cur.execute("DO RELEASE_LOCK(%s)", (RECONCILE_LOCK,))
+        cur.close()
+
+
+def refresh_active(conn):
+    """Recount active students per window from the student_activity index"""
+    cur = conn.cursor()
+    for bucket, days in ACTIVE_WINDOWS.items():
+        cur.execute("SELECT COUNT(*) FROM student_activity WHERE last_active_at >= NOW() - INTERVAL %s DAY", (days,))
+        count = cur.fetchone()[0]
+        cur.execute("""
+            INSERT INTO platform_stats (stat, bucket, slot, value, updated_at) VALUES ('active_students', %s, 0, %s, NOW())
+            ON DUPLICATE KEY UPDATE value = VALUES(value), updated_at = NOW()
+        """, (bucket, count))
+    conn.commit()
+    cur.close()
+
+
+class PlatformStats:
+    """Platform-wide totals for the admin dashboard, read from maintained counters.
+
+    The write routes bump platform_stats in their own transactions (see
+    bump_sql) and call touch() for student activity. A background thread
+    flushes activity to student_activity and recounts the active-student
+    windows every `refresh_interval` seconds, and reconciles the counters
+    against the base tables every `reconcile_interval` seconds (one
+    process at a time). snapshot() costs one small grouped read of
+    platform_stats, cached for `cache_ttl` seconds.
+    """
+
+    def __init__(self, get_connection, refresh_interval=60.0, reconcile_interval=3600.0,
+                 activity_resolution=300.0, cache_ttl=5.0, chunk_size=500):
+        self._get_connection = get_connection
+        self.refresh_interval = refresh_interval
+        self.reconcile_interval = reconcile_interval
+        self.activity_resolution = activity_resolution
+        self.chunk_size = chunk_size
+        self._cache = CatalogCache(max_entries=1, ttl=cache_ttl)
+
+        self._active = {}           # student_id -> epoch seconds, waiting for the next flush
+        self._seen = {}             # student_id -> monotonic time last queued
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.activity_rows = 0
+        self.reconciles = 0
+        self.corrections = 0
+        self.errors = 0
+
+    # ---------- activity ----------
+
+    def touch(self, student_id):
+        """Note that a student did something; recorded at most once per activity_resolution"""
+        now = time.monotonic()
+        with self._lock:
+            seen = self._seen.get(student_id)
+            if seen is not None and now - seen < self.activity_resolution:
+                return
+            self._seen[student_id] = now
+            self._active[student_id] = time.time()
+
+    def flush_activity(self):
+        with self._lock:
+            batch, self._active = self._active, {}
+            horizon = time.monotonic() - self.activity_resolution
+            self._seen = {k: t for k, t in self._seen.items() if t > horizon}
+        if not batch:
+            return 0
+        rows = sorted(batch.items())
+        with self._get_connection() as conn:
+            cur = conn.cursor()
+            for i in range(0, len(rows), self.chunk_size):
+                chunk = rows[i:i + self.chunk_size]
+                cur.execute(
+                    "INSERT INTO student_activity (student_id, last_active_at) VALUES "
+                    + ", ".join(["(%s, FROM_UNIXTIME(%s))"] * len(chunk))
+                    + " ON DUPLICATE KEY UPDATE last_active_at = GREATEST(last_active_at, VALUES(last_active_at))",
+                    [v for row in chunk for v in row],
+                )
+            conn.commit()
+            cur.close()
+        with self._lock:
+            self.activity_rows += len(rows)
+        return len(rows)
+
+    # ---------- background refresh ----------
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="platform-stats", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        # Reconcile first: counters start empty after the migration
+        next_reconcile = 0.0
+        while True:
+            try:
+                self.flush_activity()
+                with self._get_connection() as conn:
+                    refresh_active(conn)
+                    if time.monotonic() >= next_reconcile:
+                        drift = reconcile(conn, min_interval=self.reconcile_interval)
+                        next_reconcile = time.monotonic() + self.reconcile_interval
+                        if drift is not None:
+                            with self._lock:
+                                self.reconciles += 1
+                                self.corrections += len(drift)
+                            for stat, bucket, counted, actual in drift:
+                                print(f"PLATFORM STATS DRIFT: {stat}/{bucket or '-'} counted={counted} actual={actual}")
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                print("PLATFORM STATS ERROR:", e)
+            if self._stopped.wait(self.refresh_interval):
+                return
+
+    def close(self):
+        """Stop the refresher and write out pending activity"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        try:
+            self.flush_activity()
+        except Exception as e:
+            print("PLATFORM STATS ERROR:", e)
+
+    # ---------- reads ----------
+
+    def snapshot(self):
+        return self._cache.get_or_load("snapshot", self._load)
+
+    def _load(self):
+        with self._get_connection() as conn:
+            cur = conn.cursor()
+            counters = read_counters(cur)
+            cur.close()
+
+        def value(stat, bucket=""):
+            return counters.get((stat, bucket), (0, None))[0]
+
+        def as_of(stat, *buckets):
+            times = [counters[(stat, b)][1] for b in buckets or ("",) if (stat, b) in counters]
+            return max(times).isoformat() if times else None
+
+        def grouped(stat):
+            return {b: v for (s, b), (v, _) in sorted(counters.items()) if s == stat and v}
+
+        roles, levels = grouped("users"), grouped("courses")
+        return {
+            "users": {"total": sum(roles.values()), "by_role": roles},
+            "courses": {"total": sum(levels.values()), "by_level": levels},
+            "enrollments": value("enrollments"),
+            "lesson_completions": value("lesson_completions"),
+            "quiz_attempts": value("quiz_attempts"),
+            "active_students": {
+                **{b: value("active_students", b) for b in ACTIVE_WINDOWS},
+                "as_of": as_of("active_students", *ACTIVE_WINDOWS),
+            },
+            "reconciled_at": as_of("reconciled"),
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending_activity": len(self._active),
+                "activity_rows": self.activity_rows,
+                "reconciles": self.reconciles,
+                "corrections": self.corrections,
+                "errors": self.errors,
+                "cache": self._cache.stats(),
+            }
@@ -0,0 +1,176 @@
+import threading
+
+import mysql.connector
+
+# Errors caused by the data in a row rather than by the database being unreachable
+ROW_ERRORS = (mysql.connector.IntegrityError, mysql.connector.DataError)
+
+
+class ProgressBuffer:
+    """Write-behind buffer for course_progress.
+
+    Updates are coalesced per (student_id, course_num) in memory and
+    written in multi-row upserts every `interval` seconds, or sooner once
+    `max_pending` keys are waiting. mode="latest" keeps the last value
+    posted, mode="max" keeps the highest. get() sees buffered values, so
+    reads stay consistent with what was posted even before a flush.
+    `log_sql`, if given, is called with each chunk's [((student_id,
+    course_num), progress)] rows and returns (sql, params) to run in the
+    same transaction, e.g. the change-feed events for those updates.
+    """
+
+    def __init__(self, get_connection, interval=2.0, max_pending=1000, chunk_size=500, mode="latest",
+                 log_sql=None):
+        if mode not in ("latest", "max"):
+            raise ValueError("mode must be 'latest' or 'max'")
+        self._get_connection = get_connection
+        self.interval = interval
+        self.max_pending = max_pending
+        self.chunk_size = chunk_size
+        self.mode = mode
+        self.log_sql = log_sql
+
+        self._pending = {}      # (student_id, course_num) -> progress
+        self._flushing = {}     # batch currently being written
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.updates = 0
+        self.rows_written = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.dropped = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="progress-flush", daemon=True)
+            self._thread.start()
+
+    def put(self, student_id, course_num, progress):
+        key = (student_id, course_num)
+        with self._lock:
+            if self.mode == "max":
+                current = self._pending.get(key, self._flushing.get(key))
+                if current is not None and current > progress:
+                    progress = current
+            self._pending[key] = progress
+            self.updates += 1
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def get(self, student_id, course_num):
+        """Buffered (not yet durable) value, or None to fall through to MySQL"""
+        key = (student_id, course_num)
+        with self._lock:
+            value = self._pending.get(key)
+            if value is None:
+                value = self._flushing.get(key)
+            return value
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print("PROGRESS FLUSH ERROR:", e)
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                self._flushing, self._pending = self._pending, {}
+                batch = list(self._flushing.items())
+
+            written = 0
+            try:
+                for i in range(0, len(batch), self.chunk_size):
+                    try:
+                        written += self._write(batch[i:i + self.chunk_size])
+                    except Exception:
+                        # Database unreachable: keep the unwritten rows for the next flush
+                        self._requeue(batch[i:])
+                        with self._lock:
+                            self.flush_errors += 1
+                        raise
+            finally:
+                with self._lock:
+                    self._flushing = {}
+                    self.flushes += 1
+                    self.rows_written += written
+            return written
+
+    def _requeue(self, rows):
+        with self._lock:
+            for key, progress in rows:
+                newer = self._pending.get(key)
+                if newer is None:
+                    self._pending[key] = progress
+                elif self.mode == "max" and progress > newer:
+                    self._pending[key] = progress
+
+    def _upsert_sql(self, rows):
+        update = "GREATEST(progress, VALUES(progress))" if self.mode == "max" else "VALUES(progress)"
+        return (
+            "INSERT INTO course_progress (student_id, course_num, progress) VALUES "
+            + ", ".join(["(%s, %s, %s)"] * rows)
+            + f" ON DUPLICATE KEY UPDATE progress = {update}"
+        )
+
+    def _execute(self, rows):
+        params = [value for (student_id, course_num), progress in rows for value in (student_id, course_num, progress)]
+        with self._get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(self._upsert_sql(len(rows)), params)
+            if self.log_sql is not None:
+                cur.execute(*self.log_sql(rows))
+            conn.commit()
+            cur.close()
+
+    def _write(self, rows):
+        """Upsert one chunk; raises only when the database itself is failing"""
+        try:
+            self._execute(rows)
+            return len(rows)
+        except ROW_ERRORS as e:
+            print("PROGRESS BATCH ERROR:", e)
+
+        # One bad row (e.g. a course deleted meanwhile) fails the whole statement;
+        # retry row by row so only the bad ones are dropped
+        written = 0
+        for row in rows:
+            try:
+                self._execute([row])
+                written += 1
+            except ROW_ERRORS as e:
+                with self._lock:
+                    self.dropped += 1
+                print("PROGRESS ROW DROPPED:", row[0], e)
+        return written
+
+    def close(self):
+        """Stop the flusher and write out everything still buffered"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "pending": len(self._pending),
+                "flushing": len(self._flushing),
+                "updates": self.updates,
+                "rows_written": self.rows_written,
+                "flushes": self.flushes,
+                "flush_errors": self.flush_errors,
+                "dropped": self.dropped,
+            }
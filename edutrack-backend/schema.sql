@@ -1,5 +1,9 @@
 -- EduTrack LMS Database Schema
 -- Run this in MySQL Workbench
+--
+-- Snapshot of the schema after every migration in migrations/, plus sample data.
+-- Existing databases are upgraded incrementally with `python migrate.py`;
+-- a database created from this file should first run `python migrate.py --baseline 10`.
 
 CREATE DATABASE IF NOT EXISTS edutrack_lms;
 USE edutrack_lms;
@@ -11,23 +15,35 @@ CREATE TABLE IF NOT EXISTS users (
     email VARCHAR(120) UNIQUE NOT NULL,
     password VARCHAR(255) NOT NULL,
     role VARCHAR(20) NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Keyset pagination for /api/users (newest first, optionally by role)
+    INDEX idx_users_created (created_at, id),
+    INDEX idx_users_role_created (role, created_at, id),
+    INDEX idx_users_name (name)
 );
 
 -- Courses table
 CREATE TABLE IF NOT EXISTS courses (
     id VARCHAR(50) PRIMARY KEY,
+    num INT NOT NULL AUTO_INCREMENT UNIQUE,  -- compact key used by the hot tables
     title VARCHAR(200) NOT NULL,
     description TEXT,
     level VARCHAR(50),
     created_by VARCHAR(120),
+    content_version INT NOT NULL DEFAULT 1,  -- bumped on lesson/quiz changes; drives the course ETag
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Keyset pagination for /api/courses (newest first, optionally by level / creator)
+    INDEX idx_courses_created (created_at, id),
+    INDEX idx_courses_level_created (level, created_at, id),
+    INDEX idx_courses_creator_created (created_by, created_at, id),
+    INDEX idx_courses_title (title),
     FOREIGN KEY (created_by) REFERENCES users(email) ON DELETE SET NULL
 );
 
 -- Lessons table
 CREATE TABLE IF NOT EXISTS lessons (
     id VARCHAR(50) PRIMARY KEY,
+    num INT NOT NULL AUTO_INCREMENT UNIQUE,  -- compact key used by lesson_completions
     course_id VARCHAR(50) NOT NULL,
     title VARCHAR(200) NOT NULL,
     description TEXT,
@@ -52,51 +68,141 @@ CREATE TABLE IF NOT EXISTS quiz_questions (
 );
 
 -- Enrollments table
+-- The hot tables below are keyed by users.id, courses.num and lessons.num;
+-- the API still takes emails and slug ids and maps them (key_map.py)
 CREATE TABLE IF NOT EXISTS enrollments (
     id INT PRIMARY KEY AUTO_INCREMENT,
-    student_email VARCHAR(120) NOT NULL,
-    course_id VARCHAR(50) NOT NULL,
+    student_id INT NOT NULL,
+    course_num INT NOT NULL,
     enrolled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (student_email) REFERENCES users(email) ON DELETE CASCADE,
-    FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
-    UNIQUE KEY unique_enrollment (student_email, course_id)
+    UNIQUE KEY uq_enrollments_student_course (student_id, course_num),
+    INDEX idx_enrollments_course_student (course_num, student_id),
+    CONSTRAINT fk_enrollments_student FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE,
+    CONSTRAINT fk_enrollments_course FOREIGN KEY (course_num) REFERENCES courses(num) ON DELETE CASCADE
 );
 
 -- Lesson completion tracking
 CREATE TABLE IF NOT EXISTS lesson_completions (
     id INT PRIMARY KEY AUTO_INCREMENT,
-    student_email VARCHAR(120) NOT NULL,
-    course_id VARCHAR(50) NOT NULL,
-    lesson_id VARCHAR(50) NOT NULL,
+    student_id INT NOT NULL,
+    course_num INT NOT NULL,
+    lesson_num INT NOT NULL,
     completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (student_email) REFERENCES users(email) ON DELETE CASCADE,
-    FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
-    FOREIGN KEY (lesson_id) REFERENCES lessons(id) ON DELETE CASCADE,
-    UNIQUE KEY unique_completion (student_email, lesson_id)
+    UNIQUE KEY uq_completions_student_lesson (student_id, lesson_num),
+    INDEX idx_completions_student_course (student_id, course_num, lesson_num),
+    INDEX idx_completions_course (course_num),
+    INDEX idx_completions_lesson (lesson_num),
+    CONSTRAINT fk_lesson_completions_student FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE,
+    CONSTRAINT fk_lesson_completions_course FOREIGN KEY (course_num) REFERENCES courses(num) ON DELETE CASCADE,
+    CONSTRAINT fk_lesson_completions_lesson FOREIGN KEY (lesson_num) REFERENCES lessons(num) ON DELETE CASCADE
 );
 
 -- Quiz results table
 CREATE TABLE IF NOT EXISTS quiz_results (
     id INT PRIMARY KEY AUTO_INCREMENT,
-    student_email VARCHAR(120) NOT NULL,
-    course_id VARCHAR(50) NOT NULL,
+    student_id INT NOT NULL,
+    course_num INT NOT NULL,
     score INT NOT NULL,
     total INT NOT NULL,
     submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (student_email) REFERENCES users(email) ON DELETE CASCADE,
+    INDEX idx_quiz_results_student_course_at (student_id, course_num, submitted_at),
+    INDEX idx_quiz_results_course (course_num),
+    CONSTRAINT fk_quiz_results_student FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE,
+    CONSTRAINT fk_quiz_results_course FOREIGN KEY (course_num) REFERENCES courses(num) ON DELETE CASCADE
+);
+
+-- Latest and best attempt per student/course, maintained on every submission
+CREATE TABLE IF NOT EXISTS quiz_latest (
+    student_id INT NOT NULL,
+    course_num INT NOT NULL,
+    last_score INT NOT NULL,
+    last_total INT NOT NULL,
+    last_submitted_at TIMESTAMP NOT NULL,
+    best_score INT NOT NULL,
+    best_total INT NOT NULL,
+    best_submitted_at TIMESTAMP NOT NULL,
+    best_permille INT NOT NULL,            -- best_score * 1000 / best_total, for comparisons
+    attempts INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (student_id, course_num),
+    INDEX idx_quiz_latest_course (course_num),
+    CONSTRAINT fk_quiz_latest_student FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE,
+    CONSTRAINT fk_quiz_latest_course FOREIGN KEY (course_num) REFERENCES courses(num) ON DELETE CASCADE
+);
+
+-- Attempts per course by whole percent score (0-100), for analytics
+CREATE TABLE IF NOT EXISTS quiz_score_histogram (
+    course_id VARCHAR(50) NOT NULL,
+    percent TINYINT UNSIGNED NOT NULL,
+    attempts INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (course_id, percent),
     FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
 );
 
 -- Course progress table
 CREATE TABLE IF NOT EXISTS course_progress (
     id INT PRIMARY KEY AUTO_INCREMENT,
-    student_email VARCHAR(120) NOT NULL,
-    course_id VARCHAR(50) NOT NULL,
+    student_id INT NOT NULL,
+    course_num INT NOT NULL,
     progress INT DEFAULT 0,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    FOREIGN KEY (student_email) REFERENCES users(email) ON DELETE CASCADE,
-    FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
-    UNIQUE KEY unique_progress (student_email, course_id)
+    UNIQUE KEY uq_progress_student_course (student_id, course_num),
+    INDEX idx_progress_course (course_num),
+    CONSTRAINT fk_course_progress_student FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE,
+    CONSTRAINT fk_course_progress_course FOREIGN KEY (course_num) REFERENCES courses(num) ON DELETE CASCADE
+);
+
+-- Per-course aggregates, kept current by the API write routes so the
+-- catalog never has to COUNT(*) per course. Repair drift with:
+--   python course_stats.py --rebuild
+CREATE TABLE IF NOT EXISTS course_stats (
+    course_id VARCHAR(50) PRIMARY KEY,
+    lesson_count INT NOT NULL DEFAULT 0,
+    quiz_question_count INT NOT NULL DEFAULT 0,
+    enrollment_count INT NOT NULL DEFAULT 0,
+    quiz_attempt_count INT NOT NULL DEFAULT 0,
+    quiz_score_sum BIGINT NOT NULL DEFAULT 0,
+    quiz_total_sum BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
+);
+
+-- Platform-wide counters for the admin dashboard (see platform_stats.py).
+-- Each counter is spread over several slot rows; readers sum them. Starts
+-- empty: the backend fills it on its first reconcile.
+CREATE TABLE IF NOT EXISTS platform_stats (
+    stat VARCHAR(32) NOT NULL,
+    bucket VARCHAR(50) NOT NULL DEFAULT '',
+    slot TINYINT UNSIGNED NOT NULL DEFAULT 0,
+    value BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (stat, bucket, slot)
+);
+
+-- Each student's last activity, for the active-student counts
+CREATE TABLE IF NOT EXISTS student_activity (
+    student_id INT PRIMARY KEY,
+    last_active_at TIMESTAMP NOT NULL,
+    INDEX idx_student_activity_at (last_active_at),
+    CONSTRAINT fk_student_activity_student FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Change log behind the SSE feed; write routes add a row in the write's
+-- transaction, every backend process polls it, old rows are pruned
+CREATE TABLE IF NOT EXISTS change_events (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    kind VARCHAR(32) NOT NULL,
+    student_id INT NOT NULL,
+    course_num INT NOT NULL,
+    data VARCHAR(255) NOT NULL DEFAULT '{}',
+    created_at TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    INDEX idx_change_events_created (created_at)
+);
+
+-- Revoked session tokens (logout); rows can be dropped once expired
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    jti CHAR(32) PRIMARY KEY,
+    expires_at TIMESTAMP NOT NULL,
+    INDEX idx_revoked_expires (expires_at)
 );
 
 -- Insert sample users (Admin and Teachers)
@@ -137,3 +243,11 @@ INSERT INTO quiz_questions (course_id, question, option1, option2, option3, opti
 ('python-beginners', 'What is the correct file extension for Python files?', '.pt', '.py', '.js', '.python', 1),
 ('data-structures', 'Which data structure works on FIFO?', 'Stack', 'Queue', 'Array', 'Tree', 1),
 ('data-structures', 'Which of these is a linear data structure?', 'Graph', 'Tree', 'Array', 'Hash table', 2);
+
+-- Initialise aggregates for the sample data
+INSERT INTO course_stats (course_id, lesson_count, quiz_question_count)
+SELECT c.id,
+       (SELECT COUNT(*) FROM lessons l WHERE l.course_id = c.id),
+       (SELECT COUNT(*) FROM quiz_questions q WHERE q.course_id = c.id)
+FROM courses c
+ON DUPLICATE KEY UPDATE lesson_count = VALUES(lesson_count), quiz_question_count = VALUES(quiz_question_count);
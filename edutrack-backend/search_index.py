@@ -0,0 +1,263 @@
+import re
+import math
+import time
+import heapq
+import bisect
+import threading
+import unicodedata
+
+_WORD = re.compile(r"[^\W_]+")
+
+STOPWORDS = frozenset("a an and are as at be by for from in into is it of on or the this to with".split())
+
+# Score per occurrence by field; a field counts at most MAX_FIELD_HITS times per token
+FIELD_WEIGHTS = {"title": 5.0, "level": 3.0, "lessons": 2.0, "description": 1.0}
+MAX_FIELD_HITS = 3
+
+PREFIX_MIN = 2          # shorter query tokens only match whole words
+MAX_EXPANSIONS = 100    # words a single prefix may expand to
+PREFIX_FACTOR = 0.5     # a prefix hit scores at most half an exact one
+
+BUILD_RETRY = 10.0      # seconds before retrying a failed build
+
+COURSE_FIELDS = ("id", "title", "description", "level", "created_by")
+
+
+def tokenize(text):
+    """Lowercased, accent-folded words, minus stopwords"""
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", str(text).casefold())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return [w for w in _WORD.findall(text) if w not in STOPWORDS]
+
+
+class _Index:
+    """Postings for one generation of the catalog; callers hold the SearchIndex lock"""
+
+    def __init__(self):
+        self.docs = {}          # course_id -> {"course": {...}, "lessons": {lesson_id: title}}
+        self.postings = {}      # word -> {course_id: weight}
+        self.doc_words = {}     # course_id -> {word: weight}, to unindex a course
+        self.vocab = []         # sorted words, for prefix ranges
+
+    def put_course(self, course):
+        course = {f: course.get(f) for f in COURSE_FIELDS}
+        lessons = self.docs.get(course["id"], {}).get("lessons", {})
+        self.docs[course["id"]] = {"course": course, "lessons": lessons}
+        self._reindex(course["id"])
+
+    def remove_course(self, course_id):
+        self._unindex(course_id)
+        self.docs.pop(course_id, None)
+
+    def put_lesson(self, course_id, lesson_id, title):
+        doc = self.docs.get(course_id)
+        if doc is not None:
+            doc["lessons"][lesson_id] = title
+            self._reindex(course_id)
+
+    def remove_lesson(self, course_id, lesson_id):
+        doc = self.docs.get(course_id)
+        if doc is not None and doc["lessons"].pop(lesson_id, None) is not None:
+            self._reindex(course_id)
+
+    def _reindex(self, course_id):
+        self._unindex(course_id)
+        doc = self.docs[course_id]
+        fields = {
+            "title": tokenize(doc["course"]["title"]),
+            "level": tokenize(doc["course"]["level"]),
+            "description": tokenize(doc["course"]["description"]),
+            "lessons": [w for title in doc["lessons"].values() for w in tokenize(title)],
+        }
+        weights = {}
+        for field, words in fields.items():
+            counts = {}
+            for w in words:
+                counts[w] = counts.get(w, 0) + 1
+            for w, n in counts.items():
+                weights[w] = weights.get(w, 0.0) + FIELD_WEIGHTS[field] * min(n, MAX_FIELD_HITS)
+
+        self.doc_words[course_id] = weights
+        for w, weight in weights.items():
+            posting = self.postings.get(w)
+            if posting is None:
+                posting = self.postings[w] = {}
+                bisect.insort(self.vocab, w)
+            posting[course_id] = weight
+
+    def _unindex(self, course_id):
+        for w in self.doc_words.pop(course_id, {}):
+            posting = self.postings[w]
+            del posting[course_id]
+            if not posting:
+                del self.postings[w]
+                del self.vocab[bisect.bisect_left(self.vocab, w)]
+
+    def expand(self, term):
+        """[(word, factor)] the query term matches: itself, plus words it prefixes"""
+        matches = [(term, 1.0)] if term in self.postings else []
+        if len(term) < PREFIX_MIN:
+            return matches
+        i = bisect.bisect_right(self.vocab, term)
+        for w in self.vocab[i:i + MAX_EXPANSIONS]:
+            if not w.startswith(term):
+                break
+            matches.append((w, PREFIX_FACTOR * len(term) / len(w)))
+        return matches
+
+    def search(self, terms, level=None, limit=20):
+        n = len(self.docs)
+        scores = None
+        for term in terms:
+            # Best-scoring expansion of this term per course (tf * idf * prefix factor)
+            best = {}
+            for w, factor in self.expand(term):
+                posting = self.postings[w]
+                idf = math.log(1 + n / len(posting))
+                for course_id, weight in posting.items():
+                    s = weight * idf * factor
+                    if s > best.get(course_id, 0.0):
+                        best[course_id] = s
+            # Every term has to match
+            if scores is None:
+                scores = best
+            else:
+                scores = {c: s + best[c] for c, s in scores.items() if c in best}
+            if not scores:
+                return 0, []
+
+        if level:
+            level = level.casefold()
+            scores = {c: s for c, s in scores.items()
+                      if (self.docs[c]["course"]["level"] or "").casefold() == level}
+        top = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+        return len(scores), [{**self.docs[c]["course"], "score": round(s, 3)} for c, s in top]
+
+
+class SearchIndex:
+    """In-process inverted index over course title, description, level and lesson titles.
+
+    Built from `loader` (returning (courses, lessons) rows) on start() and
+    rebuilt in the background every `refresh_interval` seconds, so writes
+    served by other processes show up too. Writes served by this process
+    update it immediately through put_course / remove_course / put_lesson /
+    remove_lesson; updates that land during a rebuild are replayed onto the
+    new generation before it is swapped in.
+    """
+
+    def __init__(self, loader, refresh_interval=300.0):
+        self._loader = loader
+        self.refresh_interval = refresh_interval
+        self._index = _Index()
+        self._lock = threading.Lock()
+        self._built = threading.Event()
+        self._rebuilding = False
+        self._replay = []           # updates made while a rebuild is loading
+        self._built_at = None
+        self._next_refresh = 0.0
+
+        self.builds = 0
+        self.build_errors = 0
+        self.last_build_ms = 0.0
+        self.searches = 0
+
+    # ---------- building ----------
+
+    def start(self):
+        """Build in the background; searches wait for the first build"""
+        self._refresh_async()
+
+    def _refresh_async(self):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+            self._replay = []
+        threading.Thread(target=self._rebuild, name="search-index", daemon=True).start()
+
+    def _rebuild(self):
+        started = time.monotonic()
+        try:
+            courses, lessons = self._loader()
+            fresh = _Index()
+            for course in courses:
+                fresh.docs[course["id"]] = {"course": {f: course.get(f) for f in COURSE_FIELDS}, "lessons": {}}
+            for lesson in lessons:
+                doc = fresh.docs.get(lesson["course_id"])
+                if doc is not None:
+                    doc["lessons"][lesson["id"]] = lesson["title"]
+            for course_id in fresh.docs:
+                fresh._reindex(course_id)
+        except Exception as e:
+            # Keep serving the last generation; retry after BUILD_RETRY
+            print("SEARCH INDEX BUILD ERROR:", e)
+            with self._lock:
+                self.build_errors += 1
+                self._next_refresh = time.monotonic() + min(BUILD_RETRY, self.refresh_interval)
+                self._rebuilding = False
+            self._built.set()
+            return
+        with self._lock:
+            for op, args in self._replay:
+                getattr(fresh, op)(*args)
+            self._index = fresh
+            self._replay = []
+            self._rebuilding = False
+            self._built_at = time.monotonic()
+            self._next_refresh = self._built_at + self.refresh_interval
+            self.builds += 1
+            self.last_build_ms = round((self._built_at - started) * 1000, 1)
+        self._built.set()
+
+    def _apply(self, op, *args):
+        with self._lock:
+            getattr(self._index, op)(*args)
+            if self._rebuilding:
+                self._replay.append((op, args))
+
+    # ---------- incremental updates ----------
+
+    def put_course(self, course):
+        self._apply("put_course", dict(course))
+
+    def remove_course(self, course_id):
+        self._apply("remove_course", course_id)
+
+    def put_lesson(self, course_id, lesson_id, title):
+        self._apply("put_lesson", course_id, lesson_id, title)
+
+    def remove_lesson(self, course_id, lesson_id):
+        self._apply("remove_lesson", course_id, lesson_id)
+
+    # ---------- queries ----------
+
+    def search(self, query, level=None, limit=20, wait=5.0):
+        """(total matches, ranked course dicts with a score); every query word must match"""
+        if not self._built.wait(wait):
+            raise TimeoutError("Search index is still building")
+        if time.monotonic() >= self._next_refresh:
+            self._refresh_async()
+        if not self.builds:
+            raise RuntimeError("Search index unavailable")
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return 0, []
+        with self._lock:
+            self.searches += 1
+            return self._index.search(terms, level=level, limit=limit)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "courses": len(self._index.docs),
+                "lessons": sum(len(d["lessons"]) for d in self._index.docs.values()),
+                "words": len(self._index.vocab),
+                "builds": self.builds,
+                "build_errors": self.build_errors,
+                "last_build_ms": self.last_build_ms,
+                "age_s": round(time.monotonic() - self._built_at, 1) if self._built_at is not None else None,
+                "rebuilding": self._rebuilding,
+                "searches": self.searches,
+            }
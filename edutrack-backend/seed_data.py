@@ -0,0 +1,312 @@
+"""Generate and bulk-load synthetic data at production-like scale.
+
+Course popularity follows a Zipf curve (a few hot courses take most
+enrollments) and student activity is exponential (most students take a
+couple of courses, a few take dozens). Rows go in as multi-row INSERTs, or
+with --load-data as LOAD DATA LOCAL INFILE (needs local_infile=ON on the
+server). Every seeded user shares one precomputed bcrypt hash of --password.
+
+    python seed_data.py                                     # defaults below
+    python seed_data.py --students 100000 --courses 2000 --lessons 50000 --enrollments 2000000
+    python seed_data.py --clear                             # remove previously seeded rows
+
+Seeded accounts are student<N>@seed.edutrack.test / teacher<N>@seed.edutrack.test,
+seeded courses are seed-<N>; the sample data from schema.sql is left alone.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import itertools
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+import bcrypt
+import mysql.connector
+
+from course_stats import rebuild, rebuild_quiz_summaries
+
+SEED_DOMAIN = "seed.edutrack.test"
+LEVELS = ["Beginner", "Intermediate", "Advanced"]
+TOPICS = ["Python", "JavaScript", "SQL", "Data Science", "Web Design", "Machine Learning", "Networking",
+          "Cloud", "Security", "Statistics", "Algorithms", "DevOps", "Mobile", "UX", "Databases"]
+
+
+class InsertWriter:
+    """Buffers rows for one table and writes them as multi-row INSERTs of `batch` rows"""
+
+    def __init__(self, conn, table, columns, batch):
+        self.conn = conn
+        self.cur = conn.cursor()
+        self.table = table
+        self.columns = columns
+        self.batch = batch
+        self.rows = []
+        self.count = 0
+        self.seconds = 0.0
+        self._row_sql = "(" + ", ".join(["%s"] * len(columns)) + ")"
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        started = time.monotonic()
+        sql = (f"INSERT INTO {self.table} ({', '.join(self.columns)}) VALUES "
+               + ", ".join([self._row_sql] * len(self.rows)))
+        self.cur.execute(sql, [v for row in self.rows for v in row])
+        self.conn.commit()
+        self.seconds += time.monotonic() - started
+        self.count += len(self.rows)
+        self.rows = []
+
+    def close(self):
+        self.flush()
+        self.cur.close()
+
+
+class InfileWriter:
+    """Spools rows to a tab-separated temp file and loads it with LOAD DATA LOCAL INFILE on close"""
+
+    def __init__(self, conn, table, columns, batch=None):
+        self.conn = conn
+        self.table = table
+        self.columns = columns
+        self.count = 0
+        self.seconds = 0.0
+        self.file = tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=f".{table}.tsv", delete=False)
+
+    @staticmethod
+    def _field(value):
+        if value is None:
+            return "\\N"
+        return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+    def add(self, row):
+        self.file.write("\t".join(self._field(v) for v in row) + "\n")
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+        started = time.monotonic()
+        try:
+            cur = self.conn.cursor()
+            cur.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE {self.table} "
+                f"FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' ({', '.join(self.columns)})",
+                (self.file.name,)
+            )
+            self.conn.commit()
+            cur.close()
+        finally:
+            os.unlink(self.file.name)
+        self.seconds += time.monotonic() - started
+
+
+def zipf_cum_weights(n, s):
+    """Cumulative Zipf weights for ranks 1..n, for random.choices(cum_weights=...)"""
+    return list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+
+
+def ts(dt):
+    return dt.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def spread(rng, start, end):
+    return start + timedelta(seconds=rng.uniform(0, (end - start).total_seconds()))
+
+
+def lookup(conn, sql, params=()):
+    """{key: id} from a two-column query"""
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    found = dict(cur.fetchall())
+    cur.close()
+    return found
+
+
+def generate(args, writer_cls, conn):
+    rng = random.Random(args.seed)
+    now = datetime.now().replace(microsecond=0)
+    year_ago = now - timedelta(days=365)
+
+    print(f"[*] Hashing '{args.password}' once (cost {args.bcrypt_rounds})...")
+    password_hash = bcrypt.hashpw(args.password.encode("utf-8"), bcrypt.gensalt(rounds=args.bcrypt_rounds)).decode()
+
+    def writer(table, columns):
+        return writer_cls(conn, table, columns, args.batch)
+
+    users = writer("users", ("name", "email", "password", "role", "created_at"))
+    courses = writer("courses", ("id", "title", "description", "level", "created_by", "created_at"))
+    lessons = writer("lessons", ("id", "course_id", "title", "description", "url", "position", "created_at"))
+    questions = writer("quiz_questions", ("course_id", "question", "option1", "option2", "option3", "option4",
+                                          "correct_answer", "created_at"))
+    enrollments = writer("enrollments", ("student_id", "course_num", "enrolled_at"))
+    progress = writer("course_progress", ("student_id", "course_num", "progress", "updated_at"))
+    completions = writer("lesson_completions", ("student_id", "course_num", "lesson_num", "completed_at"))
+    attempts = writer("quiz_results", ("student_id", "course_num", "score", "total", "submitted_at"))
+    writers = [users, courses, lessons, questions, enrollments, progress, completions, attempts]
+
+    # Users
+    teachers = [f"teacher{i}@{SEED_DOMAIN}" for i in range(1, args.teachers + 1)]
+    for i, email in enumerate(teachers, 1):
+        users.add((f"Seed Teacher {i}", email, password_hash, "teacher", ts(spread(rng, year_ago, now))))
+    students = []
+    for i in range(1, args.students + 1):
+        email = f"student{i}@{SEED_DOMAIN}"
+        created = spread(rng, year_ago, now)
+        students.append((email, created))
+        users.add((f"Seed Student {i}", email, password_hash, "student", ts(created)))
+    users.close()
+    # The hot tables are keyed by users.id / courses.num / lessons.num, assigned by MySQL
+    user_ids = lookup(conn, "SELECT email, id FROM users WHERE email LIKE %s", (f"%@{SEED_DOMAIN}",))
+    students = [(user_ids[email], created) for email, created in students]
+
+    # Courses, lessons and quiz questions; course_ids are in popularity order (seed-1 is the hottest)
+    course_ids = [f"seed-{i}" for i in range(1, args.courses + 1)]
+    course_created = {}
+    lesson_counts = {}
+    question_counts = {}
+    mean_lessons = args.lessons / max(1, args.courses)
+    for i, course_id in enumerate(course_ids, 1):
+        created = spread(rng, year_ago, now - timedelta(days=7))
+        course_created[course_id] = created
+        topic = rng.choice(TOPICS)
+        courses.add((course_id, f"{topic} {i}", f"Synthetic {topic} course #{i}", rng.choice(LEVELS),
+                     rng.choice(teachers) if teachers else None, ts(created)))
+
+        n_lessons = max(1, round(rng.gauss(mean_lessons, mean_lessons / 3)))
+        lesson_counts[course_id] = n_lessons
+        for pos in range(1, n_lessons + 1):
+            lessons.add((f"{course_id}-l{pos}", course_id, f"Lesson {pos}", f"Lesson {pos} of {course_id}",
+                         f"https://example.com/{course_id}/{pos}", pos, ts(created + timedelta(minutes=pos))))
+
+        question_counts[course_id] = args.questions_per_course
+        for q in range(1, args.questions_per_course + 1):
+            questions.add((course_id, f"Question {q} for {course_id}?", "Option A", "Option B", "Option C",
+                           "Option D", rng.randint(0, 3), ts(created)))
+    for w in (courses, lessons, questions):
+        w.close()
+    course_nums = lookup(conn, "SELECT id, num FROM courses WHERE id LIKE 'seed-%'")
+    lesson_nums = lookup(conn, "SELECT id, num FROM lessons WHERE course_id LIKE 'seed-%'")
+
+    # Enrollments with progress, completions and quiz attempts
+    cum_weights = zipf_cum_weights(len(course_ids), args.skew)
+    total_weight = cum_weights[-1]
+    mean_enrollments = args.enrollments / max(1, args.students)
+    for student_id, joined in students:
+        k = min(len(course_ids), int(rng.expovariate(1 / mean_enrollments) + 0.5)) if mean_enrollments else 0
+        chosen = set()
+        while len(chosen) < k:
+            chosen.add(course_ids[bisect_left(cum_weights, rng.random() * total_weight)])
+
+        for course_id in chosen:
+            course_num = course_nums[course_id]
+            enrolled = spread(rng, max(joined, course_created[course_id]), now)
+            enrollments.add((student_id, course_num, ts(enrolled)))
+
+            n_lessons = lesson_counts[course_id]
+            done = min(n_lessons, int(rng.betavariate(1.2, 1.2 / args.completion_rate - 1.2) * (n_lessons + 1)))
+            pct = round(100 * done / n_lessons)
+            when = enrolled
+            for pos in range(1, done + 1):
+                when = spread(rng, when, min(now, when + timedelta(days=3)))
+                completions.add((student_id, course_num, lesson_nums[f"{course_id}-l{pos}"], ts(when)))
+            progress.add((student_id, course_num, pct, ts(when)))
+
+            total = question_counts[course_id]
+            if total and rng.random() < args.quiz_rate:
+                for _ in range(rng.choice((1, 1, 1, 2, 2, 3))):
+                    when = spread(rng, when, min(now, when + timedelta(days=2)))
+                    score = sum(rng.random() < 0.35 + 0.6 * pct / 100 for _ in range(total))
+                    attempts.add((student_id, course_num, score, total, ts(when)))
+
+    for w in (enrollments, progress, completions, attempts):
+        w.close()
+    return writers
+
+
+def clear(conn):
+    """Delete seeded users and courses; everything else cascades"""
+    cur = conn.cursor()
+    cur.execute("DELETE FROM courses WHERE id LIKE 'seed-%'")
+    courses = cur.rowcount
+    cur.execute("DELETE FROM users WHERE email LIKE %s", (f"%@{SEED_DOMAIN}",))
+    users = cur.rowcount
+    conn.commit()
+    cur.close()
+    print(f"Removed {courses} seeded courses and {users} seeded users (dependent rows cascaded)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load synthetic EduTrack data")
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--teachers", type=int, default=200)
+    parser.add_argument("--courses", type=int, default=500)
+    parser.add_argument("--lessons", type=int, default=10000, help="total lessons across all courses")
+    parser.add_argument("--questions-per-course", type=int, default=5)
+    parser.add_argument("--enrollments", type=int, default=100000, help="approximate total")
+    parser.add_argument("--completion-rate", type=float, default=0.35, help="mean fraction of lessons completed")
+    parser.add_argument("--quiz-rate", type=float, default=0.4, help="share of enrollments with quiz attempts")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for course popularity")
+    parser.add_argument("--batch", type=int, default=2000, help="rows per INSERT statement")
+    parser.add_argument("--load-data", action="store_true", help="use LOAD DATA LOCAL INFILE")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--bcrypt-rounds", type=int, default=int(os.environ.get("BCRYPT_ROUNDS", 12)))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--clear", action="store_true", help="remove seeded rows and exit")
+    args = parser.parse_args()
+    if not 0 < args.completion_rate < 1:
+        parser.error("--completion-rate must be between 0 and 1")
+
+    conn = mysql.connector.connect(
+        host='localhost',
+        user='root',
+        password='040506',
+        database='edutrack_lms',
+        allow_local_infile=args.load_data,
+    )
+
+    if args.clear:
+        clear(conn)
+        conn.close()
+        return 0
+
+    cur = conn.cursor()
+    # Checks are redundant for generated data and dominate bulk-load time; session-scoped only
+    cur.execute("SET SESSION foreign_key_checks = 0, unique_checks = 0")
+
+    started = time.monotonic()
+    writers = generate(args, InfileWriter if args.load_data else InsertWriter, conn)
+    loaded = time.monotonic() - started
+
+    print("\n=== LOADED ===")
+    for w in writers:
+        rate = w.count / w.seconds if w.seconds else 0
+        print(f"  {w.table:<20} {w.count:>12,} rows  {w.seconds:8.1f}s in MySQL  {rate:>10,.0f} rows/s")
+
+    print("\n[*] Rebuilding course_stats, quiz_latest and quiz_score_histogram...")
+    cur.execute("SET SESSION foreign_key_checks = 1, unique_checks = 1")
+    agg_started = time.monotonic()
+    rebuild(cur)
+    rebuild_quiz_summaries(cur)
+    conn.commit()
+    for table in ("users", "courses", "lessons", "enrollments", "lesson_completions", "quiz_results",
+                  "course_progress"):
+        cur.execute(f"ANALYZE TABLE {table}")
+        cur.fetchall()
+    cur.close()
+    conn.close()
+
+    print(f"\nDone: {sum(w.count for w in writers):,} rows loaded in {loaded:.1f}s, "
+          f"aggregates rebuilt in {time.monotonic() - agg_started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,53 +1,43 @@
+import sys
 import mysql.connector
-import re
 
-# Connect to MySQL (not to specific database)
+import migrate
+
+# Connect to MySQL (not to specific database) to create it
 conn = mysql.connector.connect(
     host='localhost',
     user='root',
     password='040506'
 )
-
 cur = conn.cursor()
+cur.execute("CREATE DATABASE IF NOT EXISTS edutrack_lms")
+cur.close()
+conn.close()
 
-# Read schema file
-with open('schema.sql', 'r', encoding='utf-8') as f:
-    schema = f.read()
-
-# Remove comments
-schema = re.sub(r'--.*$', '', schema, flags=re.MULTILINE)
-
-# Split statements more carefully
-statements = []
-current_statement = []
-
-for line in schema.split('\n'):
-    line = line.strip()
-    if not line:
-        continue
-    
-    current_statement.append(line)
-    
-    # Check if line ends with semicolon
-    if line.endswith(';'):
-        stmt = ' '.join(current_statement)
-        if stmt:
-            statements.append(stmt)
-        current_statement = []
+# Bring the schema up to date through the versioned migrations
+conn = migrate.connect()
+handled = migrate.migrate(conn)
+print(f"\nApplied {handled} migration(s)")
 
-# Execute each statement
-for i, statement in enumerate(statements, 1):
-    if statement.strip():
-        try:
+# Load the sample data from schema.sql into a fresh database
+cur = conn.cursor()
+cur.execute("SELECT COUNT(*) FROM users")
+if cur.fetchone()[0] == 0:
+    with open('schema.sql', 'r', encoding='utf-8') as f:
+        statements = [s for s in migrate.split_sql(f.read()) if s.upper().startswith("INSERT")]
+    try:
+        for i, statement in enumerate(statements, 1):
             cur.execute(statement)
-            conn.commit()
-            # Show what was executed
-            stmt_preview = statement[:80].replace('\n', ' ')
-            print(f"[{i}] {stmt_preview}...")
-        except Exception as e:
-            print(f"[ERROR] Statement {i}: {e}")
-            print(f"   {statement[:150]}...")
-
-print(f"\n✅ Database setup complete! Executed {len(statements)} statements.")
+            print(f"[{i}] {' '.join(statement.split())[:80]}...")
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"[ERROR] Sample data: {e}")
+        sys.exit(1)
+    print(f"Loaded {len(statements)} sample data statements")
+else:
+    print("Database already has users, skipping sample data")
+
+print("\n✅ Database setup complete!")
 cur.close()
 conn.close()
@@ -0,0 +1,238 @@
+"""Slow-query log and report.
+
+The backend appends every statement slower than SLOW_QUERY_MS to a JSON-lines
+log, with its parameter shape (never the values), duration and calling route,
+plus an EXPLAIN the first time each query fingerprint shows up.
+
+    python slow_queries.py                       # rank fingerprints by total time
+    python slow_queries.py --top 5 other.jsonl   # another log, top 5 only
+"""
+import os
+import re
+import sys
+import json
+import time
+import queue
+import hashlib
+import threading
+
+DEFAULT_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "slow_queries.jsonl")
+
+# Statements MySQL can EXPLAIN without running them
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "REPLACE", "UPDATE", "DELETE")
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+_ROW_LIST = re.compile(r"(\(\s*(?:%s\s*,\s*)*%s\s*\))(?:\s*,\s*\(\s*(?:%s\s*,\s*)*%s\s*\))+")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """Normalise a statement so calls differing only in literals or list lengths group together"""
+    fp = _STRING.sub("?", sql)
+    fp = _NUMBER.sub("?", fp)
+    fp = _IN_LIST.sub("IN (...)", fp)
+    fp = _ROW_LIST.sub(r"\1, ...", fp)
+    return _SPACE.sub(" ", fp).strip()
+
+
+def fingerprint_id(fp):
+    return hashlib.sha1(fp.encode("utf-8")).hexdigest()[:12]
+
+
+def params_shape(params):
+    """Types of the bound parameters, e.g. "(str, int)"; batches become "500 x (str, int)" """
+    if params is None:
+        return "()"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in params.items()) + "}"
+    if isinstance(params, (list, tuple)) and params and isinstance(params[0], (list, tuple, dict)):
+        return f"{len(params)} x {params_shape(params[0])}"
+    if isinstance(params, (list, tuple)):
+        if len(params) > 20:
+            return f"({len(params)} params)"
+        return "(" + ", ".join(type(p).__name__ for p in params) + ")"
+    return type(params).__name__
+
+
+class SlowQueryLog:
+    """Appends slow statements to a JSON-lines file; EXPLAINs new fingerprints on a background thread.
+
+    explain_connection is a zero-argument callable returning a connection
+    usable as a context manager (the pool's checkout), or None to skip plans.
+    """
+
+    def __init__(self, path, threshold, explain_connection=None, max_fingerprints=10000):
+        self.path = path
+        self.threshold = threshold
+        self.explain_connection = explain_connection
+        self.max_fingerprints = max_fingerprints
+        self._lock = threading.Lock()
+        self._seen = set()
+        self._explains = queue.Queue(maxsize=100)
+        self._thread = None
+        self.logged = 0
+        self.explained = 0
+
+    def record(self, sql, params, seconds, route):
+        if seconds < self.threshold:
+            return
+        fp = fingerprint(sql)
+        if fp.upper().startswith("EXPLAIN"):
+            return
+        fp_id = fingerprint_id(fp)
+        self._append({
+            "type": "query",
+            "ts": round(time.time(), 3),
+            "id": fp_id,
+            "fingerprint": fp[:2000],
+            "params": params_shape(params),
+            "ms": round(seconds * 1000, 3),
+            "route": route,
+        })
+
+        with self._lock:
+            self.logged += 1
+            first = fp_id not in self._seen and len(self._seen) < self.max_fingerprints
+            if first:
+                self._seen.add(fp_id)
+        if first and self.explain_connection is not None and fp.upper().startswith(EXPLAINABLE):
+            self._start()
+            try:
+                self._explains.put_nowait((fp_id, sql, params))
+            except queue.Full:
+                with self._lock:
+                    self._seen.discard(fp_id)   # try again next time it's slow
+
+    def _start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._explain_loop, name="slow-query-explain", daemon=True)
+                    self._thread.start()
+
+    def _explain_loop(self):
+        while True:
+            fp_id, sql, params = self._explains.get()
+            try:
+                # A separate connection: the slow statement's own may be mid-transaction or mid-stream
+                with self.explain_connection() as conn:
+                    cur = conn.cursor(dictionary=True)
+                    if params and isinstance(params, (list, tuple)) and isinstance(params[0], (list, tuple, dict)):
+                        params = params[0]    # executemany: explain the first row's statement
+                    cur.execute(f"EXPLAIN {sql}", params or ())
+                    plan = cur.fetchall()
+                    cur.close()
+                self._append({"type": "explain", "ts": round(time.time(), 3), "id": fp_id, "plan": plan})
+                with self._lock:
+                    self.explained += 1
+            except Exception as e:
+                self._append({"type": "explain", "ts": round(time.time(), 3), "id": fp_id, "error": str(e)})
+                with self._lock:
+                    self._seen.discard(fp_id)   # e.g. pool exhausted: retry when it's next slow
+
+    def _append(self, entry):
+        line = (json.dumps(entry, default=str) + "\n").encode("utf-8")
+        try:
+            # One O_APPEND write per entry, so lines from several workers don't interleave
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            print("SLOW QUERY LOG ERROR:", e)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "threshold_ms": round(self.threshold * 1000, 3),
+                "path": self.path,
+                "logged": self.logged,
+                "fingerprints": len(self._seen),
+                "explained": self.explained,
+            }
+
+
+# =============== REPORT ===============
+
+def load(path):
+    queries, plans = {}, {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get("type") == "explain":
+                plans[entry["id"]] = entry
+                continue
+            q = queries.setdefault(entry["id"], {
+                "fingerprint": entry["fingerprint"], "durations": [], "routes": {}, "params": set(),
+            })
+            q["durations"].append(entry["ms"])
+            q["routes"][entry["route"]] = q["routes"].get(entry["route"], 0) + 1
+            q["params"].add(entry["params"])
+    return queries, plans
+
+
+def plan_warnings(plan):
+    """Flag full scans, filesorts and temporary tables in an EXPLAIN result"""
+    warnings = []
+    for row in plan.get("plan") or []:
+        table = row.get("table")
+        if row.get("type") == "ALL":
+            warnings.append(f"full scan of {table} (~{row.get('rows')} rows)")
+        extra = row.get("Extra") or ""
+        if "filesort" in extra:
+            warnings.append(f"filesort on {table}")
+        if "temporary" in extra:
+            warnings.append(f"temporary table for {table}")
+    return warnings
+
+
+def main():
+    args = sys.argv[1:]
+    top = 20
+    if "--top" in args:
+        i = args.index("--top")
+        top = int(args[i + 1])
+        del args[i:i + 2]
+    path = args[0] if args else os.environ.get("SLOW_QUERY_LOG", DEFAULT_LOG)
+
+    if not os.path.exists(path):
+        print(f"No slow-query log at {path}")
+        return 1
+
+    queries, plans = load(path)
+    ranked = sorted(queries.items(), key=lambda item: sum(item[1]["durations"]), reverse=True)
+
+    print(f"\n=== SLOW QUERIES BY TOTAL TIME ({path}) ===")
+    for rank, (fp_id, q) in enumerate(ranked[:top], 1):
+        d = sorted(q["durations"])
+        p95 = d[min(len(d) - 1, int(0.95 * len(d)))]
+        print(f"\n#{rank} [{fp_id}] total={sum(d):.1f}ms count={len(d)} avg={sum(d) / len(d):.1f}ms "
+              f"p95={p95:.1f}ms max={d[-1]:.1f}ms")
+        print(f"  {q['fingerprint'][:300]}")
+        print(f"  params: {', '.join(sorted(q['params']))}")
+        print(f"  routes: {', '.join(f'{r} ({n})' for r, n in sorted(q['routes'].items(), key=lambda x: -x[1]))}")
+        plan = plans.get(fp_id)
+        if plan is None:
+            print("  plan: not captured")
+        elif plan.get("error"):
+            print(f"  plan: EXPLAIN failed: {plan['error']}")
+        else:
+            for row in plan["plan"]:
+                print(f"  plan: {row.get('table')}: type={row.get('type')} key={row.get('key')} "
+                      f"rows={row.get('rows')} {row.get('Extra') or ''}".rstrip())
+            for warning in plan_warnings(plan):
+                print(f"  !! {warning}")
+
+    total = sum(len(q["durations"]) for q in queries.values())
+    print(f"\nFingerprints: {len(queries)}, slow statements: {total}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+import pytest
+
+
+class FakeDB:
+    """Stand-in for get_db_connection(): records statements, commits and checkouts.
+
+    `on_execute(sql, params)` may raise to simulate a failing statement, or
+    return the rows the cursor then hands back from fetchone()/fetchall().
+    """
+
+    def __init__(self, on_execute=None):
+        self.on_execute = on_execute
+        self.executed = []      # every (sql, params), committed or not
+        self.commits = []       # statements of each committed transaction
+        self.checkouts = 0
+
+    def connection(self):
+        self.checkouts += 1
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+        self.statements = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.db.commits.append(self.statements)
+        self.statements = []
+
+    def rollback(self):
+        self.statements = []
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        self.conn.db.executed.append((sql, params))
+        rows = self.conn.db.on_execute(sql, params) if self.conn.db.on_execute else None
+        self.conn.statements.append((sql, params))
+        self.rows = list(rows or [])
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_db():
+    return FakeDB()
@@ -0,0 +1,221 @@
+import json
+import time
+
+import pytest
+
+from change_feed import FETCH_SQL, ChangeFeed, FeedFull, event_sql, events_sql, retry_later
+
+
+class EventsTable:
+    """change_events as the feed reads it: FETCH_SQL, MAX(id) and prune statements"""
+
+    def __init__(self):
+        self.rows = []
+        self.queries = 0
+
+    def add(self, event_id, course="c1", email="a@x.io", kind="progress"):
+        self.rows.append((event_id, kind, course, email, json.dumps({"progress": event_id}), 0))
+        self.rows.sort()
+
+    def connection(self):
+        return _Connection(self)
+
+
+class _Connection:
+    def __init__(self, table):
+        self.table = table
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def cursor(self):
+        return _Cursor(self.table)
+
+    def commit(self):
+        pass
+
+
+class _Cursor:
+    def __init__(self, table):
+        self.table = table
+        self.result = []
+
+    def execute(self, sql, params=()):
+        self.table.queries += 1
+        if sql is FETCH_SQL:
+            first, limit = params
+            self.result = [r for r in self.table.rows if r[0] >= first][:limit]
+        elif "MAX(id)" in sql:
+            self.result = [(max((r[0] for r in self.table.rows), default=0),)]
+        else:
+            self.result = []
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+def seqs(batch):
+    return [e.seq for e in batch]
+
+
+def kinds(batch):
+    return [e.frame.split("\n")[1] for e in batch]
+
+
+@pytest.fixture
+def table():
+    t = EventsTable()
+    for event_id in range(1, 11):
+        t.add(event_id)
+    return t
+
+
+def caught_up(table, **options):
+    """A feed driven by hand instead of its thread, already past its first catch-up"""
+    feed = ChangeFeed(table.connection, **{"history": 5, "gap_grace": 60.0, **options})
+    feed.subscribe(course_id="warm-up").close()
+    feed._catch_up()
+    return feed
+
+
+def test_events_sql_logs_every_event_in_one_statement():
+    sql, params = events_sql([("progress", 1, 2, {"progress": 50}), ("enroll", 3, 4, {})])
+    assert sql.count("(%s, %s, %s, %s)") == 2
+    assert params == ["progress", 1, 2, '{"progress":50}', "enroll", 3, 4, "{}"]
+    assert event_sql("quiz", 5, 6, score=3)[1] == ["quiz", 5, 6, '{"score":3}']
+
+
+def test_retry_later_spreads_the_reconnect_delay():
+    for _ in range(20):
+        delay = int(retry_later(1000).split()[1])
+        assert 2000 <= delay <= 4000
+
+
+def test_stream_opened_while_idle_waits_for_the_catch_up(table):
+    feed = ChangeFeed(table.connection, history=5)
+    sub = feed.subscribe(course_id="C1")
+    assert feed.stats()["waiting"] == 1 and not feed.stats()["polling"]
+
+    feed._catch_up()
+    assert feed.stats()["polling"] and feed.stats()["waiting"] == 0
+    assert sub.next_batch(0) == []        # a fresh stream gets nothing from before it opened
+    assert feed.last_id() == 10 and feed.stats()["history"] == 5
+
+    table.add(11)
+    table.add(12, course="other")
+    feed.poll()
+    assert seqs(sub.next_batch(0)) == [11]
+
+
+def test_resume_replays_only_the_streams_events(table):
+    feed = caught_up(table)
+    table.add(11, course="other")
+    table.add(12)
+    feed.poll()
+    sub = feed.subscribe(course_id="c1", last_event_id="9")
+    assert seqs(sub.next_batch(0)) == [10, 12]
+    assert feed.stats()["resumes"] == 1
+
+
+def test_resume_from_before_the_history_gets_a_reset(table):
+    feed = caught_up(table)
+    sub = feed.subscribe(course_id="c1", last_event_id="2")
+    batch = sub.next_batch(0)
+    assert seqs(batch) == [10] and kinds(batch) == ["event: reset"]
+    table.add(11)
+    feed.poll()
+    assert seqs(sub.next_batch(0)) == [11]
+
+
+def test_student_streams_match_case_insensitively(table):
+    feed = caught_up(table)
+    sub = feed.subscribe(student_email="A@X.io")
+    table.add(11, course="other")
+    feed.poll()
+    assert seqs(sub.next_batch(0)) == [11]
+
+
+def test_missing_id_holds_later_events_until_the_grace_runs_out(table):
+    feed = caught_up(table)
+    sub = feed.subscribe(course_id="c1")
+    table.add(12)                           # 11 has not committed yet
+    feed.poll()
+    assert sub.next_batch(0) == [] and feed.last_id() == 10
+
+    feed.gap_grace = 0.0
+    feed.poll()
+    assert seqs(sub.next_batch(0)) == [12]
+    assert feed.stats()["gaps_skipped"] == 1
+
+
+def test_gap_that_fills_within_the_grace_publishes_in_order(table):
+    feed = caught_up(table)
+    sub = feed.subscribe(course_id="c1")
+    table.add(12)
+    feed.poll()
+    table.add(11)
+    feed.poll()
+    assert seqs(sub.next_batch(0)) == [11, 12]
+    assert feed.stats()["gaps_skipped"] == 0
+
+
+def test_gaps_settled_before_the_catch_up_are_not_waited_on():
+    table = EventsTable()
+    for event_id in (1, 2, 5, 6):
+        table.add(event_id)
+    feed = caught_up(table, history=10)
+    assert feed.last_id() == 6 and feed.stats()["history"] == 4
+
+
+def test_a_stream_that_falls_behind_is_closed(table):
+    feed = caught_up(table, buffer_size=2)
+    slow = feed.subscribe(course_id="c1")
+    for event_id in (11, 12, 13):
+        table.add(event_id)
+    feed.poll()
+    assert slow.overflowed and slow.next_batch(0) is None
+    assert feed.stats()["overflows"] == 1 and feed.stats()["subscribers"] == 0
+
+
+def test_subscribers_beyond_the_cap_are_turned_away(table):
+    feed = ChangeFeed(table.connection, max_subscribers=2)
+    first = feed.subscribe(course_id="c1")
+    feed.subscribe(course_id="c2")
+    with pytest.raises(FeedFull):
+        feed.subscribe(course_id="c3")
+    first.close()                           # a pending stream frees its slot too
+    feed.subscribe(course_id="c3")
+    assert feed.stats()["rejected"] == 1 and feed.stats()["subscribers"] == 2
+
+
+def test_poller_idles_without_streams_and_catches_up_for_the_next_one(table):
+    feed = ChangeFeed(table.connection, history=5, poll_interval=0.01, idle_after=0.05)
+    feed.start()
+    try:
+        time.sleep(0.1)
+        queries = table.queries
+        time.sleep(0.1)
+        assert table.queries == queries     # parked: no polling, the prune already ran
+        assert not feed.stats()["polling"]
+
+        sub = feed.subscribe(course_id="c1")
+        assert sub.next_batch(2) == []
+        table.add(11)
+        assert seqs(sub.next_batch(2)) == [11]
+        sub.close()
+
+        deadline = time.time() + 2
+        while feed.stats()["polling"] and time.time() < deadline:
+            time.sleep(0.01)
+        assert not feed.stats()["polling"] and feed.stats()["catch_ups"] == 1
+    finally:
+        feed.close()
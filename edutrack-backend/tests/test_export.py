@@ -0,0 +1,73 @@
+import csv
+import gzip
+import io
+import json
+
+from export import FORMATS, csv_chunks, gzip_chunks, iter_rows, ndjson_chunks
+
+
+def test_csv_header_only_when_there_are_no_rows():
+    assert b"".join(csv_chunks(["a", "b"], [])) == b"a,b\r\n"
+
+
+def test_csv_chunks_split_on_row_count_and_reassemble():
+    rows = [(i, f"name {i}") for i in range(5)]
+    chunks = list(csv_chunks(["id", "name"], rows, chunk_rows=2))
+    assert len(chunks) == 3
+    parsed = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert parsed == [["id", "name"]] + [[str(i), f"name {i}"] for i in range(5)]
+
+
+def test_csv_quotes_commas_newlines_and_unicode():
+    rows = [("Ana, María", "line\nbreak")]
+    parsed = list(csv.reader(io.StringIO(b"".join(csv_chunks(["a", "b"], rows)).decode("utf-8"))))
+    assert parsed[1] == ["Ana, María", "line\nbreak"]
+
+
+def test_csv_no_trailing_empty_chunk_on_exact_multiple():
+    chunks = list(csv_chunks(["id"], [(1,), (2,)], chunk_rows=1))
+    assert all(chunks) and len(chunks) == 2
+
+
+def test_ndjson_chunks_one_object_per_line():
+    rows = [(1, "x"), (2, None)]
+    lines = b"".join(ndjson_chunks(["id", "v"], rows, chunk_rows=1)).decode().splitlines()
+    assert [json.loads(line) for line in lines] == [{"id": 1, "v": "x"}, {"id": 2, "v": None}]
+
+
+def test_gzip_chunks_is_one_valid_member():
+    chunks = [b"hello ", b"", b"world\n" * 1000]
+    compressed = list(gzip_chunks(iter(chunks)))
+    assert all(compressed)
+    assert gzip.decompress(b"".join(compressed)) == b"".join(chunks)
+
+
+def test_gzip_of_empty_stream_still_decompresses():
+    assert gzip.decompress(b"".join(gzip_chunks(iter([])))) == b""
+
+
+def test_gzip_round_trips_a_csv_export():
+    rows = [(i, "x" * 20) for i in range(1200)]
+    plain = b"".join(csv_chunks(["id", "pad"], rows))
+    assert gzip.decompress(b"".join(gzip_chunks(csv_chunks(["id", "pad"], rows)))) == plain
+
+
+def test_iter_rows_drains_fetchmany_batches():
+    class Cursor:
+        def __init__(self, rows):
+            self.rows = rows
+            self.calls = 0
+
+        def fetchmany(self, size):
+            self.calls += 1
+            batch, self.rows = self.rows[:size], self.rows[size:]
+            return batch
+
+    cur = Cursor([(i,) for i in range(5)])
+    assert list(iter_rows(cur, size=2)) == [(i,) for i in range(5)]
+    assert cur.calls == 4
+
+
+def test_formats_table():
+    assert set(FORMATS) == {"csv", "ndjson"}
+    assert FORMATS["csv"][0] is csv_chunks
@@ -0,0 +1,66 @@
+import pytest
+
+from migrate import MIGRATIONS_DIR, discover, split_sql
+
+
+def test_statements_split_on_semicolons():
+    assert split_sql("CREATE TABLE a (id INT);\n\nCREATE TABLE b (id INT)") == [
+        "CREATE TABLE a (id INT)", "CREATE TABLE b (id INT)",
+    ]
+
+
+def test_empty_statements_and_trailing_whitespace_are_dropped():
+    assert split_sql(";;  \n SELECT 1 ;\n;\n") == ["SELECT 1"]
+    assert split_sql("") == []
+
+
+def test_semicolons_inside_quotes_are_kept():
+    sql = "INSERT INTO t VALUES ('a;b', \"c;d\");SELECT `odd;name` FROM t"
+    assert split_sql(sql) == ["INSERT INTO t VALUES ('a;b', \"c;d\")", "SELECT `odd;name` FROM t"]
+
+
+def test_escaped_quotes_do_not_end_a_string():
+    assert split_sql(r"SELECT 'it\'s; fine'; SELECT 2") == [r"SELECT 'it\'s; fine'", "SELECT 2"]
+
+
+def test_comments_are_removed_even_with_semicolons_in_them():
+    sql = """
+    -- drop it; really
+    # another; comment
+    /* block; comment
+       spanning lines */
+    SELECT 1; -- trailing
+    SELECT '-- not a comment' /* inline */ FROM dual
+    """
+    assert split_sql(sql) == ["SELECT 1", "SELECT '-- not a comment'  FROM dual"]
+
+
+def test_unterminated_comment_runs_to_the_end():
+    assert split_sql("SELECT 1; /* never closed; SELECT 2") == ["SELECT 1"]
+
+
+def test_shipped_sql_migrations_split_cleanly():
+    for _, _, path in discover():
+        if path.endswith(".sql"):
+            with open(path, encoding="utf-8") as f:
+                statements = split_sql(f.read())
+            assert statements, path
+            assert not any(s.endswith(";") for s in statements)
+
+
+def test_discover_orders_by_version_and_ignores_other_files(tmp_path):
+    for name in ("0002_b.py", "0001_a.sql", "notes.txt", "10_short.sql", "__init__.py"):
+        (tmp_path / name).write_text("")
+    assert [(v, n) for v, n, _ in discover(str(tmp_path))] == [(1, "a"), (2, "b")]
+
+
+def test_discover_rejects_duplicate_versions(tmp_path):
+    (tmp_path / "0001_a.sql").write_text("")
+    (tmp_path / "0001_b.py").write_text("")
+    with pytest.raises(SystemExit):
+        discover(str(tmp_path))
+
+
+def test_shipped_versions_are_contiguous():
+    versions = [v for v, _, _ in discover(MIGRATIONS_DIR)]
+    assert versions == list(range(1, len(versions) + 1))
@@ -0,0 +1,125 @@
+import mysql.connector
+import pytest
+
+from progress_buffer import ProgressBuffer
+
+
+def upserts(db):
+    return [(sql, params) for sql, params in db.executed if sql.startswith("INSERT INTO course_progress")]
+
+
+def test_latest_mode_keeps_the_last_value_per_key(fake_db):
+    buffer = ProgressBuffer(fake_db.connection)
+    for progress in (10, 60, 30):
+        buffer.put(1, 2, progress)
+    buffer.put(1, 3, 5)
+    assert buffer.get(1, 2) == 30
+    assert buffer.get(9, 9) is None
+
+    assert buffer.flush() == 2
+    [(sql, params)] = upserts(fake_db)
+    assert "progress = VALUES(progress)" in sql
+    assert sorted(zip(params[0::3], params[1::3], params[2::3])) == [(1, 2, 30), (1, 3, 5)]
+    assert buffer.stats()["updates"] == 4
+    assert buffer.get(1, 2) is None
+
+
+def test_max_mode_keeps_the_highest_value_and_upserts_with_greatest(fake_db):
+    buffer = ProgressBuffer(fake_db.connection, mode="max")
+    for progress in (10, 60, 30):
+        buffer.put(1, 2, progress)
+    assert buffer.get(1, 2) == 60
+    buffer.flush()
+    [(sql, params)] = upserts(fake_db)
+    assert "GREATEST(progress, VALUES(progress))" in sql
+    assert params == [1, 2, 60]
+
+
+def test_invalid_mode_is_rejected(fake_db):
+    with pytest.raises(ValueError):
+        ProgressBuffer(fake_db.connection, mode="first")
+
+
+def test_flush_writes_in_chunks_and_nothing_when_empty(fake_db):
+    buffer = ProgressBuffer(fake_db.connection, chunk_size=2)
+    assert buffer.flush() == 0
+    for course in range(5):
+        buffer.put(1, course, course)
+    assert buffer.flush() == 5
+    assert [len(params) // 3 for _, params in upserts(fake_db)] == [2, 2, 1]
+    assert len(fake_db.commits) == 3
+
+
+def test_reads_see_values_while_they_are_being_flushed(fake_db):
+    seen = []
+    buffer = ProgressBuffer(fake_db.connection)
+    fake_db.on_execute = lambda sql, params: seen.append(buffer.get(1, 2))
+    buffer.put(1, 2, 40)
+    buffer.flush()
+    assert seen == [40]
+
+
+def test_unreachable_database_requeues_without_overwriting_newer_values(fake_db):
+    buffer = ProgressBuffer(fake_db.connection)
+    buffer.put(1, 2, 10)
+    buffer.put(1, 3, 20)
+
+    def down(sql, params):
+        buffer.put(1, 2, 99)   # posted while the failing flush is in flight
+        raise mysql.connector.OperationalError("gone away")
+
+    fake_db.on_execute = down
+    with pytest.raises(mysql.connector.OperationalError):
+        buffer.flush()
+    assert buffer.stats()["flush_errors"] == 1
+    assert buffer.get(1, 2) == 99 and buffer.get(1, 3) == 20
+
+    fake_db.on_execute = None
+    assert buffer.flush() == 2
+    _, params = upserts(fake_db)[-1]
+    assert sorted(zip(params[0::3], params[1::3], params[2::3])) == [(1, 2, 99), (1, 3, 20)]
+
+
+def test_requeue_in_max_mode_keeps_the_higher_value(fake_db):
+    buffer = ProgressBuffer(fake_db.connection, mode="max")
+    buffer.put(1, 2, 80)
+
+    def down(sql, params):
+        buffer._pending[(1, 2)] = 50     # a lower value posted meanwhile
+        raise mysql.connector.OperationalError("gone away")
+
+    fake_db.on_execute = down
+    with pytest.raises(mysql.connector.OperationalError):
+        buffer.flush()
+    assert buffer.get(1, 2) == 80
+
+
+def test_bad_rows_are_dropped_one_by_one(fake_db):
+    def reject_course_7(sql, params):
+        if 7 in params[1::3]:
+            raise mysql.connector.IntegrityError("foreign key")
+
+    fake_db.on_execute = reject_course_7
+    buffer = ProgressBuffer(fake_db.connection)
+    for course in (5, 7, 9):
+        buffer.put(1, course, 50)
+    assert buffer.flush() == 2
+    assert buffer.stats()["dropped"] == 1
+    assert len(fake_db.commits) == 2
+
+
+def test_log_sql_runs_in_the_flush_transaction(fake_db):
+    buffer = ProgressBuffer(fake_db.connection, log_sql=lambda rows: ("LOG", [rows]))
+    buffer.put(1, 2, 30)
+    buffer.flush()
+    [statements] = fake_db.commits
+    assert [sql.split()[0] for sql, _ in statements] == ["INSERT", "LOG"]
+    assert statements[1][1] == [[((1, 2), 30)]]
+
+
+def test_close_flushes_what_is_left(fake_db):
+    buffer = ProgressBuffer(fake_db.connection, interval=60)
+    buffer.start()
+    buffer.put(1, 2, 30)
+    buffer.close()
+    assert buffer.stats()["rows_written"] == 1
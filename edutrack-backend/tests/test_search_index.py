@@ -0,0 +1,113 @@
+import threading
+
+import pytest
+
+from search_index import SearchIndex, _Index, tokenize
+
+
+def course(course_id, title, description="", level="Beginner"):
+    return {"id": course_id, "title": title, "description": description, "level": level, "created_by": 1}
+
+
+@pytest.fixture
+def index():
+    idx = _Index()
+    idx.put_course(course(1, "Python Basics", "Learn programming from scratch"))
+    idx.put_course(course(2, "Advanced Python", "Decorators and generators", level="Advanced"))
+    idx.put_course(course(3, "Cooking", "Knife skills"))
+    return idx
+
+
+def ids(result):
+    return [c["id"] for c in result[1]]
+
+
+def test_tokenize_folds_case_and_accents_and_drops_stopwords():
+    assert tokenize("The Café of PYTHON_3") == ["cafe", "python", "3"]
+    assert tokenize(None) == []
+
+
+def test_every_term_must_match(index):
+    assert sorted(ids(index.search(["python"]))) == [1, 2]
+    assert ids(index.search(["python", "decorators"])) == [2]
+    assert index.search(["python", "knife"]) == (0, [])
+
+
+def test_title_hits_outrank_description_hits(index):
+    index.put_course(course(4, "Knife Sharpening"))
+    assert ids(index.search(["knife"])) == [4, 3]
+
+
+def test_prefixes_expand_but_score_below_exact_words(index):
+    index.put_course(course(5, "Prog", "Prog"))
+    total, results = index.search(["prog"])
+    assert total == 2 and results[0]["id"] == 5
+    assert index.search(["p"]) == (0, [])      # too short to expand
+
+
+def test_level_filter_and_limit(index):
+    assert ids(index.search(["python"], level="advanced")) == [2]
+    total, results = index.search(["python"], limit=1)
+    assert total == 2 and len(results) == 1
+
+
+def test_lessons_are_searchable_and_removable(index):
+    index.put_lesson(3, 10, "Sourdough bread")
+    assert ids(index.search(["sourdough"])) == [3]
+    index.remove_lesson(3, 10)
+    assert index.search(["sourdough"]) == (0, [])
+    assert "sourdough" not in index.vocab
+
+
+def test_lessons_survive_a_course_update(index):
+    index.put_lesson(3, 10, "Sourdough bread")
+    index.put_course(course(3, "Baking"))
+    assert ids(index.search(["sourdough"])) == [3]
+    assert index.search(["cooking"]) == (0, [])
+
+
+def test_removing_a_course_cleans_postings_and_vocab(index):
+    index.remove_course(3)
+    assert index.search(["cooking"]) == (0, [])
+    assert "knife" not in index.postings and "knife" not in index.vocab
+    assert index.vocab == sorted(index.vocab)
+    index.remove_course(99)     # unknown ids are ignored
+
+
+def test_lesson_for_unknown_course_is_ignored(index):
+    index.put_lesson(99, 1, "Orphan")
+    assert index.search(["orphan"]) == (0, [])
+
+
+def test_repeated_words_are_capped_per_field():
+    idx = _Index()
+    idx.put_course(course(1, "spam " * 10))
+    idx.put_course(course(2, "spam spam spam"))
+    assert idx.doc_words[1]["spam"] == idx.doc_words[2]["spam"]
+
+
+def test_search_index_builds_and_replays_updates_made_during_a_rebuild():
+    release = threading.Event()
+
+    def loader():
+        release.wait(5)
+        return [course(1, "Python Basics")], [{"id": 7, "course_id": 1, "title": "Loops"}]
+
+    search = SearchIndex(loader)
+    search.start()
+    search.put_course(course(2, "Rust Basics"))     # lands while the build is loading
+    release.set()
+    assert sorted(ids(search.search("basics"))) == [1, 2]
+    assert ids(search.search("loops")) == [1]
+    assert search.stats()["builds"] == 1
+
+
+def test_failed_first_build_is_unavailable():
+    def loader():
+        raise OSError("database down")
+
+    search = SearchIndex(loader)
+    search.start()
+    with pytest.raises(RuntimeError):
+        search.search("python")
+    assert search.stats()["build_errors"] == 1
@@ -0,0 +1,72 @@
+import json
+import time
+
+from slow_queries import SlowQueryLog, fingerprint, fingerprint_id, load, params_shape, plan_warnings
+
+
+def test_literals_become_placeholders():
+    assert fingerprint("SELECT * FROM users WHERE id = 42 AND email = 'a@b.c'") == \
+        "SELECT * FROM users WHERE id = ? AND email = ?"
+    assert fingerprint("SELECT 1.5, 'it\\'s'") == "SELECT ?, ?"
+
+
+def test_identifiers_with_digits_are_kept():
+    assert fingerprint("SELECT option2, option4 FROM quizzes LIMIT 10") == \
+        "SELECT option2, option4 FROM quizzes LIMIT ?"
+
+
+def test_in_lists_of_any_length_group_together():
+    short = fingerprint("SELECT id FROM courses WHERE id IN (%s)")
+    long = fingerprint("SELECT id FROM courses WHERE id IN (%s, %s, %s)")
+    assert short == long == "SELECT id FROM courses WHERE id IN (...)"
+
+
+def test_multi_row_values_collapse_to_the_first_row():
+    two = fingerprint("INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)")
+    many = fingerprint("INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s), (%s, %s), (%s, %s)")
+    assert two == many == "INSERT INTO t (a, b) VALUES (%s, %s), ..."
+    assert fingerprint("INSERT INTO t (a) VALUES (%s)") == "INSERT INTO t (a) VALUES (%s)"
+
+
+def test_whitespace_is_normalised_and_ids_are_stable():
+    fp = fingerprint("SELECT *\n   FROM users\n\tWHERE id = 7  ")
+    assert fp == "SELECT * FROM users WHERE id = ?"
+    assert fingerprint_id(fp) == fingerprint_id(fingerprint("SELECT * FROM users WHERE id = 9"))
+    assert len(fingerprint_id(fp)) == 12
+
+
+def test_params_shape_never_contains_values():
+    assert params_shape(None) == "()"
+    assert params_shape(("secret", 3)) == "(str, int)"
+    assert params_shape({"email": "secret"}) == "{email: str}"
+    assert params_shape([("a", 1), ("b", 2)]) == "2 x (str, int)"
+    assert params_shape(list(range(30))) == "(30 params)"
+
+
+def test_record_skips_fast_statements_and_logs_slow_ones(tmp_path):
+    path = tmp_path / "slow.jsonl"
+    log = SlowQueryLog(str(path), threshold=0.1)
+    log.record("SELECT 1", (), 0.05, "/api/fast")
+    log.record("SELECT * FROM users WHERE email = %s", ("x@y.z",), 0.25, "/api/users")
+    log.record("EXPLAIN SELECT 1", (), 0.5, "/api/x")
+    [entry] = [json.loads(line) for line in path.read_text().splitlines()]
+    assert entry["route"] == "/api/users" and entry["ms"] == 250.0
+    assert entry["params"] == "(str)" and "x@y.z" not in path.read_text()
+    assert log.stats()["logged"] == 1
+
+
+def test_first_slow_sighting_is_explained_once(tmp_path, fake_db):
+    fake_db.on_execute = lambda sql, params: [{"table": "users", "type": "ALL", "rows": 900, "Extra": "Using filesort"}]
+    path = tmp_path / "slow.jsonl"
+    log = SlowQueryLog(str(path), threshold=0.0, explain_connection=fake_db.connection)
+    for user_id in (1, 2):
+        log.record("SELECT * FROM users WHERE id = %s", (user_id,), 0.2, "/api/users")
+    deadline = time.time() + 5
+    while log.stats()["explained"] < 1 and time.time() < deadline:
+        time.sleep(0.01)
+    assert fake_db.executed == [("EXPLAIN SELECT * FROM users WHERE id = %s", (1,))]
+
+    queries, plans = load(str(path))
+    [(fp_id, q)] = queries.items()
+    assert q["durations"] == [200.0, 200.0] and q["routes"] == {"/api/users": 2}
+    assert plan_warnings(plans[fp_id]) == ["full scan of users (~900 rows)", "filesort on users"]
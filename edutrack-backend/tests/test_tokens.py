@@ -0,0 +1,110 @@
+import time
+
+import pytest
+
+from tokens import TokenSigner, TokenError, RevocationList, parse_keys
+
+
+def test_parse_keys_keeps_order_and_rejects_bad_entries():
+    keys = parse_keys("new:s2, old:s1,")
+    assert list(keys) == ["new", "old"]
+    assert keys["old"] == b"s1"
+    with pytest.raises(ValueError):
+        parse_keys("nosecret")
+
+
+def test_issue_and_verify_round_trip():
+    signer = TokenSigner({"k1": b"secret"})
+    claims = signer.verify(signer.issue(7, "a@x.com", "student"))
+    assert (claims["uid"], claims["email"], claims["role"]) == (7, "a@x.com", "student")
+    assert claims["exp"] - claims["iat"] == signer.ttl
+
+
+def test_rotation_keeps_old_tokens_valid_until_the_key_is_dropped():
+    old = TokenSigner({"k1": b"one"})
+    token = old.issue(1, "a@x.com", "student")
+
+    rotated = TokenSigner({"k2": b"two", "k1": b"one"})
+    assert rotated.verify(token)["uid"] == 1
+    assert rotated.issue(1, "a@x.com", "student").startswith("k2.")
+
+    with pytest.raises(TokenError, match="Unknown signing key"):
+        TokenSigner({"k2": b"two"}).verify(token)
+
+
+def test_same_kid_with_another_secret_is_rejected():
+    token = TokenSigner({"k1": b"one"}).issue(1, "a@x.com", "student")
+    with pytest.raises(TokenError, match="Invalid signature"):
+        TokenSigner({"k1": b"other"}).verify(token)
+
+
+def test_tampered_or_malformed_tokens_are_rejected():
+    signer = TokenSigner({"k1": b"secret"})
+    kid, body, signature = signer.issue(1, "a@x.com", "student").split(".")
+    forged = TokenSigner({"k1": b"secret"}).issue(1, "a@x.com", "admin").split(".")[1]
+    with pytest.raises(TokenError):
+        signer.verify(f"{kid}.{forged}.{signature}")
+    for bad in ("", "a.b", "a.b.c.d", None, f"{kid}.{body}.!!!"):
+        with pytest.raises(TokenError):
+            signer.verify(bad)
+
+
+def test_expired_tokens_are_rejected(monkeypatch):
+    signer = TokenSigner({"k1": b"secret"}, ttl=60)
+    token = signer.issue(1, "a@x.com", "student")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    with pytest.raises(TokenError, match="expired"):
+        signer.verify(token)
+
+
+def test_revoked_tokens_are_rejected_without_a_reload():
+    revocations = RevocationList(lambda: {})
+    signer = TokenSigner({"k1": b"secret"}, revocations=revocations)
+    token = signer.issue(1, "a@x.com", "student")
+    claims = signer.verify(token)
+    revocations.add(claims["jti"], claims["exp"])
+    with pytest.raises(TokenError, match="revoked"):
+        signer.verify(token)
+
+
+def test_revocation_refresh_keeps_local_adds_and_drops_expired():
+    now = time.time()
+    revocations = RevocationList(lambda: {"db": now + 100})
+    revocations.add("local", now + 100)
+    revocations.add("stale", now - 1)
+    revocations.refresh()
+    assert revocations.is_revoked("db") and revocations.is_revoked("local")
+    assert not revocations.is_revoked("stale")
+    assert len(revocations) == 2
+
+
+def test_revocation_reload_failure_keeps_the_last_list():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        if len(calls) > 1:
+            raise RuntimeError("database down")
+        return {"jti": time.time() + 100}
+
+    revocations = RevocationList(loader, refresh_interval=0.01)
+    revocations.start()
+    deadline = time.monotonic() + 2
+    while revocations.errors == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    revocations.close()
+    assert revocations.errors >= 1
+    assert revocations.is_revoked("jti")
+
+
+def test_pin_is_bound_to_user_and_deadline(monkeypatch):
+    signer = TokenSigner({"k1": b"secret"})
+    marker = signer.pin("a@x.com", 5)
+    assert signer.pinned(marker, "a@x.com")
+    assert not signer.pinned(marker, "b@x.com")
+    assert not signer.pinned("k1.1.xx", "a@x.com")
+    assert not signer.pinned("garbage", "a@x.com")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 6)
+    assert not signer.pinned(marker, "a@x.com")
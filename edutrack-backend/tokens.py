@@ -0,0 +1,178 @@
+import hmac
+import json
+import time
+import base64
+import hashlib
+import logging
+import secrets
+import threading
+
+log = logging.getLogger(__name__)
+
+
+class TokenError(Exception):
+    """Raised when a token is malformed, badly signed, expired or revoked"""
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def parse_keys(spec):
+    """Parse "kid:secret,kid2:secret2" into an ordered {kid: secret_bytes}; the first key signs"""
+    keys = {}
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        kid, _, secret = part.partition(":")
+        if not kid or not secret:
+            raise ValueError(f"Invalid session key entry: {part!r}")
+        keys[kid] = secret.encode("utf-8")
+    return keys
+
+
+class RevocationList:
+    """In-process copy of revoked token ids, reloaded from a loader on a background thread.
+
+    is_revoked() only reads the in-memory dict, so verifying a token never
+    waits on MySQL; a failed reload keeps the last known list.
+    """
+
+    def __init__(self, loader, refresh_interval=30.0):
+        self._loader = loader
+        self.refresh_interval = refresh_interval
+        self._revoked = {}            # jti -> expires_at (epoch seconds)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.refreshes = 0
+        self.errors = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="revocations", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                log.warning("revocation refresh failed, keeping the last list: %s", e)
+            if self._stopped.wait(self.refresh_interval):
+                return
+
+    def refresh(self):
+        fresh = dict(self._loader())
+        with self._lock:
+            # Keep ids revoked in this process since the load started (add() runs before the row commits)
+            now = time.time()
+            fresh.update((jti, exp) for jti, exp in self._revoked.items() if jti not in fresh and exp > now)
+            self._revoked = fresh
+            self.refreshes += 1
+
+    def close(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._revoked[jti] = expires_at
+
+    def is_revoked(self, jti):
+        # A plain dict read: refresh() swaps in a new dict rather than mutating this one
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def __len__(self):
+        return len(self._revoked)
+
+
+class TokenSigner:
+    """Issues and verifies HMAC-SHA256 signed, expiring session tokens.
+
+    Token layout: <kid>.<base64url(json claims)>.<base64url(signature)>.
+    Verification is pure CPU work: no database lookup for identity or role.
+    Old keys stay in the key set to verify tokens issued before a rotation.
+    """
+
+    def __init__(self, keys, ttl=8 * 3600, revocations=None):
+        if not keys:
+            raise ValueError("At least one signing key is required")
+        self.keys = dict(keys)
+        self.signing_kid = next(iter(self.keys))
+        self.ttl = ttl
+        self.revocations = revocations
+
+    def _sign(self, kid, body):
+        return hmac.new(self.keys[kid], f"{kid}.{body}".encode("ascii"), hashlib.sha256).digest()
+
+    def issue(self, user_id, email, role):
+        now = int(time.time())
+        claims = {
+            "uid": user_id,
+            "email": email,
+            "role": role,
+            "iat": now,
+            "exp": now + self.ttl,
+            "jti": secrets.token_hex(16),
+        }
+        body = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+        kid = self.signing_kid
+        return f"{kid}.{body}.{_b64encode(self._sign(kid, body))}"
+
+    def verify(self, token):
+        """Return the claims dict or raise TokenError"""
+        try:
+            kid, body, signature = token.split(".")
+        except (AttributeError, ValueError):
+            raise TokenError("Malformed token")
+
+        if kid not in self.keys:
+            raise TokenError("Unknown signing key")
+        try:
+            valid = hmac.compare_digest(self._sign(kid, body), _b64decode(signature))
+            claims = json.loads(_b64decode(body)) if valid else None
+        except Exception:
+            raise TokenError("Malformed token")
+        if not valid:
+            raise TokenError("Invalid signature")
+
+        if claims.get("exp", 0) <= time.time():
+            raise TokenError("Token expired")
+        if self.revocations is not None and self.revocations.is_revoked(claims.get("jti")):
+            raise TokenError("Token revoked")
+        return claims
+
+    # ---------- read-your-writes markers ----------
+    # <kid>.<deadline epoch ms>.<base64url(signature over user and deadline)>, handed to the
+    # client after a write so whichever worker serves its next read can check it
+
+    def _sign_pin(self, kid, user, until):
+        return hmac.new(self.keys[kid], f"pin.{kid}.{user}.{until}".encode("utf-8"), hashlib.sha256).digest()
+
+    def pin(self, user, seconds):
+        """Marker saying `user` wrote and should read from the primary for `seconds`"""
+        until = int((time.time() + seconds) * 1000)
+        kid = self.signing_kid
+        return f"{kid}.{until}.{_b64encode(self._sign_pin(kid, user, until))}"
+
+    def pinned(self, marker, user):
+        """True while `marker` is an unexpired pin issued for `user`"""
+        try:
+            kid, until, signature = marker.split(".")
+            until = int(until)
+            if kid not in self.keys or until <= time.time() * 1000:
+                return False
+            return hmac.compare_digest(self._sign_pin(kid, user, until), _b64decode(signature))
+        except (AttributeError, ValueError):
+            return False